@@ -53,6 +53,61 @@ MARKET_TOOLS = [
             "required": ["symbol"],
         },
     },
+    {
+        "name": "get_stock_quotes",
+        "description": "Get real-time quotes for several stocks at once (up to 10), returned as a compact table. Use this instead of repeated get_stock_quote calls when the user asks about or compares more than one stock.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Stock ticker symbols (e.g., [\"AAPL\", \"MSFT\", \"NVDA\"])",
+                },
+            },
+            "required": ["symbols"],
+        },
+    },
+    {
+        "name": "get_company_infos",
+        "description": "Get fundamentals (sector, market cap, P/E, EPS, dividend yield, beta, 52-week range) for several companies at once (up to 10), returned as a compact table without business descriptions. Use this to compare companies.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Stock ticker symbols",
+                },
+            },
+            "required": ["symbols"],
+        },
+    },
+    {
+        "name": "get_price_histories",
+        "description": "Get price performance for several stocks at once (up to 10): start/end close, % change, high, low and average volume per symbol, plus a short sampled series of closes. Use this to compare performance over a period.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Stock ticker symbols",
+                },
+                "period": {
+                    "type": "string",
+                    "description": "Time period. Options: 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, ytd, max",
+                    "default": "1mo",
+                },
+                "interval": {
+                    "type": "string",
+                    "description": "Data interval. Options: 1d, 1wk, 1mo",
+                    "default": "1d",
+                },
+            },
+            "required": ["symbols"],
+        },
+    },
     {
         "name": "get_sector_performance",
         "description": "Get performance data for all major market sectors via their ETFs (XLK, XLV, XLF, etc.). Use this when the user asks about sector trends, market overview, or which sectors are performing well.",
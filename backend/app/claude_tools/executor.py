@@ -1,10 +1,23 @@
-import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
-from app.services import market_data_service
+from app.claude_tools import registry
+from app.claude_tools.definitions import TOOLS
+from app.claude_tools.registry import ToolResult
+from app.services import financial_summary_service, market_data_service
+
+logger = logging.getLogger(__name__)
+
+TOOL_WORKERS = 16
+DESCRIPTION_CHARS = 300
+HISTORY_RECENT_CLOSES = 10
+
+_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
 
 
 def execute_tool(
@@ -13,40 +26,40 @@ def execute_tool(
     db: Optional[Session] = None,
     user_id: Optional[int] = None,
 ) -> str:
-    try:
-        # Market data tools
-        if tool_name == "get_stock_quote":
-            result = market_data_service.get_stock_quote(tool_input["symbol"])
-        elif tool_name == "get_price_history":
-            result = market_data_service.get_price_history(
-                tool_input["symbol"],
-                tool_input.get("period", "1mo"),
-                tool_input.get("interval", "1d"),
-            )
-        elif tool_name == "get_company_info":
-            result = market_data_service.get_company_info(tool_input["symbol"])
-        elif tool_name == "get_sector_performance":
-            result = market_data_service.get_sector_performance()
-
-        # Internal tools (require db + user_id)
-        elif tool_name == "get_financial_plans":
-            result = _get_financial_plans(db, user_id)
-        elif tool_name == "get_user_memory":
-            result = _get_user_memory(db, user_id)
-        elif tool_name == "save_user_memory":
-            result = _save_user_memory(db, user_id, tool_input["key"], tool_input["value"])
-        elif tool_name == "get_active_alerts":
-            result = _get_active_alerts(db, user_id)
-        elif tool_name == "get_usage_summary":
-            result = _get_usage_summary(db, user_id)
-        elif tool_name == "get_pending_insights":
-            result = _get_pending_insights(db, user_id)
-        else:
-            return json.dumps({"error": f"Unknown tool: {tool_name}"})
-
-        return json.dumps(result, default=str)
-    except Exception as e:
-        return json.dumps({"error": str(e)})
+    """Run one tool and return its JSON result."""
+    return registry.run(tool_name, tool_input, db=db, user_id=user_id).content
+
+
+# ── Result compaction ──
+
+def _compact_company(result: Dict[str, Any]) -> Dict[str, Any]:
+    description = result.get("description") or ""
+    if len(description) > DESCRIPTION_CHARS:
+        result = {**result, "description": description[:DESCRIPTION_CHARS].rsplit(" ", 1)[0] + "..."}
+    return result
+
+
+def _compact_history(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the OHLCV rows with summary stats and the most recent closes."""
+    records = result.get("data") or []
+    if not records:
+        return result
+    first, last = records[0]["close"], records[-1]["close"]
+    return {
+        "symbol": result["symbol"],
+        "period": result["period"],
+        "interval": result["interval"],
+        "start": records[0]["date"],
+        "end": records[-1]["date"],
+        "start_close": first,
+        "end_close": last,
+        "change_pct": round((last / first - 1) * 100, 2) if first else None,
+        "high": max(r["high"] for r in records),
+        "low": min(r["low"] for r in records),
+        "avg_volume": int(sum(r["volume"] for r in records) / len(records)),
+        "points": len(records),
+        "recent_closes": [{"date": r["date"], "close": r["close"]} for r in records[-HISTORY_RECENT_CLOSES:]],
+    }
 
 
 def _get_financial_plans(db: Optional[Session], user_id: Optional[int]) -> dict:
@@ -143,6 +156,7 @@ def _get_active_alerts(db: Optional[Session], user_id: Optional[int]) -> dict:
                 "symbol": a.symbol,
                 "condition": a.condition,
                 "target_price": float(a.target_price),
+                "threshold_pct": a.threshold_pct,
                 "triggered": a.triggered,
             }
             for a in alerts
@@ -160,6 +174,12 @@ def _get_usage_summary(db: Optional[Session], user_id: Optional[int]) -> dict:
     return get_all_usage(db, user_id)
 
 
+def _user_summary(db: Optional[Session], user_id: Optional[int], summarize) -> dict:
+    if not db or not user_id:
+        return {"error": "No session context"}
+    return summarize(db, user_id)
+
+
 def _get_pending_insights(db: Optional[Session], user_id: Optional[int]) -> dict:
     if not db or not user_id:
         return {"insights": []}
@@ -186,3 +206,75 @@ def _get_pending_insights(db: Optional[Session], user_id: Optional[int]) -> dict
         ],
         "total": len(insights),
     }
+
+
+# ── Registry ──
+
+_SCHEMAS = {schema["name"]: schema for schema in TOOLS}
+
+
+def _tool(name: str, handler, **options) -> None:
+    registry.register(_SCHEMAS[name], handler, **options)
+
+
+_tool("get_stock_quote", lambda i, db, uid: market_data_service.get_stock_quote(i["symbol"]), cache_ttl=30)
+_tool("get_stock_quotes", lambda i, db, uid: market_data_service.get_stock_quotes(i["symbols"]), cache_ttl=30)
+_tool(
+    "get_price_history",
+    lambda i, db, uid: market_data_service.get_price_history(i["symbol"], i.get("period", "1mo"), i.get("interval", "1d")),
+    timeout=20.0, cache_ttl=300, compact=_compact_history,
+)
+_tool(
+    "get_price_histories",
+    lambda i, db, uid: market_data_service.get_price_histories(i["symbols"], i.get("period", "1mo"), i.get("interval", "1d")),
+    timeout=25.0, cache_ttl=300,
+)
+_tool(
+    "get_company_info", lambda i, db, uid: market_data_service.get_company_info(i["symbol"]),
+    cache_ttl=900, compact=_compact_company,
+)
+_tool("get_company_infos", lambda i, db, uid: market_data_service.get_company_infos(i["symbols"]), timeout=20.0, cache_ttl=900)
+_tool("get_sector_performance", lambda i, db, uid: market_data_service.get_sector_performance(), timeout=25.0, cache_ttl=60)
+
+_tool("get_financial_plans", lambda i, db, uid: _get_financial_plans(db, uid), uses_db=True)
+_tool("get_user_memory", lambda i, db, uid: _get_user_memory(db, uid), uses_db=True)
+_tool("save_user_memory", lambda i, db, uid: _save_user_memory(db, uid, i["key"], i["value"]), uses_db=True)
+_tool("get_active_alerts", lambda i, db, uid: _get_active_alerts(db, uid), uses_db=True)
+_tool("get_usage_summary", lambda i, db, uid: _get_usage_summary(db, uid), uses_db=True)
+_tool("get_pending_insights", lambda i, db, uid: _get_pending_insights(db, uid), uses_db=True)
+_tool("get_portfolio_summary", lambda i, db, uid: _user_summary(db, uid, financial_summary_service.portfolio_summary), uses_db=True)
+_tool("get_budget_summary", lambda i, db, uid: _user_summary(db, uid, financial_summary_service.budget_summary), uses_db=True)
+_tool("get_net_worth", lambda i, db, uid: _user_summary(db, uid, financial_summary_service.net_worth_summary), uses_db=True)
+
+
+def execute_tools(
+    calls: List[Tuple[str, Dict[str, Any]]],
+    db: Optional[Session] = None,
+    user_id: Optional[int] = None,
+) -> List[ToolResult]:
+    """Execute a turn's tool calls, running tools that don't need the DB concurrently.
+
+    Tools that use the DB session run inline, in order. Results are returned
+    in the same order as ``calls``; a tool that exceeds its timeout yields an
+    error result instead of holding up the turn.
+    """
+    results: List[Optional[ToolResult]] = [None] * len(calls)
+    futures = {}
+    started = time.monotonic()
+    for i, (name, tool_input) in enumerate(calls):
+        tool = registry.REGISTRY.get(name)
+        if tool is not None and not tool.uses_db:
+            futures[i] = (tool, _pool.submit(registry.run, name, tool_input))
+
+    for i, (name, tool_input) in enumerate(calls):
+        if i not in futures:
+            results[i] = registry.run(name, tool_input, db=db, user_id=user_id)
+
+    for i, (tool, future) in futures.items():
+        try:
+            results[i] = future.result(timeout=max(0.0, tool.timeout - (time.monotonic() - started)))
+        except FutureTimeoutError:
+            logger.warning(f"Tool '{tool.name}' timed out after {tool.timeout:.0f}s")
+            results[i] = ToolResult.error(f"{tool.name} timed out after {tool.timeout:.0f} seconds")
+
+    return results
@@ -68,4 +68,31 @@ INTERNAL_TOOLS = [
             "required": [],
         },
     },
+    {
+        "name": "get_portfolio_summary",
+        "description": "Get the user's actual portfolio: total value, cost basis and gain/loss, plus one row per position (shares, average cost, current price, market value, portfolio weight, gain/loss, today's change), largest first. Use this for any question about the user's holdings, allocation or performance instead of looking up their symbols one by one.",
+        "input_schema": {
+            "type": "object",
+            "properties": {},
+            "required": [],
+        },
+    },
+    {
+        "name": "get_budget_summary",
+        "description": "Get the user's monthly budget from their recurring transactions: income, expenses, net savings, savings rate and spending by category. Use when the user asks about their budget, spending or how much they can save or invest.",
+        "input_schema": {
+            "type": "object",
+            "properties": {},
+            "required": [],
+        },
+    },
+    {
+        "name": "get_net_worth",
+        "description": "Get the user's net worth: total assets, total liabilities and the breakdown of each by category. Use when the user asks about their net worth, debts or overall financial position.",
+        "input_schema": {
+            "type": "object",
+            "properties": {},
+            "required": [],
+        },
+    },
 ]
@@ -0,0 +1,128 @@
+"""Declarative registry of the tools Claude can call.
+
+Each tool declares its handler, API schema, timeout, result-cache TTL and
+an optional compaction step that trims the raw result before it is sent to
+the model. Results are serialized to JSON once, when produced; cached
+results are shared across conversations and users, so only tools whose
+output doesn't depend on the user (``uses_db=False``) may set a TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services import write_invalidation
+
+DEFAULT_TOOL_TIMEOUT = 15.0  # seconds
+CACHE_SIZE = 2048
+
+
+@dataclass(frozen=True)
+class Tool:
+    name: str
+    schema: Dict[str, Any]  # name, description and input_schema, as sent to the API
+    handler: Callable[..., Any]  # handler(tool_input, db, user_id) -> JSON-able result
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+    cache_ttl: float = 0  # seconds; 0 disables caching
+    compact: Optional[Callable[[Any], Any]] = None
+    uses_db: bool = False  # runs inline on the request's session instead of the pool
+
+
+@dataclass(frozen=True)
+class ToolResult:
+    data: Any  # parsed result, for storage and events
+    content: str  # JSON, as sent to the model
+
+    @classmethod
+    def of(cls, data: Any) -> "ToolResult":
+        return cls(data=data, content=json.dumps(data, default=str))
+
+    @classmethod
+    def error(cls, message: str) -> "ToolResult":
+        return cls.of({"error": message})
+
+    @property
+    def is_error(self) -> bool:
+        return isinstance(self.data, dict) and "error" in self.data
+
+
+REGISTRY: Dict[str, Tool] = {}
+
+_cache: "OrderedDict[Tuple[str, str], Tuple[float, ToolResult]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def register(
+    schema: Dict[str, Any],
+    handler: Callable[..., Any],
+    timeout: float = DEFAULT_TOOL_TIMEOUT,
+    cache_ttl: float = 0,
+    compact: Optional[Callable[[Any], Any]] = None,
+    uses_db: bool = False,
+) -> Tool:
+    if cache_ttl and uses_db:
+        raise ValueError(f"Tool '{schema['name']}' reads user data and can't be cached across users")
+    tool = Tool(
+        name=schema["name"], schema=schema, handler=handler, timeout=timeout,
+        cache_ttl=cache_ttl, compact=compact, uses_db=uses_db,
+    )
+    REGISTRY[tool.name] = tool
+    return tool
+
+
+def schemas() -> List[Dict[str, Any]]:
+    """Tool definitions for the Messages API, in registration order."""
+    return [tool.schema for tool in REGISTRY.values()]
+
+
+def _cache_key(tool: Tool, tool_input: Dict[str, Any]) -> Tuple[str, str]:
+    return tool.name, json.dumps(tool_input, sort_keys=True, default=str)
+
+
+def run(
+    name: str,
+    tool_input: Dict[str, Any],
+    db: Optional[Session] = None,
+    user_id: Optional[int] = None,
+) -> ToolResult:
+    """Execute a tool, serving and filling its result cache. Errors become error results."""
+    tool = REGISTRY.get(name)
+    if tool is None:
+        return ToolResult.error(f"Unknown tool: {name}")
+
+    key = _cache_key(tool, tool_input) if tool.cache_ttl else None
+    if key is not None:
+        with _cache_lock:
+            hit = _cache.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                _cache.move_to_end(key)
+                return hit[1]
+
+    try:
+        data = tool.handler(tool_input, db, user_id)
+        if tool.compact is not None:
+            data = tool.compact(data)
+        result = ToolResult.of(data)
+    except Exception as e:
+        return ToolResult.error(str(e))
+
+    if key is not None and not result.is_error:
+        with _cache_lock:
+            _cache[key] = (time.monotonic() + tool.cache_ttl, result)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return result
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+write_invalidation.register_cache(clear_cache)
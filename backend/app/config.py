@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,7 +10,18 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
 
     ANTHROPIC_API_KEY: str = ""
+    ANTHROPIC_BASE_URL: Optional[str] = None  # e.g. http://localhost:8090 for app.fake_anthropic
     CLAUDE_MODEL: str = "claude-sonnet-4-20250514"
+    CHAT_ROUTING_ENABLED: bool = True  # send simple chat turns to CHAT_FAST_MODEL
+    CHAT_FAST_MODEL: str = "claude-haiku-4-5-20251001"
+    CHAT_FAST_MAX_TOKENS: int = 1024
+    CHAT_ROUTER_CLASSIFIER: bool = False  # ask CHAT_FAST_MODEL about turns the heuristics can't place
+    CHAT_HISTORY_TOKEN_BUDGET: int = 6000
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONCURRENCY_PER_MODEL: int = 8
+    LLM_MAX_RETRIES: int = 4
+    LLM_BATCH_BACKEND: str = "api"  # "api" for the Message Batches API, "local" to run through llm_gateway
+    NIGHTLY_GENERATION_HOUR: int = 9  # UTC; insights and daily briefings are generated in bulk then
 
     STRIPE_SECRET_KEY: str = ""
     STRIPE_PUBLISHABLE_KEY: str = ""
@@ -18,6 +31,12 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = "http://localhost:3000"
     BACKEND_URL: str = "http://localhost:8000"
 
+    SCHEDULER_ENABLED: bool = True
+    ALERT_CHECK_INTERVAL_SECONDS: int = 60
+    QUOTE_STREAM_INTERVAL_SECONDS: int = 10
+    MARKET_SNAPSHOT_TTL_SECONDS: int = 300  # how often the market context in LLM prompts is rebuilt
+    NEWS_CACHE_TTL_SECONDS: int = 600
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 
@@ -0,0 +1,358 @@
+"""Local stand-in for the Anthropic Messages API, for load testing.
+
+Run it next to the backend and point the backend at it:
+
+    FAKE_ANTHROPIC_LATENCY_MS=800 uvicorn app.fake_anthropic:app --port 8090
+    ANTHROPIC_BASE_URL=http://localhost:8090 uvicorn app.main:app
+
+It implements POST /v1/messages, streaming and non-streaming, with
+Anthropic-shaped responses and usage (token counts are estimated; prompt
+caching is simulated by remembering prefixes up to each cache_control
+breakpoint). Replies come from a script file when one matches, otherwise
+from defaults that keep every call site working: JSON call sites get an
+empty-but-valid JSON reply, and chat turns that mention tickers call
+get_stock_quote (or get_stock_quotes for several) once before answering.
+
+The Message Batches endpoints (create, retrieve, results, cancel under
+/v1/messages/batches) are there too, so nightly generation works with the
+default LLM_BATCH_BACKEND="api". Each request is answered the same way as
+POST /v1/messages; a batch ends after one simulated latency, and requests
+that roll an overload come back ``errored``.
+
+Script file (FAKE_ANTHROPIC_SCRIPT), first matching rule wins; a rule
+matches when ``match`` occurs in the last user text or the system prompt.
+Each tool round of a turn advances one step (the last step repeats):
+
+    {"rules": [{"match": "compare", "steps": [
+        {"tool_use": [{"name": "get_stock_quote", "input": {"symbol": "AAPL"}},
+                      {"name": "get_stock_quote", "input": {"symbol": "MSFT"}}]},
+        {"text": "AAPL is up more than MSFT today."}]}]}
+
+Latency is lognormal around FAKE_ANTHROPIC_LATENCY_MS (spread set by
+FAKE_ANTHROPIC_LATENCY_SIGMA) before the first byte, then streamed at
+FAKE_ANTHROPIC_TOKENS_PER_SECOND. FAKE_ANTHROPIC_OVERLOAD_RATE and
+FAKE_ANTHROPIC_RATE_LIMIT_RATE return 529s and 429s at those rates.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic_settings import BaseSettings
+
+
+class FakeSettings(BaseSettings):
+    LATENCY_MS: float = 600.0  # median time to first token
+    LATENCY_SIGMA: float = 0.4  # lognormal spread; 0 for fixed latency
+    TOKENS_PER_SECOND: float = 80.0
+    OVERLOAD_RATE: float = 0.0
+    RATE_LIMIT_RATE: float = 0.0
+    REPLY_WORDS: int = 120  # length of default chat replies
+    SCRIPT: Optional[str] = None  # path to a JSON script file
+    SEED: Optional[int] = None
+
+    model_config = {"env_prefix": "FAKE_ANTHROPIC_", "env_file": ".env", "extra": "ignore"}
+
+
+fake_settings = FakeSettings()
+app = FastAPI(title="Fake Anthropic Messages API")
+
+CHARS_PER_TOKEN = 4
+TICKER_RE = re.compile(r"\b[A-Z]{2,5}\b")
+NOT_TICKERS = {"AI", "API", "CEO", "CFO", "EPS", "ETF", "FAQ", "GDP", "IPO", "IRA", "OK", "PE", "ROI", "USA", "US", "USD"}
+FILLER = ("Based on the current data the position looks reasonable relative to your goals and risk "
+          "tolerance but keep an eye on concentration and costs over time").split()
+
+_rng = random.Random(fake_settings.SEED)
+_rules: Optional[List[Dict[str, Any]]] = None
+_seen_prefixes: set = set()
+_batches: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _script_rules() -> List[Dict[str, Any]]:
+    global _rules
+    if _rules is None:
+        _rules = []
+        if fake_settings.SCRIPT:
+            with open(fake_settings.SCRIPT) as f:
+                _rules = json.load(f).get("rules", [])
+    return _rules
+
+
+def _tokens(value: Any) -> int:
+    text = value if isinstance(value, str) else json.dumps(value)
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _text_of(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+
+def _is_tool_result(message: Dict[str, Any]) -> bool:
+    content = message.get("content")
+    return isinstance(content, list) and any(block.get("type") == "tool_result" for block in content)
+
+
+def _turn_state(messages: List[Dict[str, Any]]):
+    """(last plain user text, tool rounds completed since it)."""
+    rounds = 0
+    for message in reversed(messages):
+        if message["role"] == "user":
+            if _is_tool_result(message):
+                rounds += 1
+            else:
+                return _text_of(message["content"]), rounds
+    return "", rounds
+
+
+def _reply(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Content blocks for this request."""
+    system = body.get("system") or ""
+    system_text = system if isinstance(system, str) else _text_of(system)
+    user_text, rounds = _turn_state(body.get("messages", []))
+
+    for rule in _script_rules():
+        if rule.get("match", "") in user_text or rule.get("match", "") in system_text:
+            step = rule["steps"][min(rounds, len(rule["steps"]) - 1)]
+            blocks = [{"type": "text", "text": step["text"]}] if step.get("text") else []
+            for call in step.get("tool_use", []):
+                blocks.append({"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+                               "name": call["name"], "input": call.get("input", {})})
+            return blocks
+
+    if "JSON array" in system_text or "JSON array" in user_text:
+        return [{"type": "text", "text": "[]"}]
+    if "JSON object" in system_text:
+        return [{"type": "text", "text": json.dumps({"summary": "Discussed the user's finances.", "key_facts": [], "action_items": []})}]
+
+    tools = {tool["name"] for tool in body.get("tools", [])}
+    tickers = [t for t in TICKER_RE.findall(user_text) if t not in NOT_TICKERS]
+    if rounds == 0 and len(tickers) > 1 and "get_stock_quotes" in tools:
+        return [
+            {"type": "text", "text": f"Let me pull quotes for {', '.join(tickers)}."},
+            {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+             "name": "get_stock_quotes", "input": {"symbols": tickers}},
+        ]
+    if rounds == 0 and tickers and "get_stock_quote" in tools:
+        return [
+            {"type": "text", "text": f"Let me look up {tickers[0]}."},
+            {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}",
+             "name": "get_stock_quote", "input": {"symbol": tickers[0]}},
+        ]
+
+    words = min(fake_settings.REPLY_WORDS, body.get("max_tokens", 1024))
+    return [{"type": "text", "text": " ".join(FILLER[i % len(FILLER)] for i in range(words)) + "."}]
+
+
+def _usage(body: Dict[str, Any], content: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Estimated usage, with cache reads for prefixes seen before."""
+    segments = [body.get("tools", [])]
+    system = body.get("system") or ""
+    segments += [system] if isinstance(system, str) else system
+    segments += body.get("messages", [])
+
+    total = sum(_tokens(s) for s in segments)
+    cached = created = 0
+    prefix = hashlib.sha1()
+    prefix_tokens = 0
+    for segment in segments:
+        prefix.update(json.dumps(segment, sort_keys=True).encode())
+        prefix_tokens += _tokens(segment)
+        if "cache_control" in json.dumps(segment):
+            key = prefix.hexdigest()
+            with _lock:
+                seen = key in _seen_prefixes
+                _seen_prefixes.add(key)
+            if seen:
+                cached = prefix_tokens
+            else:
+                created = prefix_tokens - cached
+    return {
+        "input_tokens": total - cached - created,
+        "output_tokens": sum(_tokens(b.get("text") or b.get("input", {})) for b in content),
+        "cache_read_input_tokens": cached,
+        "cache_creation_input_tokens": created,
+    }
+
+
+def _latency_seconds() -> float:
+    median = fake_settings.LATENCY_MS / 1000
+    if fake_settings.LATENCY_SIGMA <= 0:
+        return median
+    return _rng.lognormvariate(math.log(median), fake_settings.LATENCY_SIGMA) if median > 0 else 0.0
+
+
+def _error_response() -> Optional[JSONResponse]:
+    roll = _rng.random()
+    if roll < fake_settings.OVERLOAD_RATE:
+        return JSONResponse(
+            status_code=529,
+            content={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+        )
+    if roll < fake_settings.OVERLOAD_RATE + fake_settings.RATE_LIMIT_RATE:
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": "1"},
+            content={"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited"}},
+        )
+    return None
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    body = await request.json()
+    error = _error_response()
+    if error is not None:
+        await asyncio.sleep(_latency_seconds() / 4)
+        return error
+
+    message = _message(body)
+    usage = message["usage"]
+
+    if not body.get("stream"):
+        await asyncio.sleep(_latency_seconds() + usage["output_tokens"] / fake_settings.TOKENS_PER_SECOND)
+        return message
+
+    return StreamingResponse(_stream(message), media_type="text/event-stream")
+
+
+def _message(body: Dict[str, Any]) -> Dict[str, Any]:
+    content = _reply(body)
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "claude-fake"),
+        "content": content,
+        "stop_reason": "tool_use" if any(b["type"] == "tool_use" for b in content) else "end_turn",
+        "stop_sequence": None,
+        "usage": _usage(body, content),
+    }
+
+
+def _timestamp(at: float) -> str:
+    return datetime.fromtimestamp(at, timezone.utc).isoformat()
+
+
+def _batch_results(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not batch["canceled"]:
+        return batch["results"]
+    return [entry if entry["result"]["type"] == "errored" else {**entry, "result": {"type": "canceled"}}
+            for entry in batch["results"]]
+
+
+def _batch_view(batch: Dict[str, Any], base_url: str) -> Dict[str, Any]:
+    """The batch as the API reports it; it ends once its simulated latency has passed."""
+    ended = time.time() >= batch["ends_at"]
+    counts = dict.fromkeys(("processing", "succeeded", "errored", "canceled", "expired"), 0)
+    if ended:
+        for entry in _batch_results(batch):
+            counts[entry["result"]["type"]] += 1
+    else:
+        counts["processing"] = len(batch["results"])
+    return {
+        "id": batch["id"],
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": counts,
+        "created_at": _timestamp(batch["created_at"]),
+        "expires_at": _timestamp(batch["created_at"] + timedelta(days=1).total_seconds()),
+        "ended_at": _timestamp(batch["ends_at"]) if ended else None,
+        "cancel_initiated_at": _timestamp(batch["canceled"]) if batch["canceled"] else None,
+        "archived_at": None,
+        "results_url": f"{base_url}v1/messages/batches/{batch['id']}/results" if ended else None,
+    }
+
+
+def _get_batch(batch_id: str) -> Dict[str, Any]:
+    with _lock:
+        batch = _batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return batch
+
+
+@app.post("/v1/messages/batches")
+async def create_batch(request: Request):
+    body = await request.json()
+    results = []
+    for item in body.get("requests", []):
+        if _error_response() is not None:
+            result = {"type": "errored", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+        else:
+            result = {"type": "succeeded", "message": _message(item["params"])}
+        results.append({"custom_id": item["custom_id"], "result": result})
+
+    now = time.time()
+    batch = {"id": f"msgbatch_{uuid.uuid4().hex[:24]}", "created_at": now, "ends_at": now + _latency_seconds(),
+             "canceled": None, "results": results}
+    with _lock:
+        _batches[batch["id"]] = batch
+    return _batch_view(batch, str(request.base_url))
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def retrieve_batch(batch_id: str, request: Request):
+    return _batch_view(_get_batch(batch_id), str(request.base_url))
+
+
+@app.post("/v1/messages/batches/{batch_id}/cancel")
+async def cancel_batch(batch_id: str, request: Request):
+    batch = _get_batch(batch_id)
+    with _lock:
+        if not batch["canceled"] and time.time() < batch["ends_at"]:
+            # Nothing has been answered yet, so everything but the errors ends canceled
+            batch["canceled"] = batch["ends_at"] = time.time()
+    return _batch_view(batch, str(request.base_url))
+
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def batch_results(batch_id: str):
+    lines = "".join(json.dumps(entry) + "\n" for entry in _batch_results(_get_batch(batch_id)))
+    return StreamingResponse(iter([lines]), media_type="application/x-jsonl")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps({'type': event, **data})}\n\n"
+
+
+async def _stream(message: Dict[str, Any]):
+    await asyncio.sleep(_latency_seconds())
+    usage = message["usage"]
+    start = {**message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}}
+    yield _sse("message_start", {"message": start})
+
+    per_token = 1 / fake_settings.TOKENS_PER_SECOND
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "text":
+            yield _sse("content_block_start", {"index": index, "content_block": {"type": "text", "text": ""}})
+            words = block["text"].split(" ")
+            for i, word in enumerate(words):
+                chunk = word if i == 0 else " " + word
+                yield _sse("content_block_delta", {"index": index, "delta": {"type": "text_delta", "text": chunk}})
+                await asyncio.sleep(per_token * _tokens(chunk))
+        else:
+            yield _sse("content_block_start", {"index": index, "content_block": {**block, "input": {}}})
+            partial = json.dumps(block["input"])
+            yield _sse("content_block_delta", {"index": index, "delta": {"type": "input_json_delta", "partial_json": partial}})
+            await asyncio.sleep(per_token * _tokens(partial))
+        yield _sse("content_block_stop", {"index": index})
+
+    yield _sse("message_delta", {
+        "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+        "usage": {"output_tokens": usage["output_tokens"]},
+    })
+    yield _sse("message_stop", {})
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,9 +9,11 @@ from slowapi.util import get_remote_address
 
 from app.config import settings
 from app.database import Base, engine
-from app.models import Achievement, AllocationTarget, Conversation, ExpenseCategory, FinancialPlan, FinancialProfile, Insight, Message, NetWorthEntry, NotificationPreference, PortfolioHolding, PriceAlert, RecurringTransaction, SavingsGoal, Subscription, UsageTracking, User, UserMemory, UserStreak, WatchlistItem, WebhookEvent  # noqa: F401
+from app.models import Achievement, AllocationTarget, Briefing, Conversation, ExpenseCategory, FinancialPlan, FinancialProfile, Insight, LLMUsage, Message, NetWorthEntry, NewsArticle, NewsArticleSymbol, NotificationPreference, PortfolioHolding, PriceAlert, RecurringTransaction, SavingsGoal, SchedulerLock, Subscription, UsageTracking, User, UserMemory, UserStreak, WatchlistItem, WebhookEvent  # noqa: F401
 from app.routers import achievements, allocation, analytics, auth, briefing, budget, calculators, calendar, chat, compare, csv_io, dashboard, education, financial_plan, forecast, goals, health_score, insight, market_data, memory, net_worth, news, notifications, onboarding, portfolio, portfolio_review, price_alert, profile, reports, savings_goals, screener, spending_coach, subscription, subscriptions_tracker, timeline, usage, watchlist
 
+logger = logging.getLogger(__name__)
+
 limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(title="WealthWise API", version="1.0.0")
 app.state.limiter = limiter
@@ -62,51 +66,65 @@ app.include_router(health_score.router)
 app.include_router(spending_coach.router)
 
 
+# Columns added to tables after they were first created (create_all doesn't alter tables)
+COLUMN_MIGRATIONS = {
+    "financial_profiles": [
+        ("experience_level", "VARCHAR(50)"),
+        ("investment_timeline", "VARCHAR(50)"),
+        ("interested_topics", "TEXT"),
+        ("communication_level", "VARCHAR(50) DEFAULT 'college'"),
+        ("advisor_tone", "VARCHAR(50) DEFAULT 'professional'"),
+        ("onboarding_completed", "BOOLEAN DEFAULT FALSE"),
+        ("language", "VARCHAR(10) DEFAULT 'en'"),
+    ],
+    # Billing edge cases
+    "subscriptions": [
+        ("past_due_since", "TIMESTAMP"),
+        ("cancel_at_period_end", "BOOLEAN DEFAULT FALSE"),
+    ],
+    "financial_plans": [("share_token", "VARCHAR(36)")],
+    "messages": [("follow_ups", "TEXT")],
+    # Dynamic alerts
+    "price_alerts": [
+        ("threshold_pct", "FLOAT"),
+        ("ma_window", "INTEGER"),
+        ("state", "TEXT"),
+    ],
+}
+
+
+def _add_missing_columns(table: str, columns: list) -> None:
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    if table not in inspector.get_table_names():
+        return
+    existing = {c["name"] for c in inspector.get_columns(table)}
+    with engine.begin() as conn:
+        for col_name, col_type in columns:
+            if col_name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}"))
+
+
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
-    # Add missing columns to existing tables (create_all doesn't alter tables)
-    from sqlalchemy import inspect, text
-    from app.database import SessionLocal
-    db = SessionLocal()
-    try:
-        inspector = inspect(engine)
-        if "financial_profiles" in inspector.get_table_names():
-            existing = {c["name"] for c in inspector.get_columns("financial_profiles")}
-            migrations = [
-                ("experience_level", "VARCHAR(50)"),
-                ("investment_timeline", "VARCHAR(50)"),
-                ("interested_topics", "TEXT"),
-                ("communication_level", "VARCHAR(50) DEFAULT 'college'"),
-                ("advisor_tone", "VARCHAR(50) DEFAULT 'professional'"),
-                ("onboarding_completed", "BOOLEAN DEFAULT FALSE"),
-                ("language", "VARCHAR(10) DEFAULT 'en'"),
-            ]
-            for col_name, col_type in migrations:
-                if col_name not in existing:
-                    db.execute(text(f"ALTER TABLE financial_profiles ADD COLUMN {col_name} {col_type}"))
-            db.commit()
-        # Add billing edge case columns to subscriptions if missing
-        if "subscriptions" in inspector.get_table_names():
-            existing_sub_cols = {c["name"] for c in inspector.get_columns("subscriptions")}
-            sub_migrations = [
-                ("past_due_since", "TIMESTAMP"),
-                ("cancel_at_period_end", "BOOLEAN DEFAULT FALSE"),
-            ]
-            for col_name, col_type in sub_migrations:
-                if col_name not in existing_sub_cols:
-                    db.execute(text(f"ALTER TABLE subscriptions ADD COLUMN {col_name} {col_type}"))
-            db.commit()
-        # Add share_token to financial_plans if missing
-        if "financial_plans" in inspector.get_table_names():
-            existing_plan_cols = {c["name"] for c in inspector.get_columns("financial_plans")}
-            if "share_token" not in existing_plan_cols:
-                db.execute(text("ALTER TABLE financial_plans ADD COLUMN share_token VARCHAR(36)"))
-                db.commit()
-    except Exception:
-        db.rollback()
-    finally:
-        db.close()
+    # One table at a time, so a failure doesn't skip the others
+    for table, columns in COLUMN_MIGRATIONS.items():
+        try:
+            _add_missing_columns(table, columns)
+        except Exception:
+            logger.exception(f"Adding columns to {table} failed")
+
+    from app.services import scheduler
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    from app.services import llm_metrics, scheduler
+    scheduler.stop()
+    llm_metrics.flush()
 
 
 @app.get("/api/health")
@@ -139,10 +157,10 @@ def list_users():
 
 @app.get("/api/debug/test-anthropic")
 def test_anthropic():
-    import anthropic
+    from app.services import llm_gateway
     try:
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
+        response = llm_gateway.create(
+            feature="debug",
             model=settings.CLAUDE_MODEL,
             max_tokens=10,
             messages=[{"role": "user", "content": "hi"}],
@@ -1,14 +1,18 @@
 from app.models.achievement import Achievement
 from app.models.allocation_target import AllocationTarget
+from app.models.briefing import Briefing
 from app.models.conversation import Conversation, Message
 from app.models.expense_category import ExpenseCategory
 from app.models.financial_plan import FinancialPlan
 from app.models.financial_profile import FinancialProfile
 from app.models.insight import Insight
+from app.models.llm_usage import LLMUsage
 from app.models.net_worth_entry import NetWorthEntry
+from app.models.news_article import NewsArticle, NewsArticleSymbol
 from app.models.notification_preference import NotificationPreference
 from app.models.price_alert import PriceAlert
 from app.models.savings_goal import SavingsGoal
+from app.models.scheduler_lock import SchedulerLock
 from app.models.recurring_transaction import RecurringTransaction
 from app.models.subscription import Subscription
 from app.models.usage_tracking import UsageTracking
@@ -22,6 +26,7 @@ from app.models.webhook_event import WebhookEvent
 __all__ = [
     "Achievement",
     "AllocationTarget",
+    "Briefing",
     "User",
     "Subscription",
     "FinancialProfile",
@@ -30,8 +35,12 @@ __all__ = [
     "FinancialPlan",
     "PriceAlert",
     "Insight",
+    "LLMUsage",
     "NetWorthEntry",
+    "NewsArticle",
+    "NewsArticleSymbol",
     "SavingsGoal",
+    "SchedulerLock",
     "UserMemory",
     "UserStreak",
     "UsageTracking",
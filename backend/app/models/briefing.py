@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class Briefing(Base):
+    """A generated daily briefing or weekly recap, one per user per period."""
+
+    __tablename__ = "briefings"
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", "period_start", name="uq_briefing_period"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)  # daily or weekly
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)  # the day, or the Monday of the week
+    briefing: Mapped[str] = mapped_column(Text, nullable=False)
+    details: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON: market, stats, counts
+    source: Mapped[str] = mapped_column(String(20), default="on_demand")  # on_demand or batch
+    generated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
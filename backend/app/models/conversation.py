@@ -34,6 +34,7 @@ class Message(Base):
     content: Mapped[str] = mapped_column(Text, nullable=False)
     tool_calls: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     tool_results: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    follow_ups: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON list, filled in by a background job
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
     conversation: Mapped["Conversation"] = relationship(back_populates="messages")
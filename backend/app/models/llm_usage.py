@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class LLMUsage(Base):
+    """Daily per-user rollup of model calls, one row per feature and model."""
+
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", "feature", "model", name="uq_llm_usage_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    feature: Mapped[str] = mapped_column(String(50), nullable=False)  # call site, e.g. chat, insights
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    calls: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[int] = mapped_column(Integer, default=0)
+    retries: Mapped[int] = mapped_column(Integer, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_read_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cache_creation_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[float] = mapped_column(Float, default=0.0)  # total; divide by calls for mean
+    cost_usd: Mapped[float] = mapped_column(Float, default=0.0)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class NewsArticle(Base):
+    """One story, stored once however many symbols it was fetched for."""
+
+    __tablename__ = "news_articles"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    title_hash: Mapped[str] = mapped_column(String(40), nullable=False, unique=True)  # sha1 of normalized title
+    title: Mapped[str] = mapped_column(Text, nullable=False)
+    publisher: Mapped[str] = mapped_column(String(255), default="")
+    link: Mapped[str] = mapped_column(Text, default="")
+    published: Mapped[int] = mapped_column(Integer, default=0)  # unix timestamp
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+class NewsArticleSymbol(Base):
+    """Links an article to each symbol whose feed carried it.
+
+    ``published`` is the time that symbol's feed reported, so a symbol's
+    newest stories come straight off the (symbol, published) index.
+    """
+
+    __tablename__ = "news_article_symbols"
+    __table_args__ = (
+        Index("ix_news_article_symbols_symbol_published", "symbol", "published"),
+    )
+
+    article_id: Mapped[int] = mapped_column(Integer, ForeignKey("news_articles.id"), primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(10), primary_key=True)
+    published: Mapped[int] = mapped_column(Integer, default=0)  # unix timestamp
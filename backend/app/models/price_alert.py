@@ -18,8 +18,11 @@ class PriceAlert(Base):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     symbol: Mapped[str] = mapped_column(String(10), nullable=False)
-    condition: Mapped[str] = mapped_column(String(10), nullable=False)  # above/below
-    target_price: Mapped[float] = mapped_column(Float, nullable=False)
+    condition: Mapped[str] = mapped_column(String(10), nullable=False)  # above/below/pct_up/pct_down/trail_stop/ma_above/ma_below
+    target_price: Mapped[float] = mapped_column(Float, nullable=False)  # trigger level; derived for dynamic conditions
+    threshold_pct: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    ma_window: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    state: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # running evaluation state (JSON)
     message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     triggered: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.services.analytics_service import get_analytics
+from app.services import context_window, llm_cache, llm_metrics, model_router
+from app.services.analytics_service import get_analytics, get_llm_usage
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
@@ -13,3 +14,33 @@ def admin_analytics(db: Session = Depends(get_db)):
     Note: In production, this should be protected with an admin auth check.
     """
     return get_analytics(db)
+
+
+@router.get("/llm-usage")
+def admin_llm_usage(days: int = Query(7, ge=1, le=90), db: Session = Depends(get_db)):
+    """Model calls, tokens, cost and p50/p95 latency per feature, plus top users."""
+    return get_llm_usage(db, days=days)
+
+
+@router.get("/context-window")
+def admin_context_window():
+    """Chat history tokens sent vs. full history since process start."""
+    return context_window.get_stats()
+
+
+@router.get("/prompt-cache")
+def admin_prompt_cache():
+    """Chat prompt-cache reads and writes since process start."""
+    return llm_metrics.prompt_cache("chat")
+
+
+@router.get("/model-routing")
+def admin_model_routing():
+    """Chat routing decisions and p50/p95 turn latency per model tier since process start."""
+    return model_router.get_stats()
+
+
+@router.get("/llm-cache")
+def admin_llm_cache():
+    """Analysis response-cache hits, misses and invalidations since process start."""
+    return llm_cache.get_stats()
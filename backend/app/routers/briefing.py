@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.services.briefing_service import generate_daily_briefing, generate_weekly_briefing
+from app.services.briefing_service import get_briefing
 
 router = APIRouter(prefix="/api/briefing", tags=["briefing"])
 
@@ -14,7 +14,7 @@ def daily_briefing(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return generate_daily_briefing(db, user)
+    return get_briefing(db, user, "daily")
 
 
 @router.get("/weekly")
@@ -22,4 +22,4 @@ def weekly_briefing(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return generate_weekly_briefing(db, user)
+    return get_briefing(db, user, "weekly")
@@ -4,12 +4,13 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime
 
-from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.expense_category import ExpenseCategory
 from app.models.recurring_transaction import RecurringTransaction
 from app.models.user import User
+from app.services import financial_summary_service, llm_cache
+from app.services.financial_summary_service import FREQUENCY_MULTIPLIER
 
 router = APIRouter(prefix="/api/budget", tags=["budget"])
 
@@ -33,14 +34,6 @@ class TransactionUpdate(BaseModel):
     next_due: Optional[str] = None
 
 
-FREQUENCY_MULTIPLIER = {
-    "weekly": 4.33,
-    "biweekly": 2.17,
-    "monthly": 1.0,
-    "yearly": 1.0 / 12.0,
-}
-
-
 @router.get("/")
 def get_transactions(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     txns = (
@@ -140,36 +133,7 @@ def delete_transaction(
 
 @router.get("/summary")
 def get_budget_summary(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    txns = (
-        db.query(RecurringTransaction)
-        .filter(RecurringTransaction.user_id == user.id, RecurringTransaction.is_active == True)
-        .all()
-    )
-
-    monthly_income = 0.0
-    monthly_expenses = 0.0
-    by_category: dict[str, float] = {}
-
-    for t in txns:
-        multiplier = FREQUENCY_MULTIPLIER.get(t.frequency, 1.0)
-        monthly_amount = t.amount * multiplier
-
-        if t.type == "income":
-            monthly_income += monthly_amount
-        else:
-            monthly_expenses += monthly_amount
-            by_category[t.category] = by_category.get(t.category, 0) + monthly_amount
-
-    savings_rate = ((monthly_income - monthly_expenses) / monthly_income * 100) if monthly_income > 0 else 0
-
-    return {
-        "monthly_income": round(monthly_income, 2),
-        "monthly_expenses": round(monthly_expenses, 2),
-        "net_savings": round(monthly_income - monthly_expenses, 2),
-        "savings_rate": round(savings_rate, 1),
-        "by_category": {k: round(v, 2) for k, v in sorted(by_category.items(), key=lambda x: -x[1])},
-        "total_transactions": len(txns),
-    }
+    return financial_summary_service.budget_summary(db, user.id)
 
 
 # --- Expense Category CRUD ---
@@ -279,19 +243,21 @@ def get_spending_insights(user: User = Depends(get_current_user), db: Session =
     if not txns:
         return {"analysis": "Add some recurring transactions first so I can analyze your spending patterns."}
 
-    # Build spending summary for AI
+    # Build spending summary for AI, in a stable order so unchanged budgets hit the cache
     lines = []
     for t in txns:
         multiplier = FREQUENCY_MULTIPLIER.get(t.frequency, 1.0)
         monthly = t.amount * multiplier
         lines.append(f"- {t.name}: ${monthly:.2f}/month ({t.category}, {t.type})")
+    lines.sort()
 
     spending_text = "\n".join(lines)
 
     try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
+        analysis = llm_cache.create_text(
+            "budget_insights",
+            user.id,
+            inputs=lines,
             model="claude-haiku-4-5-20251001",
             max_tokens=500,
             messages=[{
@@ -304,7 +270,6 @@ Budget:
 Provide your analysis in plain text, no markdown headers."""
             }],
         )
-        analysis = response.content[0].text
     except Exception:
         # Fallback if AI is unavailable
         total_income = sum(t.amount * FREQUENCY_MULTIPLIER.get(t.frequency, 1.0) for t in txns if t.type == "income")
@@ -2,15 +2,23 @@ import json
 from typing import List
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.dependencies import get_current_user
 from app.models.conversation import Conversation, Message
 from app.models.user import User
-from app.schemas.chat import ChatResponse, ConversationDetail, ConversationSummary, MessageResponse, SendMessageRequest
+from app.schemas.chat import (
+    ChatResponse,
+    ConversationDetail,
+    ConversationSummary,
+    FollowUpsResponse,
+    MessageResponse,
+    SendMessageRequest,
+)
 from app.services import chat_service
 from app.services.entitlement_service import check_entitlement, increment_usage
 
@@ -47,6 +55,56 @@ def send_message(
         raise HTTPException(status_code=500, detail=f"Chat error: {type(e).__name__}: {str(e)} | Traceback: {tb[-500:]}")
 
 
+@router.post("/send/stream")
+@limiter.limit("20/minute")
+def send_message_stream(
+    request: Request,
+    body: SendMessageRequest = Body(...),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Streaming variant of /send. Returns server-sent events as the turn progresses."""
+    entitlement = check_entitlement(db, user, "messages")
+    if not entitlement["allowed"]:
+        raise HTTPException(
+            status_code=403,
+            detail=f"You've used all {entitlement['limit']} free messages this month. Upgrade to Pro for unlimited conversations.",
+        )
+    if body.conversation_id and not (
+        db.query(Conversation)
+        .filter(Conversation.id == body.conversation_id, Conversation.user_id == user.id)
+        .first()
+    ):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    user_id = user.id
+
+    def event_stream():
+        # The request-scoped session is closed before streaming starts, so use our own
+        stream_db = SessionLocal()
+        try:
+            stream_user = stream_db.query(User).filter(User.id == user_id).first()
+            for event in chat_service.stream_message(stream_db, stream_user, body.conversation_id, body.message):
+                yield _sse(event)
+                if event["type"] == "done":
+                    increment_usage(stream_db, user_id, "messages")
+        except Exception as e:
+            stream_db.rollback()
+            yield _sse({"type": "error", "detail": f"Chat error: {type(e).__name__}: {str(e)}"})
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
 @router.get("/conversations", response_model=List[ConversationSummary])
 def list_conversations(
     user: User = Depends(get_current_user),
@@ -94,12 +152,33 @@ def get_conversation(
                 role=msg.role,
                 content=msg.content,
                 tool_results=tool_results,
+                follow_ups=json.loads(msg.follow_ups) if msg.follow_ups else None,
             )
         )
 
     return ConversationDetail(id=conversation.id, title=conversation.title, messages=messages)
 
 
+@router.get("/messages/{message_id}/follow-ups", response_model=FollowUpsResponse)
+def get_follow_ups(
+    message_id: int,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Suggested follow-ups for an assistant message, generated in the background after /send."""
+    message = (
+        db.query(Message)
+        .join(Conversation, Message.conversation_id == Conversation.id)
+        .filter(Message.id == message_id, Conversation.user_id == user.id)
+        .first()
+    )
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    if message.follow_ups is None:
+        return FollowUpsResponse(message_id=message.id, ready=False)
+    return FollowUpsResponse(message_id=message.id, ready=True, follow_ups=json.loads(message.follow_ups))
+
+
 @router.delete("/conversations/{conversation_id}")
 def delete_conversation(
     conversation_id: int,
@@ -1,12 +1,19 @@
+import asyncio
+import json
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.schemas.market import CompanyInfo, PriceHistory, SectorPerformance, StockQuote, TrendingTicker
 from app.services import market_data_service
+from app.services.quote_stream import hub
 
 router = APIRouter(prefix="/api/market", tags=["market"])
 
+MAX_STREAM_SYMBOLS = 25
+KEEPALIVE_SECONDS = 15
+
 
 @router.get("/quote/{symbol}", response_model=StockQuote)
 def get_quote(symbol: str):
@@ -50,3 +57,35 @@ def get_trending():
         return market_data_service.get_trending_tickers()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not fetch trending data: {str(e)}")
+
+
+@router.get("/stream")
+async def stream_quotes(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated symbols"),
+):
+    """Server-sent events stream of live quotes for the given symbols."""
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(symbol_list) > MAX_STREAM_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STREAM_SYMBOLS} symbols can be streamed")
+
+    async def event_stream():
+        queue = hub.subscribe(symbol_list)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    quote = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: quote\ndata: {json.dumps(quote, default=str)}\n\n"
+        finally:
+            hub.unsubscribe(queue, symbol_list)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
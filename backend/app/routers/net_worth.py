@@ -7,6 +7,7 @@ from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.net_worth_entry import NetWorthEntry
 from app.models.user import User
+from app.services import financial_summary_service
 
 router = APIRouter(prefix="/api/net-worth", tags=["net-worth"])
 
@@ -133,29 +134,4 @@ def delete_entry(
 @router.get("/summary")
 def get_summary(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get net worth summary: total assets, liabilities, net worth, breakdown by category."""
-    entries = (
-        db.query(NetWorthEntry)
-        .filter(NetWorthEntry.user_id == user.id)
-        .all()
-    )
-
-    total_assets = 0.0
-    total_liabilities = 0.0
-    asset_breakdown: dict[str, float] = {}
-    liability_breakdown: dict[str, float] = {}
-
-    for e in entries:
-        if e.entry_type == "asset":
-            total_assets += e.amount
-            asset_breakdown[e.category] = asset_breakdown.get(e.category, 0) + e.amount
-        else:
-            total_liabilities += e.amount
-            liability_breakdown[e.category] = liability_breakdown.get(e.category, 0) + e.amount
-
-    return {
-        "total_assets": round(total_assets, 2),
-        "total_liabilities": round(total_liabilities, 2),
-        "net_worth": round(total_assets - total_liabilities, 2),
-        "asset_breakdown": asset_breakdown,
-        "liability_breakdown": liability_breakdown,
-    }
+    return financial_summary_service.net_worth_summary(db, user.id)
@@ -2,37 +2,14 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 
-import yfinance as yf
-
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.services import news_service, sentiment_service
 
 router = APIRouter(prefix="/api/news", tags=["news"])
 
-
-def _get_sentiment(headline: str) -> str:
-    """Quick sentiment classification using keyword heuristics (no API call needed)."""
-    headline_lower = headline.lower()
-    bullish_words = [
-        "surge", "soar", "rally", "gain", "jump", "rise", "high", "record",
-        "beat", "upgrade", "bull", "grow", "profit", "boom", "breakout",
-        "strong", "outperform", "buy", "positive", "upbeat", "recovery",
-    ]
-    bearish_words = [
-        "fall", "drop", "crash", "plunge", "sink", "decline", "low", "miss",
-        "downgrade", "bear", "loss", "cut", "slump", "weak", "sell",
-        "negative", "warning", "fear", "risk", "layoff", "recession",
-    ]
-
-    bull_score = sum(1 for w in bullish_words if w in headline_lower)
-    bear_score = sum(1 for w in bearish_words if w in headline_lower)
-
-    if bull_score > bear_score:
-        return "bullish"
-    elif bear_score > bull_score:
-        return "bearish"
-    return "neutral"
+MAX_SYMBOLS = 25
 
 
 @router.get("/")
@@ -57,31 +34,19 @@ def get_news(
     if not symbol_list:
         symbol_list = ["SPY"]  # default to market news
 
-    all_news = []
-    seen_titles = set()
-
-    for sym in symbol_list[:10]:  # limit to 10 symbols
-        try:
-            ticker = yf.Ticker(sym)
-            news_items = ticker.news or []
-            for item in news_items[:5]:  # top 5 per symbol
-                title = item.get("title", "")
-                if title in seen_titles:
-                    continue
-                seen_titles.add(title)
-
-                all_news.append({
-                    "symbol": sym,
-                    "title": title,
-                    "publisher": item.get("publisher", ""),
-                    "link": item.get("link", ""),
-                    "published": item.get("providerPublishTime", 0),
-                    "sentiment": _get_sentiment(title),
-                })
-        except Exception:
-            continue
-
-    # Sort by publish time descending
-    all_news.sort(key=lambda x: x["published"], reverse=True)
-
-    return {"articles": all_news[:30]}  # cap at 30 articles
+    articles = news_service.get_news(db, list(dict.fromkeys(symbol_list))[:MAX_SYMBOLS])
+    sentiments = sentiment_service.classify_batch(a["title"] for a in articles)
+
+    return {
+        "articles": [
+            {
+                "symbol": a["symbol"],
+                "title": a["title"],
+                "publisher": a["publisher"],
+                "link": a["link"],
+                "published": a["published"],
+                "sentiment": sentiment,
+            }
+            for a, sentiment in zip(articles, sentiments)
+        ]
+    }
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.portfolio_holding import PortfolioHolding
 from app.models.user import User
+from app.services import llm_cache
 from app.services.market_data_service import get_company_info, get_stock_quote
 
 router = APIRouter(prefix="/api/portfolio", tags=["portfolio-review"])
@@ -70,12 +70,15 @@ Holdings:
         if "error" not in h:
             portfolio_summary += f"  {h['symbol']}: ${h['market_value']:,.0f} ({h['gain_loss_pct']:+.1f}%), sector={h['sector']}, beta={h.get('beta','?')}, P/E={h.get('pe_ratio','?')}, yield={h.get('dividend_yield',0)}%\n"
 
-    # Call Claude for review
+    # Call Claude for review. Cached on the holdings themselves rather than the
+    # prompt, which moves with every price tick; the cache TTL bounds the drift.
+    holdings_snapshot = sorted((h.symbol.upper(), h.shares, h.avg_cost) for h in holdings)
     review_text = ""
     try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
+        review_text = llm_cache.create_text(
+            "portfolio_review",
+            user.id,
+            inputs=holdings_snapshot,
             model="claude-haiku-4-5-20251001",
             max_tokens=800,
             messages=[{
@@ -91,7 +94,6 @@ Holdings:
 Be direct and specific. Use dollar amounts. No disclaimers.""",
             }],
         )
-        review_text = response.content[0].text
     except Exception:
         # Fallback: generate a basic review without AI
         top = sorted([h for h in holdings_data if "error" not in h], key=lambda x: x.get("gain_loss_pct", 0), reverse=True)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -14,25 +14,39 @@ from app.schemas.price_alert import (
     CreateAlertRequest,
     UpdateAlertRequest,
 )
+from app.services import alert_engine
 from app.services.alert_service import check_alerts
 
 router = APIRouter(prefix="/api/alerts", tags=["alerts"])
 
 
+def _validate_alert(condition: str, target_price: Optional[float], threshold_pct: Optional[float], ma_window: Optional[int]) -> None:
+    if condition not in alert_engine.CONDITIONS:
+        raise HTTPException(status_code=400, detail=f"Condition must be one of: {', '.join(alert_engine.CONDITIONS)}")
+    if condition in alert_engine.STATIC_CONDITIONS and target_price is None:
+        raise HTTPException(status_code=400, detail="target_price is required for 'above' and 'below' alerts")
+    if condition in alert_engine.PERCENT_CONDITIONS + ("trail_stop",) and not (threshold_pct and 0 < threshold_pct < 100):
+        raise HTTPException(status_code=400, detail="threshold_pct must be between 0 and 100")
+    if condition in alert_engine.MA_CONDITIONS and not (ma_window and 2 <= ma_window <= alert_engine.MAX_MA_WINDOW):
+        raise HTTPException(status_code=400, detail=f"ma_window must be between 2 and {alert_engine.MAX_MA_WINDOW}")
+
+
 @router.post("/", response_model=AlertResponse)
 def create_alert(
     request: CreateAlertRequest,
     user: User = Depends(require_subscription),
     db: Session = Depends(get_db),
 ):
-    if request.condition not in ("above", "below"):
-        raise HTTPException(status_code=400, detail="Condition must be 'above' or 'below'")
+    _validate_alert(request.condition, request.target_price, request.threshold_pct, request.ma_window)
 
     alert = PriceAlert(
         user_id=user.id,
         symbol=request.symbol.upper(),
         condition=request.condition,
-        target_price=request.target_price,
+        # Dynamic conditions derive their trigger level on the first check
+        target_price=request.target_price or 0.0,
+        threshold_pct=request.threshold_pct,
+        ma_window=request.ma_window,
         message=request.message,
     )
     db.add(alert)
@@ -88,19 +102,34 @@ def update_alert(
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
 
+    rearm = False
     if request.is_active is not None:
         alert.is_active = request.is_active
         if request.is_active:
             # Re-activate: reset triggered state
             alert.triggered = False
             alert.triggered_at = None
+            rearm = True
     if request.target_price is not None:
         alert.target_price = request.target_price
+        rearm = True
+    if request.threshold_pct is not None:
+        alert.threshold_pct = request.threshold_pct
+        rearm = True
+    if request.ma_window is not None:
+        alert.ma_window = request.ma_window
+        rearm = True
     if request.condition is not None:
         alert.condition = request.condition
+        rearm = True
     if request.message is not None:
         alert.message = request.message
 
+    _validate_alert(alert.condition, alert.target_price, alert.threshold_pct, alert.ma_window)
+    if rearm:
+        # Trailing highs and MA windows start over from the new parameters
+        alert_engine.reset(alert)
+
     db.commit()
     db.refresh(alert)
     return alert
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.recurring_transaction import RecurringTransaction
 from app.models.expense_category import ExpenseCategory
 from app.models.savings_goal import SavingsGoal
 from app.models.user import User
+from app.services import llm_cache
 
 router = APIRouter(prefix="/api/spending-coach", tags=["spending-coach"])
 
@@ -90,11 +90,20 @@ def get_spending_coach(user: User = Depends(get_current_user), db: Session = Dep
 
     spending_text += goals_text
 
+    # Everything the prompt is built from, normalized, as the response cache key
+    inputs = {
+        "income": sorted((i["name"], round(i["monthly"], 2), i["category"]) for i in income_items),
+        "expenses": sorted((e["name"], round(e["monthly"], 2), e["category"]) for e in expense_items),
+        "budget_limits": sorted(budget_limits.items()),
+        "goals": sorted((g.name, g.current_amount, g.target_amount, g.category) for g in goals),
+    }
+
     coaching = ""
     try:
-        import anthropic
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
+        coaching = llm_cache.create_text(
+            "spending_coach",
+            user.id,
+            inputs=inputs,
             model="claude-haiku-4-5-20251001",
             max_tokens=800,
             messages=[{
@@ -109,7 +118,6 @@ Be direct, specific with dollar amounts, and encouraging. No disclaimers.
 {spending_text}""",
             }],
         )
-        coaching = response.content[0].text
     except Exception:
         # Fallback
         coaching = f"Your monthly income is ${total_income:,.2f} with expenses of ${total_expenses:,.2f}, giving you a savings rate of {savings_rate:.1f}%.\n\n"
@@ -15,6 +15,13 @@ class MessageResponse(BaseModel):
     role: str
     content: str
     tool_results: Optional[List[Dict[str, Any]]] = None
+    follow_ups: Optional[List[str]] = None
+
+
+class FollowUpsResponse(BaseModel):
+    message_id: int
+    ready: bool
+    follow_ups: Optional[List[str]] = None
 
 
 class ChatResponse(BaseModel):
@@ -6,14 +6,18 @@ from pydantic import BaseModel, ConfigDict
 
 class CreateAlertRequest(BaseModel):
     symbol: str
-    condition: str  # above/below
-    target_price: float
+    condition: str  # above/below/pct_up/pct_down/trail_stop/ma_above/ma_below
+    target_price: Optional[float] = None  # required for above/below
+    threshold_pct: Optional[float] = None  # required for pct_up/pct_down/trail_stop
+    ma_window: Optional[int] = None  # required for ma_above/ma_below
     message: Optional[str] = None
 
 
 class UpdateAlertRequest(BaseModel):
     is_active: Optional[bool] = None
     target_price: Optional[float] = None
+    threshold_pct: Optional[float] = None
+    ma_window: Optional[int] = None
     condition: Optional[str] = None
     message: Optional[str] = None
 
@@ -26,6 +30,8 @@ class AlertResponse(BaseModel):
     symbol: str
     condition: str
     target_price: float
+    threshold_pct: Optional[float] = None
+    ma_window: Optional[int] = None
     message: Optional[str] = None
     is_active: bool
     triggered: bool
@@ -0,0 +1,233 @@
+"""Incremental evaluation of price alert conditions.
+
+Static alerts (``above``/``below``) compare against ``target_price``. Dynamic
+alerts keep a small running state per alert so each price tick is O(1):
+
+- ``pct_up``/``pct_down``: move of ``threshold_pct`` from the previous close
+- ``trail_stop``: price falls ``threshold_pct`` below the running high
+- ``ma_above``/``ma_below``: price crosses the ``ma_window``-day moving average
+
+For dynamic alerts ``target_price`` is kept at the current trigger level. The
+running state lives in memory as fixed-size arrays and is written back to
+``PriceAlert.state`` only when it actually changes (new high, new daily close,
+MA side flip), so most ticks produce no database writes. Entries are dropped
+once an alert is deleted, deactivated or triggered.
+"""
+
+import json
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.models.price_alert import PriceAlert
+from app.services import write_invalidation
+from app.services.market_data_service import MARKET_TZ
+
+logger = logging.getLogger(__name__)
+
+STATIC_CONDITIONS = ("above", "below")
+PERCENT_CONDITIONS = ("pct_up", "pct_down")
+MA_CONDITIONS = ("ma_above", "ma_below")
+CONDITIONS = STATIC_CONDITIONS + PERCENT_CONDITIONS + ("trail_stop",) + MA_CONDITIONS
+
+MAX_MA_WINDOW = 50  # bounded by the history we can seed from
+
+
+class AlertState:
+    """Running state for one alert.
+
+    ``high`` is the trailing-stop anchor. The moving average keeps its last
+    ``window`` daily closes in a ring buffer with a running total.
+    """
+
+    __slots__ = ("high", "closes", "pos", "count", "total", "side", "day")
+
+    def __init__(self, window: int = 0):
+        self.high = 0.0
+        self.closes = array("d", [0.0] * window)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.side = 0  # -1 below MA, 1 above, 0 unknown
+        self.day = ""
+
+    def push_close(self, close: float) -> None:
+        window = len(self.closes)
+        if self.count == window:
+            self.total -= self.closes[self.pos]
+        else:
+            self.count += 1
+        self.closes[self.pos] = close
+        self.total += close
+        self.pos = (self.pos + 1) % window
+
+    @property
+    def moving_average(self) -> Optional[float]:
+        if not self.closes or self.count < len(self.closes):
+            return None
+        return self.total / self.count
+
+    def dumps(self) -> str:
+        data = {"h": self.high}
+        if self.closes:
+            # Store oldest-first so the ring can be rebuilt without its cursor
+            ordered = [self.closes[(self.pos + i) % len(self.closes)] for i in range(len(self.closes))][-self.count:] if self.count else []
+            data.update({"c": ordered, "s": self.side, "d": self.day})
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, raw: Optional[str], window: int = 0) -> "AlertState":
+        state = cls(window)
+        if not raw:
+            return state
+        try:
+            data = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return state
+        state.high = float(data.get("h") or 0.0)
+        if window:
+            for close in data.get("c", [])[-window:]:
+                state.push_close(float(close))
+            state.side = int(data.get("s", 0))
+            state.day = data.get("d", "")
+        return state
+
+
+# alert id -> (serialized state it was loaded from/saved as, live state)
+_states: Dict[int, Tuple[Optional[str], AlertState]] = {}
+
+
+def _get_state(alert: PriceAlert) -> AlertState:
+    window = (alert.ma_window or 0) if alert.condition in MA_CONDITIONS else 0
+    cached = _states.get(alert.id)
+    # Reload if another process (or a user edit) changed the persisted state
+    if cached is None or cached[0] != alert.state or len(cached[1].closes) != window:
+        cached = (alert.state, AlertState.loads(alert.state, window))
+        _states[alert.id] = cached
+    return cached[1]
+
+
+def _finished_alert(target: PriceAlert, deleted: bool) -> Optional[int]:
+    return target.id if deleted or not target.is_active or target.triggered else None
+
+
+def _forget(alert_id: Optional[int]) -> None:
+    if alert_id is not None:
+        _states.pop(alert_id, None)
+
+
+write_invalidation.register([PriceAlert], _forget, collect=_finished_alert)
+write_invalidation.register_cache(_states.clear)
+
+
+def _save_state(alert: PriceAlert, state: AlertState) -> None:
+    raw = state.dumps()
+    alert.state = raw
+    _states[alert.id] = (raw, state)
+
+
+def _set_target(alert: PriceAlert, level: float) -> None:
+    level = round(level, 4)
+    if alert.target_price != level:
+        alert.target_price = level
+
+
+def reset(alert: PriceAlert) -> None:
+    """Drop running state, e.g. after the alert is edited or re-armed."""
+    alert.state = None
+    _states.pop(alert.id, None)
+
+
+def _seed_closes(alert: PriceAlert, state: AlertState, today: str) -> bool:
+    """Fill the MA window from recent daily history. Returns False if none came back."""
+    from app.services.market_data_service import get_price_history
+
+    history = get_price_history(alert.symbol, period="6mo", interval="1d")
+    closes = [r["close"] for r in history.get("data", []) if r["date"] < today]
+    if not closes:
+        logger.warning(f"No price history to seed alert {alert.id} ({alert.symbol}); retrying next check")
+        return False
+    for close in closes[-len(state.closes):]:
+        state.push_close(close)
+    state.day = today
+    return True
+
+
+def evaluate(
+    alert: PriceAlert,
+    price: Optional[float],
+    previous_close: Optional[float] = None,
+    today: Optional[str] = None,
+) -> bool:
+    """Apply one price tick to ``alert``. Returns True if it just triggered."""
+    if price is None or alert.triggered:
+        return False
+
+    condition = alert.condition
+    if condition == "above":
+        hit = price >= alert.target_price
+    elif condition == "below":
+        hit = price <= alert.target_price
+    elif condition in PERCENT_CONDITIONS:
+        if not previous_close or alert.threshold_pct is None:
+            return False
+        sign = 1 if condition == "pct_up" else -1
+        _set_target(alert, previous_close * (1 + sign * alert.threshold_pct / 100))
+        hit = price >= alert.target_price if sign > 0 else price <= alert.target_price
+    elif condition == "trail_stop":
+        if alert.threshold_pct is None:
+            return False
+        state = _get_state(alert)
+        if price > state.high:
+            state.high = price
+            _save_state(alert, state)
+            _set_target(alert, price * (1 - alert.threshold_pct / 100))
+        hit = price <= alert.target_price
+    elif condition in MA_CONDITIONS:
+        if not alert.ma_window:
+            return False
+        hit = _evaluate_ma(alert, price, previous_close, today or datetime.now(MARKET_TZ).date().isoformat())
+    else:
+        return False
+
+    if hit:
+        alert.triggered = True
+        alert.triggered_at = datetime.utcnow()
+    return hit
+
+
+def _evaluate_ma(alert: PriceAlert, price: float, previous_close: Optional[float], today: str) -> bool:
+    state = _get_state(alert)
+    changed = False
+
+    if not state.day:
+        # Seeded once; a failed seed leaves ``day`` empty so the next check tries again
+        if not _seed_closes(alert, state, today):
+            return False
+        changed = True
+    elif state.day != today:
+        # Roll the window forward by the session that just closed
+        if previous_close:
+            state.push_close(previous_close)
+        state.day = today
+        changed = True
+
+    ma = state.moving_average
+    if ma is None:
+        if changed:
+            _save_state(alert, state)
+        return False
+    _set_target(alert, ma)
+
+    side = 1 if price > ma else -1
+    crossed = state.side != 0 and side != state.side
+    if side != state.side:
+        state.side = side
+        changed = True
+    if changed:
+        _save_state(alert, state)
+
+    if not crossed:
+        return False
+    return (alert.condition == "ma_above" and side == 1) or (alert.condition == "ma_below" and side == -1)
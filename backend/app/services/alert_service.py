@@ -1,12 +1,38 @@
-from datetime import datetime
+import logging
 from typing import Any, Dict, List
 
 from sqlalchemy.orm import Session
 
 from app.models.price_alert import PriceAlert
 from app.models.user import User
+from app.services import alert_engine
 from app.services.market_data_service import get_stock_quote
 
+logger = logging.getLogger(__name__)
+
+
+def _get_quote(symbol: str) -> Dict[str, Any]:
+    try:
+        return get_stock_quote(symbol)
+    except Exception:
+        return {}
+
+
+def _evaluate(alert: PriceAlert, quote: Dict[str, Any]) -> bool:
+    """Mark the alert triggered if its condition is met. Returns True if it just triggered."""
+    try:
+        return alert_engine.evaluate(alert, quote.get("price"), quote.get("previous_close"))
+    except Exception:
+        logger.exception(f"Failed to evaluate alert {alert.id}")
+        return False
+
+
+def _emit_triggered(alerts: List[PriceAlert]) -> None:
+    from app.services.event_bus import emit
+
+    for alert in alerts:
+        emit("alert.triggered", user_id=alert.user_id, symbol=alert.symbol, alert_id=alert.id)
+
 
 def check_alerts(db: Session, user: User) -> List[Dict[str, Any]]:
     """Check all active alerts against live prices. Mark triggered if condition met."""
@@ -17,23 +43,13 @@ def check_alerts(db: Session, user: User) -> List[Dict[str, Any]]:
     )
 
     results = []
+    triggered = []
     for alert in active_alerts:
-        try:
-            quote = get_stock_quote(alert.symbol)
-            current_price = quote.get("price")
-        except Exception:
-            current_price = None
-
-        just_triggered = False
-        if current_price is not None and not alert.triggered:
-            if alert.condition == "above" and current_price >= alert.target_price:
-                alert.triggered = True
-                alert.triggered_at = datetime.utcnow()
-                just_triggered = True
-            elif alert.condition == "below" and current_price <= alert.target_price:
-                alert.triggered = True
-                alert.triggered_at = datetime.utcnow()
-                just_triggered = True
+        quote = _get_quote(alert.symbol)
+        current_price = quote.get("price")
+        just_triggered = _evaluate(alert, quote)
+        if just_triggered:
+            triggered.append(alert)
 
         results.append({
             "alert": alert,
@@ -42,4 +58,31 @@ def check_alerts(db: Session, user: User) -> List[Dict[str, Any]]:
         })
 
     db.commit()
+    _emit_triggered(triggered)
     return results
+
+
+def check_all_alerts(db: Session) -> List[PriceAlert]:
+    """Evaluate every armed alert across all users, quoting each symbol once.
+
+    Used by the background scheduler. Emits ``alert.triggered`` for each alert
+    that fires and returns them.
+    """
+    armed = (
+        db.query(PriceAlert)
+        .filter(PriceAlert.is_active == True, PriceAlert.triggered == False)  # noqa: E712
+        .all()
+    )
+    if not armed:
+        return []
+
+    quotes = {symbol: _get_quote(symbol) for symbol in {a.symbol for a in armed}}
+    triggered = [a for a in armed if _evaluate(a, quotes[a.symbol])]
+
+    # Dynamic alerts only dirty the session when their running state moved
+    if triggered or db.dirty:
+        db.commit()
+    if triggered:
+        logger.info(f"Scheduled alert check triggered {len(triggered)} of {len(armed)} alerts")
+    _emit_triggered(triggered)
+    return triggered
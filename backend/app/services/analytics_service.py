@@ -1,3 +1,4 @@
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from sqlalchemy import func
@@ -6,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.models.conversation import Conversation, Message
 from app.models.financial_plan import FinancialPlan
 from app.models.insight import Insight
+from app.models.llm_usage import LLMUsage
 from app.models.subscription import Subscription
 from app.models.usage_tracking import UsageTracking
 from app.models.user import User
@@ -163,3 +165,82 @@ def get_analytics(db: Session) -> dict:
         },
         "daily_volume": daily_volume,
     }
+
+
+def get_llm_usage(db: Session, days: int = 7, top_users: int = 10) -> dict:
+    """Model usage per feature and top users from the llm_usage rollup, plus live latency percentiles.
+
+    Counters not yet flushed to the rollup are added in memory; nothing is written.
+    """
+    from app.services import llm_metrics
+
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    counters = ("calls", "errors", "input_tokens", "output_tokens", "cache_read_tokens",
+                "cache_creation_tokens", "latency_ms", "cost_usd")
+
+    by_feature = defaultdict(lambda: dict.fromkeys(counters, 0))
+    rows = (
+        db.query(LLMUsage.feature, *(func.sum(getattr(LLMUsage, c)) for c in counters))
+        .filter(LLMUsage.day >= since)
+        .group_by(LLMUsage.feature)
+        .all()
+    )
+    for feature, *sums in rows:
+        for counter, value in zip(counters, sums):
+            by_feature[feature][counter] += value or 0
+
+    by_user = defaultdict(lambda: {"calls": 0, "tokens": 0, "cost_usd": 0})
+    rows = (
+        db.query(
+            LLMUsage.user_id,
+            func.sum(LLMUsage.calls),
+            func.sum(LLMUsage.input_tokens + LLMUsage.output_tokens),
+            func.sum(LLMUsage.cost_usd),
+        )
+        .filter(LLMUsage.day >= since, LLMUsage.user_id.isnot(None))
+        .group_by(LLMUsage.user_id)
+        .all()
+    )
+    for user_id, calls, tokens, cost in rows:
+        by_user[user_id].update(calls=calls or 0, tokens=tokens or 0, cost_usd=cost or 0)
+
+    for (user_id, day, feature, _model), values in llm_metrics.pending().items():
+        if day < since:
+            continue
+        for counter in counters:
+            by_feature[feature][counter] += values[counter]
+        if user_id is not None:
+            user = by_user[user_id]
+            user["calls"] += values["calls"]
+            user["tokens"] += values["input_tokens"] + values["output_tokens"]
+            user["cost_usd"] += values["cost_usd"]
+
+    live = llm_metrics.snapshot()
+    features = []
+    for feature, totals in by_feature.items():
+        calls = totals["calls"]
+        features.append({
+            "feature": feature,
+            "calls": calls,
+            "errors": totals["errors"],
+            "input_tokens": totals["input_tokens"],
+            "output_tokens": totals["output_tokens"],
+            "cache_read_tokens": totals["cache_read_tokens"],
+            "cache_creation_tokens": totals["cache_creation_tokens"],
+            "mean_latency_ms": round(totals["latency_ms"] / calls, 1) if calls else 0,
+            "p50_latency_ms": live.get(feature, {}).get("p50_latency_ms"),
+            "p95_latency_ms": live.get(feature, {}).get("p95_latency_ms"),
+            "cost_usd": round(totals["cost_usd"], 4),
+        })
+    features.sort(key=lambda f: f["cost_usd"], reverse=True)
+
+    users = sorted(by_user.items(), key=lambda item: item[1]["cost_usd"], reverse=True)[:top_users]
+    return {
+        "days": days,
+        "features": features,
+        "top_users": [
+            {"user_id": user_id, "calls": u["calls"], "tokens": u["tokens"], "cost_usd": round(u["cost_usd"], 4)}
+            for user_id, u in users
+        ],
+        "live": live,
+    }
@@ -0,0 +1,239 @@
+"""Nightly bulk generation of insights and daily briefings.
+
+Instead of one synchronous model call per user when they open the app,
+the scheduler runs this once a day (NIGHTLY_GENERATION_HOUR, UTC) for
+every recently active user who doesn't have today's briefing yet. Context
+is loaded in chunks of users with a handful of set-based queries (``IN``
+over the chunk, window functions for the "latest N per user" lists), and
+the prompts are built with the same builders the on-demand paths use. Every
+chunk's requests then go out together as one llm_batch submission, so the
+run waits on the Batches API once per step rather than once per chunk.
+
+Insights are generated and committed first, so the briefings can mention
+them and a failed briefing step can't lose them. They're only generated
+for users the "insights" entitlement allows; each generation counts against
+the user's daily usage the same as an on-demand one.
+"""
+
+import json
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.briefing import Briefing
+from app.models.conversation import Conversation
+from app.models.financial_plan import FinancialPlan
+from app.models.financial_profile import FinancialProfile
+from app.models.insight import Insight
+from app.models.user_memory import UserMemory
+from app.services import briefing_service, entitlement_service, insight_service, llm_batch, market_snapshot
+from app.services.llm_batch import BatchRequest
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_DAYS = 14  # users with a conversation this recent get nightly generation
+CHUNK_SIZE = 500
+INSIGHT_CONVERSATIONS = 5
+BRIEFING_CONVERSATIONS = 3
+BRIEFING_INSIGHTS = 3
+
+
+def pending_user_ids(db: Session, day: date) -> List[int]:
+    """Recently active users without a daily briefing for ``day``."""
+    cutoff = datetime.utcnow() - timedelta(days=ACTIVE_DAYS)
+    done = db.query(Briefing.user_id).filter(Briefing.kind == "daily", Briefing.period_start == day)
+    rows = (
+        db.query(Conversation.user_id)
+        .filter(Conversation.updated_at >= cutoff, ~Conversation.user_id.in_(done))
+        .distinct()
+        .order_by(Conversation.user_id)
+        .all()
+    )
+    return [user_id for (user_id,) in rows]
+
+
+def _group(rows) -> Dict[int, list]:
+    grouped: Dict[int, list] = defaultdict(list)
+    for row in rows:
+        grouped[row.user_id].append(row)
+    return grouped
+
+
+def _latest(db: Session, model, user_ids: List[int], order_by, limit: int, *criteria) -> Dict[int, list]:
+    """The first ``limit`` rows per user by ``order_by``, in one query."""
+    rank = func.row_number().over(partition_by=model.user_id, order_by=order_by).label("rank")
+    ranked = db.query(model.id.label("id"), rank).filter(model.user_id.in_(user_ids), *criteria).subquery()
+    rows = (
+        db.query(model)
+        .join(ranked, model.id == ranked.c.id)
+        .filter(ranked.c.rank <= limit)
+        .order_by(model.user_id, ranked.c.rank)
+        .all()
+    )
+    return _group(rows)
+
+
+def _load_context(db: Session, user_ids: List[int]) -> Dict[str, Any]:
+    return {
+        "profiles": {
+            p.user_id: p for p in db.query(FinancialProfile).filter(FinancialProfile.user_id.in_(user_ids))
+        },
+        "plans": _group(
+            db.query(FinancialPlan)
+            .filter(FinancialPlan.user_id.in_(user_ids), FinancialPlan.status == "active")
+            .all()
+        ),
+        "conversations": _latest(
+            db, Conversation, user_ids, Conversation.updated_at.desc(), INSIGHT_CONVERSATIONS,
+        ),
+        "memories": _group(db.query(UserMemory).filter(UserMemory.user_id.in_(user_ids)).all()),
+    }
+
+
+def _insight_user_ids(db: Session, user_ids: List[int], day: date) -> List[int]:
+    """Users entitled to insights who didn't already get nightly ones on ``day``.
+
+    A user whose briefing failed on an earlier run is still pending, but
+    their insights from that run were committed and shouldn't be repeated.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    done = {
+        user_id
+        for (user_id,) in db.query(Insight.user_id).filter(
+            Insight.user_id.in_(user_ids),
+            Insight.trigger == "nightly_batch",
+            Insight.created_at >= start,
+            Insight.created_at < start + timedelta(days=1),
+        )
+    }
+    return [u for u in entitlement_service.entitled_user_ids(db, user_ids, "insights") if u not in done]
+
+
+def _chunks(user_ids: List[int]) -> Iterator[List[int]]:
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        yield user_ids[start:start + CHUNK_SIZE]
+
+
+def _insert(db: Session, model):
+    """INSERT for the session's dialect (SQLite or PostgreSQL), which supports ``on_conflict_do_nothing``."""
+    return (postgresql if db.get_bind().dialect.name == "postgresql" else sqlite).insert(model)
+
+
+def _generate_insights(db: Session, user_ids: List[int], market_ctx: str, day: date) -> int:
+    requests: List[BatchRequest] = []
+    for chunk in _chunks(user_ids):
+        context = _load_context(db, chunk)
+        requests.extend(
+            BatchRequest(
+                custom_id=f"insights-{user_id}",
+                feature="insights",
+                user_id=user_id,
+                params=insight_service.insight_request(insight_service.build_insight_prompt(
+                    context["profiles"].get(user_id),
+                    context["plans"].get(user_id, []),
+                    context["conversations"].get(user_id, []),
+                    context["memories"].get(user_id, []),
+                    market_ctx,
+                )),
+            )
+            for user_id in _insight_user_ids(db, chunk, day)
+        )
+    results = llm_batch.run(requests)
+
+    rows: List[Insight] = []
+    generated: List[int] = []
+    for request in requests:
+        text = results.get(request.custom_id)
+        if text:
+            rows.extend(insight_service.build_insights(request.user_id, text, trigger="nightly_batch"))
+            generated.append(request.user_id)
+    # ORM inserts (batched by the session) rather than a Core insert, so the
+    # mapper events that invalidate cached prompt context still fire
+    db.add_all(rows)
+    entitlement_service.record_usage(db, generated, "insights")
+    db.commit()
+    return len(rows)
+
+
+def _generate_briefings(db: Session, user_ids: List[int], market_ctx: str, day: date) -> int:
+    requests: List[BatchRequest] = []
+    counts: Dict[int, Tuple[int, int]] = {}  # active plans and pending insights, for the details
+    for chunk in _chunks(user_ids):
+        context = _load_context(db, chunk)
+        pending = _latest(
+            db, Insight, chunk, Insight.created_at.desc(), BRIEFING_INSIGHTS,
+            Insight.status.in_(["pending", "delivered"]),
+        )
+        for user_id in chunk:
+            plans = context["plans"].get(user_id, [])
+            insights = pending.get(user_id, [])
+            counts[user_id] = (len(plans), len(insights))
+            requests.append(BatchRequest(
+                custom_id=f"briefing-{user_id}",
+                feature="daily_briefing",
+                user_id=user_id,
+                params=briefing_service.daily_request(briefing_service.build_daily_prompt(
+                    context["profiles"].get(user_id),
+                    plans,
+                    insights,
+                    context["memories"].get(user_id, []),
+                    context["conversations"].get(user_id, [])[:BRIEFING_CONVERSATIONS],
+                    market_ctx,
+                )),
+            ))
+    results = llm_batch.run(requests)
+
+    rows: List[Dict[str, Any]] = []
+    for user_id in user_ids:
+        text = results.get(f"briefing-{user_id}")
+        if not text:
+            continue
+        result = briefing_service.daily_result(text, market_ctx, *counts[user_id])
+        rows.append({
+            "user_id": user_id,
+            "kind": "daily",
+            "period_start": day,
+            "briefing": result.pop("briefing"),
+            "details": json.dumps(result, default=str),
+            "source": "batch",
+        })
+    if not rows:
+        return 0
+    # A user may have opened the app (and generated one) while the batch ran;
+    # theirs is kept. No cache is built from briefings, so a Core insert is fine.
+    statement = (
+        _insert(db, Briefing)
+        .on_conflict_do_nothing(index_elements=["user_id", "kind", "period_start"])
+        .returning(Briefing.user_id)
+    )
+    written = db.execute(statement, rows).all()
+    db.commit()
+    return len(written)
+
+
+def run_nightly(db: Session, day: Optional[date] = None) -> Dict[str, int]:
+    """Generate insights and a daily briefing for every pending user.
+
+    Safe to re-run: users with today's briefing aren't pending, and users
+    who got nightly insights on ``day`` aren't given them again.
+    """
+    day = day or datetime.utcnow().date()
+    user_ids = pending_user_ids(db, day)
+    stats = {"users": len(user_ids), "insights": 0, "briefings": 0}
+    if not user_ids:
+        return stats
+
+    market_ctx = market_snapshot.context()
+    stats["insights"] = _generate_insights(db, user_ids, market_ctx, day)
+    stats["briefings"] = _generate_briefings(db, user_ids, market_ctx, day)
+
+    logger.info(
+        f"Nightly generation for {day}: {stats['users']} users, "
+        f"{stats['insights']} insights, {stats['briefings']} briefings"
+    )
+    return stats
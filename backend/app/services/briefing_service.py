@@ -1,45 +1,51 @@
+"""Daily briefings and weekly recaps.
+
+Each is generated at most once per user per period (the day, or the week
+starting Monday) and stored in ``briefings``; later requests are served
+from the stored row. Daily briefings are usually prepared ahead of time
+by the nightly batch (batch_generation); anything not prepared is
+generated on first request, with concurrent first requests sharing one
+generation.
+"""
+
 import json
 import logging
+import threading
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
 
-import anthropic
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.config import settings
+from app.models.briefing import Briefing
 from app.models.conversation import Conversation
 from app.models.financial_plan import FinancialPlan
 from app.models.financial_profile import FinancialProfile
 from app.models.insight import Insight
 from app.models.user import User
 from app.models.user_memory import UserMemory
+from app.services import llm_gateway, market_snapshot
 
 logger = logging.getLogger(__name__)
 
+BRIEFING_MODEL = "claude-haiku-4-5-20251001"
+DAILY_MAX_TOKENS = 500
+DAILY_REQUEST = "Give me my morning briefing."
 
-def generate_daily_briefing(db: Session, user: User) -> dict:
-    """Generate a spoken-friendly daily briefing covering markets, goals, and insights."""
-    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
-    plans = (
-        db.query(FinancialPlan)
-        .filter(FinancialPlan.user_id == user.id, FinancialPlan.status == "active")
-        .all()
-    )
-    pending_insights = (
-        db.query(Insight)
-        .filter(Insight.user_id == user.id, Insight.status.in_(["pending", "delivered"]))
-        .order_by(Insight.created_at.desc())
-        .limit(3)
-        .all()
-    )
-    memories = db.query(UserMemory).filter(UserMemory.user_id == user.id).all()
-    recent_conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == user.id)
-        .order_by(Conversation.updated_at.desc())
-        .limit(3)
-        .all()
-    )
+_inflight: Dict[Tuple[int, str, date], Future] = {}
+_inflight_lock = threading.Lock()
 
-    # Build context
+
+def build_daily_prompt(
+    profile: Optional[FinancialProfile],
+    plans: List[FinancialPlan],
+    pending_insights: List[Insight],
+    memories: List[UserMemory],
+    recent_conversations: List[Conversation],
+    market_ctx: str,
+) -> str:
+    """System prompt for a daily briefing from already-loaded user data."""
     profile_ctx = "No profile set up."
     if profile:
         profile_ctx = json.dumps({
@@ -71,24 +77,12 @@ def generate_daily_briefing(db: Session, user: User) -> dict:
             {"key": m.key, "value": m.value} for m in memories
         ])
 
-    market_ctx = "Market data unavailable."
-    try:
-        from app.services.market_data_service import get_stock_quote
-        spy = get_stock_quote("SPY")
-        market_ctx = json.dumps({
-            "sp500_price": spy.get("price"),
-            "sp500_change_pct": spy.get("change_percent"),
-            "sp500_name": spy.get("name"),
-        })
-    except Exception:
-        pass
-
     # Determine tone
     tone = "professional"
     if profile:
         tone = getattr(profile, "advisor_tone", None) or "professional"
 
-    system_prompt = f"""You are WealthWise, a personal AI financial advisor delivering a daily morning briefing.
+    return f"""You are WealthWise, a personal AI financial advisor delivering a daily morning briefing.
 
 Tone: {tone}
 Keep it conversational, warm, and spoken-friendly (this will be read aloud via text-to-speech).
@@ -109,27 +103,131 @@ BEHAVIORAL MEMORY: {memory_ctx}
 MARKET SNAPSHOT: {market_ctx}
 RECENT TOPICS: {json.dumps([c.title for c in recent_conversations]) if recent_conversations else "None"}"""
 
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=500,
-        system=system_prompt,
-        messages=[{"role": "user", "content": "Give me my morning briefing."}],
-    )
 
-    briefing_text = response.content[0].text.strip()
+def daily_request(system_prompt: str) -> dict:
+    """Messages API parameters for a daily briefing prompt."""
+    return {
+        "model": BRIEFING_MODEL,
+        "max_tokens": DAILY_MAX_TOKENS,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": DAILY_REQUEST}],
+    }
+
+
+def daily_result(briefing_text: str, market_ctx: str, active_plans: int, pending_insights: int) -> dict:
+    return {
+        "briefing": briefing_text.strip(),
+        "market": json.loads(market_ctx) if market_ctx != market_snapshot.UNAVAILABLE else None,
+        "active_plans": active_plans,
+        "pending_insights": pending_insights,
+    }
+
+
+def period_start(kind: str, day: Optional[date] = None) -> date:
+    """The day a briefing of ``kind`` covers: the day itself, or the Monday of its week."""
+    day = day or datetime.utcnow().date()
+    return day - timedelta(days=day.weekday()) if kind == "weekly" else day
 
+
+def _as_response(row: Briefing) -> dict:
     return {
-        "briefing": briefing_text,
-        "market": json.loads(market_ctx) if market_ctx != "Market data unavailable." else None,
-        "active_plans": len(plans),
-        "pending_insights": len(pending_insights),
+        "briefing": row.briefing,
+        **(json.loads(row.details) if row.details else {}),
+        "generated_at": row.generated_at.isoformat(),
     }
 
 
+def stored_briefing(db: Session, user_id: int, kind: str, period: date) -> Optional[dict]:
+    """A previously generated briefing for the period, in the same shape as a fresh one."""
+    row = (
+        db.query(Briefing)
+        .filter(Briefing.user_id == user_id, Briefing.kind == kind, Briefing.period_start == period)
+        .first()
+    )
+    return _as_response(row) if row else None
+
+
+def _store(db: Session, user_id: int, kind: str, period: date, result: dict) -> dict:
+    details = {k: v for k, v in result.items() if k != "briefing"}
+    row = Briefing(
+        user_id=user_id,
+        kind=kind,
+        period_start=period,
+        briefing=result["briefing"],
+        details=json.dumps(details, default=str),
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker process stored this period first; serve theirs
+        db.rollback()
+        return stored_briefing(db, user_id, kind, period)
+    return _as_response(row)
+
+
+def get_briefing(db: Session, user: User, kind: str) -> dict:
+    """The user's briefing of ``kind`` ("daily" or "weekly") for the current period."""
+    period = period_start(kind)
+    stored = stored_briefing(db, user.id, kind, period)
+    if stored:
+        return stored
+
+    # Single flight: concurrent first requests for a period share one generation
+    key = (user.id, kind, period)
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        owner = pending is None
+        if owner:
+            pending = _inflight[key] = Future()
+    if not owner:
+        return pending.result()
+
+    try:
+        result = _store(db, user.id, kind, period, GENERATORS[kind](db, user))
+        pending.set_result(result)
+        return result
+    except Exception as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def generate_daily_briefing(db: Session, user: User) -> dict:
+    """Generate a spoken-friendly daily briefing covering markets, goals, and insights."""
+    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
+    plans = (
+        db.query(FinancialPlan)
+        .filter(FinancialPlan.user_id == user.id, FinancialPlan.status == "active")
+        .all()
+    )
+    pending_insights = (
+        db.query(Insight)
+        .filter(Insight.user_id == user.id, Insight.status.in_(["pending", "delivered"]))
+        .order_by(Insight.created_at.desc())
+        .limit(3)
+        .all()
+    )
+    memories = db.query(UserMemory).filter(UserMemory.user_id == user.id).all()
+    recent_conversations = (
+        db.query(Conversation)
+        .filter(Conversation.user_id == user.id)
+        .order_by(Conversation.updated_at.desc())
+        .limit(3)
+        .all()
+    )
+
+    market_ctx = market_snapshot.context()
+    system_prompt = build_daily_prompt(profile, plans, pending_insights, memories, recent_conversations, market_ctx)
+    response = llm_gateway.create(feature="daily_briefing", user_id=user.id, **daily_request(system_prompt))
+
+    return daily_result(response.content[0].text, market_ctx, len(plans), len(pending_insights))
+
+
 def generate_weekly_briefing(db: Session, user: User) -> dict:
     """Generate a comprehensive weekly recap covering the past week's activity."""
-    from datetime import datetime, timedelta
     from app.models.usage_tracking import UsageTracking
 
     profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
@@ -167,17 +265,7 @@ def generate_weekly_briefing(db: Session, user: User) -> dict:
         .all()
     )
 
-    # Market snapshot
-    market_ctx = "Market data unavailable."
-    try:
-        from app.services.market_data_service import get_stock_quote
-        spy = get_stock_quote("SPY")
-        market_ctx = json.dumps({
-            "sp500_price": spy.get("price"),
-            "sp500_change_pct": spy.get("change_percent"),
-        })
-    except Exception:
-        pass
+    market_ctx = market_snapshot.context()
 
     # Build context
     profile_ctx = "No profile."
@@ -217,8 +305,9 @@ BEHAVIORAL MEMORY: {json.dumps([{"key": m.key, "value": m.value} for m in memori
 USAGE: {json.dumps([{"feature": u.feature, "count": u.count} for u in usage_records]) if usage_records else "None"}
 MARKET SNAPSHOT: {market_ctx}"""
 
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    response = client.messages.create(
+    response = llm_gateway.create(
+        feature="weekly_briefing",
+        user_id=user.id,
         model="claude-haiku-4-5-20251001",
         max_tokens=800,
         system=system_prompt,
@@ -234,5 +323,11 @@ MARKET SNAPSHOT: {market_ctx}"""
             "insights_dismissed": len(dismissed),
             "active_plans": len(plans),
         },
-        "market": json.loads(market_ctx) if market_ctx != "Market data unavailable." else None,
+        "market": json.loads(market_ctx) if market_ctx != market_snapshot.UNAVAILABLE else None,
     }
+
+
+GENERATORS: Dict[str, Callable[[Session, User], dict]] = {
+    "daily": generate_daily_briefing,
+    "weekly": generate_weekly_briefing,
+}
@@ -1,24 +1,29 @@
 import json
-from typing import Any, Dict, List, Optional
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional
 
-import anthropic
 from sqlalchemy.orm import Session
 
-from app.claude_tools.definitions import TOOLS
-from app.claude_tools.executor import execute_tool
+from app.claude_tools import registry
+from app.claude_tools.executor import execute_tools
 from app.config import settings
 from app.models.conversation import Conversation, Message
-from app.models.financial_plan import FinancialPlan
 from app.models.financial_profile import FinancialProfile
-from app.models.insight import Insight
 from app.models.user import User
-from app.models.user_memory import UserMemory
+from app.services import (
+    context_window, llm_gateway, market_data_service, memory_index, model_router, prompt_context,
+    symbol_master,
+)
+from app.services.memory_service import summary_due
 
-MAX_TOOL_ITERATIONS = 5
+logger = logging.getLogger(__name__)
 
+MAX_TOOL_ITERATIONS = 5
+FOLLOW_UP_WAIT_SECONDS = 10
+PREFETCH_LIMIT = 8
 
-def _build_system_prompt(user: User, profile: Optional[FinancialProfile], db: Optional[Session] = None) -> str:
-    system = """You are WealthWise, an expert AI financial advisor. You provide personalized financial guidance, market analysis, and investment insights.
+SYSTEM_INSTRUCTIONS = """You are WealthWise, an expert AI financial advisor. You provide personalized financial guidance, market analysis, and investment insights.
 
 Guidelines:
 - Always use the available tools to look up real-time market data when discussing specific stocks or sectors
@@ -27,125 +32,62 @@ Guidelines:
 - Tailor advice to the user's financial profile when available
 - Include disclaimers that this is informational, not professional financial advice
 - Be conversational and approachable while maintaining expertise
-- When comparing investments, pull data for each one
+- When comparing investments, pull data for all of them in one call with the multi-symbol tools (get_stock_quotes, get_company_infos, get_price_histories)
 - Format currency values and percentages clearly
+- For questions about the user's own holdings, budget or net worth, call get_portfolio_summary, get_budget_summary or get_net_worth rather than asking them to restate it or quoting their symbols one at a time
 - You have internal tools (get_financial_plans, get_user_memory, save_user_memory, get_active_alerts, get_pending_insights) — use them proactively to reference the user's goals, memories, and alerts in your responses"""
 
-    if profile:
-        # Language preference
-        lang = getattr(profile, "language", None) or "en"
-        if lang != "en":
-            lang_names = {"es": "Spanish", "fr": "French", "de": "German", "it": "Italian", "pt": "Portuguese", "zh": "Chinese", "ja": "Japanese", "ko": "Korean"}
-            lang_name = lang_names.get(lang, lang)
-            system += f"\n\nIMPORTANT: Respond in {lang_name}. The user prefers communication in {lang_name}. All responses, advice, and analysis should be in {lang_name}."
-
-        # Communication level instructions
-        comm_level = getattr(profile, "communication_level", None) or "college"
-        comm_instructions = {
-            "elementary": "\n\nCommunication Style: Explain everything using very simple words and everyday analogies. Avoid all financial jargon. Use comparisons to things like piggy banks, lemonade stands, and allowances. Keep sentences short and friendly.",
-            "high_school": "\n\nCommunication Style: Use plain, straightforward language. When you must use a financial term, always explain it briefly in parentheses. Keep explanations clear and relatable to everyday life.",
-            "college": "\n\nCommunication Style: Use standard financial terminology. Provide thorough analysis with proper context. You can assume familiarity with common investment concepts like diversification, market cap, and P/E ratios.",
-            "phd": "\n\nCommunication Style: Use advanced financial terminology and quantitative analysis freely. Reference academic concepts like CAPM, Sharpe ratio, efficient frontier, Monte Carlo simulations, and modern portfolio theory. Include statistical measures and mathematical frameworks where relevant.",
-        }
-        system += comm_instructions.get(comm_level, comm_instructions["college"])
-
-        # Advisor tone instructions
-        tone = getattr(profile, "advisor_tone", None) or "professional"
-        tone_instructions = {
-            "friendly": "\n\nAdvisor Tone: Be warm, encouraging, and casual. Use positive reinforcement. Celebrate good financial decisions. Be supportive and optimistic while still being honest about risks.",
-            "professional": "\n\nAdvisor Tone: Be formal, data-driven, and precise. Focus on facts and figures. Maintain a polished, authoritative voice. Present analysis in a structured, methodical way.",
-            "mentor": "\n\nAdvisor Tone: Be educational and use a Socratic approach. Ask thought-provoking questions. Explain the 'why' behind concepts. Help the user build their own financial literacy and decision-making skills.",
-            "casual": "\n\nAdvisor Tone: Be relaxed, conversational, and occasionally humorous. Use everyday language and pop culture references. Make finance feel approachable and fun, not intimidating.",
-        }
-        system += tone_instructions.get(tone, tone_instructions["professional"])
-
-        profile_context = "\n\nUser Financial Profile:"
-        if profile.age:
-            profile_context += f"\n- Age: {profile.age}"
-        if profile.annual_income:
-            profile_context += f"\n- Annual Income: ${profile.annual_income:,.0f}"
-        if profile.monthly_expenses:
-            profile_context += f"\n- Monthly Expenses: ${profile.monthly_expenses:,.0f}"
-        if profile.total_savings:
-            profile_context += f"\n- Total Savings: ${profile.total_savings:,.0f}"
-        if profile.total_debt:
-            profile_context += f"\n- Total Debt: ${profile.total_debt:,.0f}"
-        if profile.risk_tolerance:
-            profile_context += f"\n- Risk Tolerance: {profile.risk_tolerance}"
-        if profile.investment_goals:
-            profile_context += f"\n- Investment Goals: {profile.investment_goals}"
-        if profile.portfolio_description:
-            profile_context += f"\n- Current Portfolio: {profile.portfolio_description}"
-        if getattr(profile, "experience_level", None):
-            profile_context += f"\n- Experience Level: {profile.experience_level}"
-        if getattr(profile, "investment_timeline", None):
-            profile_context += f"\n- Investment Timeline: {profile.investment_timeline}"
-        if getattr(profile, "interested_topics", None):
-            profile_context += f"\n- Interested Topics: {profile.interested_topics}"
-        system += profile_context
-
-    # Add active goals, recent insights, and behavioral memory
-    if db:
-        # Active financial plans
-        plans = (
-            db.query(FinancialPlan)
-            .filter(FinancialPlan.user_id == user.id, FinancialPlan.status == "active")
-            .all()
-        )
-        if plans:
-            system += "\n\nActive Financial Plans:"
-            for p in plans:
-                system += f"\n- {p.title} ({p.plan_type})"
-
-        # Recent insights the user has received
-        recent_insights = (
-            db.query(Insight)
-            .filter(Insight.user_id == user.id, Insight.status.in_(["delivered", "accepted"]))
-            .order_by(Insight.created_at.desc())
-            .limit(5)
-            .all()
-        )
-        if recent_insights:
-            system += "\n\nRecent Advisor Insights (reference these naturally if relevant):"
-            for i in recent_insights:
-                system += f"\n- [{i.type}] {i.title}: {i.body}"
-
-        # Behavioral memory (exclude conversation summaries — handled separately)
-        memories = (
-            db.query(UserMemory)
-            .filter(UserMemory.user_id == user.id, ~UserMemory.key.like("conversation_summary_%"))
-            .all()
-        )
-        if memories:
-            system += "\n\nBehavioral Memory (what you know about this user from past interactions):"
-            for m in memories:
-                system += f"\n- {m.key}: {m.value}"
-
-        # Conversation summaries from past chats
-        from app.services.memory_service import get_conversation_summaries
-        summaries = get_conversation_summaries(db, user.id, limit=3)
-        if summaries:
-            system += "\n\nPrevious Conversation Summaries (use for continuity):"
-            for s in summaries:
-                system += f"\n- {s.get('summary', '')}"
-                facts = s.get("key_facts", [])
-                if facts:
-                    system += f" Key facts: {', '.join(facts)}."
-                actions = s.get("action_items", [])
-                if actions:
-                    system += f" Action items: {', '.join(actions)}."
-
-    return system
-
-
-def _convert_messages_for_api(messages: List[Message]) -> List[Dict[str, Any]]:
-    api_messages = []
-    for msg in messages:
-        if msg.role == "user":
-            api_messages.append({"role": "user", "content": msg.content})
-        elif msg.role == "assistant" and msg.content:
-            api_messages.append({"role": "assistant", "content": msg.content})
-    return api_messages
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+
+def _build_system_prompt(user: User, db: Optional[Session] = None, extra: str = "") -> List[Dict[str, Any]]:
+    """System prompt as content blocks, most stable first, for prompt caching.
+
+    The API caches the prefix up to each ``cache_control`` breakpoint, in the
+    order tools → system → messages. The static instructions are identical for
+    every user, so their breakpoint also covers the tool definitions in front
+    of them; the profile block is stable per user; plans, insights and
+    summaries change often and go last, uncached. Behavioral memory is chosen
+    per message, so it goes with the message instead (see ``_with_memory``).
+    """
+    blocks = [{"type": "text", "text": SYSTEM_INSTRUCTIONS, "cache_control": CACHE_BREAKPOINT}]
+    profile_text, user_text = prompt_context.get_context(db, user.id) if db else ("", "")
+    if profile_text:
+        blocks.append({"type": "text", "text": profile_text.lstrip("\n"), "cache_control": CACHE_BREAKPOINT})
+    volatile = user_text + extra
+    if volatile.strip():
+        blocks.append({"type": "text", "text": volatile.lstrip("\n")})
+    return blocks
+
+
+def _blocks(content: Any) -> List[Dict[str, Any]]:
+    return [{"type": "text", "text": content}] if isinstance(content, str) else list(content)
+
+
+def _with_memory(api_messages: List[Dict[str, Any]], memory_text: str) -> List[Dict[str, Any]]:
+    """Copy of the messages with the memory block prepended to the new user message (the last one)."""
+    if not memory_text or not api_messages:
+        return api_messages
+    last = api_messages[-1]
+    content = [{"type": "text", "text": memory_text.lstrip("\n")}] + _blocks(last["content"])
+    return api_messages[:-1] + [{**last, "content": content}]
+
+
+def _with_history_breakpoint(api_messages: List[Dict[str, Any]], turn_start: int = 0) -> List[Dict[str, Any]]:
+    """Copy of the messages with cache breakpoints before ``turn_start`` and on the last block.
+
+    The next turn resends ``api_messages[:turn_start]`` unchanged (this
+    turn's message comes back from the database without its memory block),
+    so that breakpoint is the prefix it reads; later iterations of the tool
+    loop resend everything up to the last block.
+    """
+    messages = list(api_messages)
+    for i in {turn_start - 1, len(messages) - 1}:
+        if i >= 0:
+            content = _blocks(messages[i]["content"])
+            content[-1] = {**content[-1], "cache_control": CACHE_BREAKPOINT}
+            messages[i] = {**messages[i], "content": content}
+    return messages
 
 
 def generate_financial_plan(db: Session, user: User, plan_data: Dict[str, Any]) -> str:
@@ -205,8 +147,9 @@ Be specific with dollar amounts and percentages where possible. Include disclaim
         if getattr(profile, "experience_level", None):
             user_context += f"- Experience Level: {profile.experience_level}\n"
 
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    response = client.messages.create(
+    response = llm_gateway.create(
+        feature="financial_plan",
+        user_id=user.id,
         model=settings.CLAUDE_MODEL,
         max_tokens=4096,
         system=system_prompt,
@@ -216,12 +159,26 @@ Be specific with dollar amounts and percentages where possible. Include disclaim
     return response.content[0].text
 
 
-def send_message(
+def stream_message(
     db: Session,
     user: User,
     conversation_id: Optional[int],
     user_message: str,
-) -> Dict[str, Any]:
+    wait_for_follow_ups: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """Run one chat turn, yielding progress events as they happen.
+
+    Events (``type`` key):
+    - ``conversation``: the conversation id, sent first
+    - ``text``: a text delta from the model
+    - ``tool_use``: the model started a tool call
+    - ``tool_result``: a tool finished, with its parsed result
+    - ``done``: the persisted assistant message
+    - ``follow_ups``: suggested follow-up questions, sent last (only when
+      ``wait_for_follow_ups``; otherwise fetch them via the message later)
+
+    Raises ValueError before any event if the conversation doesn't exist.
+    """
     # Get or create conversation
     if conversation_id:
         conversation = db.query(Conversation).filter(
@@ -241,31 +198,67 @@ def send_message(
     db.add(user_msg)
     db.commit()
 
-    # Get user's financial profile
-    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
+    return _run_turn(db, user, conversation, user_message, wait_for_follow_ups)
+
+
+def _run_turn(
+    db: Session,
+    user: User,
+    conversation: Conversation,
+    user_message: str,
+    wait_for_follow_ups: bool,
+) -> Iterator[Dict[str, Any]]:
+    yield {"type": "conversation", "conversation_id": conversation.id}
 
     # Build messages for Claude
     history = db.query(Message).filter(
         Message.conversation_id == conversation.id,
     ).order_by(Message.created_at).all()
 
-    api_messages = _convert_messages_for_api(history)
-    system_prompt = _build_system_prompt(user, profile, db)
+    # Recent turns verbatim within the token budget, older ones via the rolling summary
+    summary = prompt_context.get_conversation_summary(db, user.id, conversation.id)
+    window = context_window.build(history, summary)
+    # Only the behavioral memories most relevant to this message, after the cached history
+    api_messages = _with_memory(window.messages, memory_index.memory_block(db, user.id, user_message))
+    turn_start = len(api_messages) - 1
+    system_prompt = _build_system_prompt(user, db, extra=window.summary_block)
+
+    # Warm market data for tickers the user named while the first model call runs,
+    # so the quote/company-info tools it's likely to call hit the cache
+    tickers = symbol_master.extract_tickers(user_message, limit=PREFETCH_LIMIT)
+    if tickers:
+        market_data_service.prefetch_info(tickers)
+
+    # Simple lookups and small talk that open a conversation go to the fast model
+    first_turn = not any(m.role == "assistant" for m in history)
+    route = model_router.route(user_message, user_id=user.id, first_turn=first_turn)
+    started = time.monotonic()
+    first_token_ms = None
 
     # Claude tool loop
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
     all_tool_calls = []
     all_tool_results = []
+    stored_tool_results = []  # the same, as already-serialized JSON
     final_text = ""
 
     for _ in range(MAX_TOOL_ITERATIONS):
-        response = client.messages.create(
-            model=settings.CLAUDE_MODEL,
-            max_tokens=4096,
+        with llm_gateway.stream(
+            feature="chat",
+            user_id=user.id,
+            model=route.model,
+            max_tokens=route.max_tokens,
             system=system_prompt,
-            tools=TOOLS,
-            messages=api_messages,
-        )
+            tools=registry.schemas(),
+            messages=_with_history_breakpoint(api_messages, turn_start),
+        ) as stream:
+            for event in stream:
+                if event.type == "text":
+                    if first_token_ms is None:
+                        first_token_ms = (time.monotonic() - started) * 1000
+                    yield {"type": "text", "delta": event.text}
+                elif event.type == "content_block_start" and event.content_block.type == "tool_use":
+                    yield {"type": "tool_use", "name": event.content_block.name}
+            response = stream.get_final_message()
 
         # Collect text and tool use blocks
         text_parts = []
@@ -283,10 +276,13 @@ def send_message(
         if not tool_use_blocks:
             break
 
-        # Execute tools and build response
+        # Execute this turn's tools together, then build response in call order
+        results = execute_tools(
+            [(block.name, block.input) for block in tool_use_blocks],
+            db=db,
+            user_id=user.id,
+        )
         assistant_content = []
-        tool_result_content = []
-
         for block in response.content:
             if block.type == "text":
                 assistant_content.append({"type": "text", "text": block.text})
@@ -297,14 +293,18 @@ def send_message(
                     "name": block.name,
                     "input": block.input,
                 })
-                result = execute_tool(block.name, block.input, db=db, user_id=user.id)
-                tool_result_content.append({
-                    "type": "tool_result",
-                    "tool_use_id": block.id,
-                    "content": result,
-                })
-                all_tool_calls.append({"name": block.name, "input": block.input})
-                all_tool_results.append({"tool": block.name, "result": json.loads(result)})
+
+        tool_result_content = []
+        for block, result in zip(tool_use_blocks, results):
+            tool_result_content.append({
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": result.content,
+            })
+            all_tool_calls.append({"name": block.name, "input": block.input})
+            all_tool_results.append({"tool": block.name, "result": result.data})
+            stored_tool_results.append(f'{{"tool": {json.dumps(block.name)}, "result": {result.content}}}')
+            yield {"type": "tool_result", "tool": block.name, "result": result.data}
 
         # Add to messages for next iteration
         api_messages.append({"role": "assistant", "content": assistant_content})
@@ -316,7 +316,7 @@ def send_message(
         role="assistant",
         content=final_text,
         tool_calls=json.dumps(all_tool_calls) if all_tool_calls else None,
-        tool_results=json.dumps(all_tool_results) if all_tool_results else None,
+        tool_results=f"[{', '.join(stored_tool_results)}]" if stored_tool_results else None,
     )
     db.add(assistant_msg)
 
@@ -325,14 +325,46 @@ def send_message(
         conversation.title = user_message[:100]
 
     db.commit()
+    model_router.record_turn(route, first_token_ms, (time.monotonic() - started) * 1000)
 
-    # Extract and save behavioral memory (non-critical, fail silently)
+    yield {
+        "type": "done",
+        "conversation_id": conversation.id,
+        "message": {
+            "id": assistant_msg.id,
+            "role": "assistant",
+            "content": final_text,
+            "tool_results": all_tool_results if all_tool_results else None,
+            "follow_ups": None,
+        },
+    }
+
+    # Memory extraction, summarization and follow-ups run as background jobs
+    follow_ups_job = None
     try:
-        from app.services.memory_service import extract_and_save_memory, summarize_conversation
-        extract_and_save_memory(db, user.id, user_message, final_text)
-        summarize_conversation(db, user.id, conversation.id, history)
+        from app.services import job_queue
+        job_queue.enqueue(
+            "memory.extract",
+            coalesce_key=str(user.id),
+            user_id=user.id,
+            exchanges=[(user_message, final_text)],
+        )
+        if summary_due(summary, len(history) + 1):
+            job_queue.enqueue(
+                "conversation.summarize",
+                coalesce_key=str(conversation.id),
+                user_id=user.id,
+                conversation_id=conversation.id,
+            )
+        follow_ups_job = job_queue.enqueue(
+            "chat.follow_ups",
+            message_id=assistant_msg.id,
+            user_id=user.id,
+            user_message=user_message,
+            assistant_response=final_text,
+        )
     except Exception:
-        pass
+        logger.exception("Failed to enqueue post-response jobs")
 
     # Emit event for background insight generation
     try:
@@ -344,29 +376,43 @@ def send_message(
     except Exception:
         pass
 
-    # Generate smart follow-up suggestions (non-critical)
-    follow_ups = []
-    try:
-        follow_ups = _generate_follow_ups(user_message, final_text)
-    except Exception:
-        pass
+    if not wait_for_follow_ups:
+        return
 
-    return {
-        "conversation_id": conversation.id,
-        "message": {
-            "id": assistant_msg.id,
-            "role": "assistant",
-            "content": final_text,
-            "tool_results": all_tool_results if all_tool_results else None,
-            "follow_ups": follow_ups if follow_ups else None,
-        },
-    }
+    # Streaming clients already have the answer, so waiting here costs them nothing
+    follow_ups = None
+    if follow_ups_job is not None:
+        try:
+            follow_ups = follow_ups_job.result(timeout=FOLLOW_UP_WAIT_SECONDS)
+        except Exception:
+            pass
+
+    yield {"type": "follow_ups", "message_id": assistant_msg.id, "follow_ups": follow_ups}
+
+
+def send_message(
+    db: Session,
+    user: User,
+    conversation_id: Optional[int],
+    user_message: str,
+) -> Dict[str, Any]:
+    """Run one chat turn and return the assistant message.
+
+    Follow-ups are generated in the background; clients fetch them from
+    /api/chat/messages/{id}/follow-ups.
+    """
+    result: Dict[str, Any] = {}
+    for event in stream_message(db, user, conversation_id, user_message, wait_for_follow_ups=False):
+        if event["type"] == "done":
+            result = {"conversation_id": event["conversation_id"], "message": event["message"]}
+    return result
 
 
-def _generate_follow_ups(user_message: str, assistant_response: str) -> list:
+def _generate_follow_ups(user_message: str, assistant_response: str, user_id: Optional[int] = None) -> list:
     """Generate 2-3 contextual follow-up question suggestions."""
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    response = client.messages.create(
+    response = llm_gateway.create(
+        feature="follow_ups",
+        user_id=user_id,
         model="claude-haiku-4-5-20251001",
         max_tokens=200,
         system="""Given a user question and advisor response, suggest 2-3 natural follow-up questions the user might want to ask.
@@ -0,0 +1,128 @@
+"""Token-budgeted chat history for the model's context window.
+
+Recent messages are sent verbatim, newest first, until the budget is spent;
+anything older is represented by the conversation's rolling summary (see
+memory_service.summarize_conversation). Messages the summary doesn't cover
+yet are always kept so nothing drops out of context between summary
+updates. Token counts are a local estimate, good enough for budgeting.
+
+The window's first message only moves in steps of START_STEP messages (the
+summary interval), so the history prefix stays the same for several turns
+and its prompt-cache breakpoint keeps hitting. The window may run over the
+budget by up to one step.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.memory_service import SUMMARY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role markers and separators
+MIN_RECENT_MESSAGES = 2  # always keep at least the last exchange
+START_STEP = SUMMARY_INTERVAL  # the window's start moves this many messages at a time
+
+_stats_lock = threading.Lock()
+_stats = {"turns": 0, "full_tokens": 0, "sent_tokens": 0, "summarized_messages": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _message_tokens(message) -> int:
+    return estimate_tokens(message.content or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class ContextWindow:
+    messages: List[Dict[str, Any]]
+    summary_block: str  # appended to the system prompt; empty when nothing was dropped
+    full_tokens: int
+    sent_tokens: int
+    summarized_messages: int
+
+
+def build(history: list, summary: Optional[dict], budget: Optional[int] = None) -> ContextWindow:
+    """Select the messages to send for this turn.
+
+    ``history`` is the conversation's messages in order, ending with the new
+    user message; ``summary`` is the stored rolling summary, if any.
+    """
+    if budget is None:
+        budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+    messages = [m for m in history if m.role == "user" or (m.role == "assistant" and m.content)]
+    costs = [_message_tokens(m) for m in messages]
+    full_tokens = sum(costs)
+
+    # Without a summary, older messages can't be represented; send everything
+    covered_through = summary.get("summarized_through", 0) if summary else None
+    start = len(messages)
+    used = 0
+    while start > 0:
+        candidate = messages[start - 1]
+        within_budget = used + costs[start - 1] <= budget
+        uncovered = covered_through is None or candidate.id > covered_through
+        if not (within_budget or uncovered or len(messages) - start < MIN_RECENT_MESSAGES):
+            break
+        start -= 1
+        used += costs[start]
+
+    # Back to the step boundary, so the start stays put as messages are appended
+    snapped = start - start % START_STEP
+    used += sum(costs[snapped:start])
+    start = snapped
+
+    # The API expects the history to open with a user turn
+    while start < len(messages) - 1 and messages[start].role != "user":
+        used -= costs[start]
+        start += 1
+
+    summary_block = ""
+    if start > 0 and summary:
+        summary_block = f"\n\nEarlier in this conversation (summarized): {summary.get('summary', '')}"
+        facts = summary.get("key_facts", [])
+        if facts:
+            summary_block += f" Key facts: {', '.join(facts)}."
+        actions = summary.get("action_items", [])
+        if actions:
+            summary_block += f" Action items: {', '.join(actions)}."
+
+    window = ContextWindow(
+        messages=[{"role": m.role, "content": m.content} for m in messages[start:]],
+        summary_block=summary_block,
+        full_tokens=full_tokens,
+        sent_tokens=used + estimate_tokens(summary_block),
+        summarized_messages=start,
+    )
+    _record(window)
+    return window
+
+
+def _record(window: ContextWindow) -> None:
+    with _stats_lock:
+        _stats["turns"] += 1
+        _stats["full_tokens"] += window.full_tokens
+        _stats["sent_tokens"] += window.sent_tokens
+        _stats["summarized_messages"] += window.summarized_messages
+    if window.summarized_messages:
+        logger.info(
+            f"Context window: sent ~{window.sent_tokens} of ~{window.full_tokens} history tokens "
+            f"({window.summarized_messages} messages summarized)"
+        )
+
+
+def get_stats() -> Dict[str, Any]:
+    """Cumulative history-token savings since process start."""
+    with _stats_lock:
+        stats = dict(_stats)
+    full = stats["full_tokens"]
+    stats["saved_tokens"] = max(full - stats["sent_tokens"], 0)
+    stats["saved_pct"] = round(100 * stats["saved_tokens"] / full, 1) if full else 0.0
+    return stats
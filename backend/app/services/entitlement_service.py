@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
 
 from app.models.usage_tracking import UsageTracking
 from app.models.user import User
@@ -132,6 +133,55 @@ def check_entitlement(db: Session, user: User, feature: str) -> dict:
     }
 
 
+def entitled_user_ids(db: Session, user_ids: list[int], feature: str) -> list[int]:
+    """The users in ``user_ids`` allowed to use a feature, checked together in two queries."""
+    period_start, _ = _get_current_period(feature)
+    users = {
+        u.id: u
+        for u in db.query(User).options(joinedload(User.subscription)).filter(User.id.in_(user_ids))
+    }
+    usage = dict(
+        db.query(UsageTracking.user_id, UsageTracking.count).filter(
+            UsageTracking.user_id.in_(user_ids),
+            UsageTracking.feature == feature,
+            UsageTracking.period_start == period_start,
+        )
+    )
+
+    allowed = []
+    for user_id in user_ids:
+        user = users.get(user_id)
+        if user is None:
+            continue
+        limits = PRO_LIMITS if _has_active_subscription(user) else FREE_LIMITS
+        limit = limits.get(feature, 0)
+        if limit == -1 or usage.get(user_id, 0) < limit:
+            allowed.append(user_id)
+    return allowed
+
+
+def record_usage(db: Session, user_ids: list[int], feature: str) -> None:
+    """Increment usage for each of ``user_ids`` with set-based statements. The caller commits."""
+    if not user_ids:
+        return
+    period_start, period_end = _get_current_period(feature)
+    current = db.query(UsageTracking).filter(
+        UsageTracking.user_id.in_(user_ids),
+        UsageTracking.feature == feature,
+        UsageTracking.period_start == period_start,
+    )
+    existing = {user_id for (user_id,) in current.with_entities(UsageTracking.user_id)}
+    if existing:
+        current.update({UsageTracking.count: UsageTracking.count + 1}, synchronize_session=False)
+    new = [
+        {"user_id": user_id, "feature": feature, "count": 1, "period_start": period_start, "period_end": period_end}
+        for user_id in user_ids
+        if user_id not in existing
+    ]
+    if new:
+        db.execute(insert(UsageTracking), new)
+
+
 def get_all_usage(db: Session, user: User) -> dict:
     """Get usage summary for all features."""
     is_pro = _has_active_subscription(user)
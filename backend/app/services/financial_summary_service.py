@@ -0,0 +1,206 @@
+"""Compact per-user portfolio, budget and net-worth aggregates.
+
+Budget and net-worth totals and the user's consolidated portfolio positions
+are computed from their rows once and cached per user until a commit
+writes one of those rows (see write_invalidation). Portfolio market
+values are applied on read from the shared quote cache, so a summary only
+costs quote lookups, fetched in parallel.
+
+The cached dicts are shared; callers must not mutate them.
+"""
+
+import threading
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.net_worth_entry import NetWorthEntry
+from app.models.portfolio_holding import PortfolioHolding
+from app.models.recurring_transaction import RecurringTransaction
+from app.services import market_data_service, write_invalidation
+
+WATCHED_MODELS = (PortfolioHolding, RecurringTransaction, NetWorthEntry)
+
+FREQUENCY_MULTIPLIER = {
+    "weekly": 4.33,
+    "biweekly": 2.17,
+    "monthly": 1.0,
+    "yearly": 1.0 / 12.0,
+}
+PORTFOLIO_COLUMNS = [
+    "symbol", "shares", "avg_cost", "price", "market_value", "weight_pct", "gain_loss", "gain_loss_pct", "day_change_pct",
+]
+
+_cache: Dict[Tuple[int, str], Any] = {}
+_generations: Dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def _cached(db: Session, user_id: int, kind: str, build) -> Any:
+    key = (user_id, kind)
+    value = _cache.get(key)
+    if value is not None:
+        return value
+
+    with _lock:
+        generation = _generations.get(user_id, 0)
+    value = build(db, user_id)
+    with _lock:
+        # Don't cache a read that raced a write
+        if _generations.get(user_id, 0) == generation:
+            _cache[key] = value
+    return value
+
+
+# ── Budget ──
+
+def _build_budget(db: Session, user_id: int) -> Dict[str, Any]:
+    txns = (
+        db.query(RecurringTransaction)
+        .filter(RecurringTransaction.user_id == user_id, RecurringTransaction.is_active == True)
+        .all()
+    )
+
+    monthly_income = 0.0
+    monthly_expenses = 0.0
+    by_category: Dict[str, float] = {}
+
+    for t in txns:
+        monthly_amount = t.amount * FREQUENCY_MULTIPLIER.get(t.frequency, 1.0)
+        if t.type == "income":
+            monthly_income += monthly_amount
+        else:
+            monthly_expenses += monthly_amount
+            by_category[t.category] = by_category.get(t.category, 0) + monthly_amount
+
+    savings_rate = ((monthly_income - monthly_expenses) / monthly_income * 100) if monthly_income > 0 else 0
+
+    return {
+        "monthly_income": round(monthly_income, 2),
+        "monthly_expenses": round(monthly_expenses, 2),
+        "net_savings": round(monthly_income - monthly_expenses, 2),
+        "savings_rate": round(savings_rate, 1),
+        "by_category": {k: round(v, 2) for k, v in sorted(by_category.items(), key=lambda x: -x[1])},
+        "total_transactions": len(txns),
+    }
+
+
+def budget_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """Monthly income, expenses, savings rate and spending by category."""
+    return _cached(db, user_id, "budget", _build_budget)
+
+
+# ── Net worth ──
+
+def _build_net_worth(db: Session, user_id: int) -> Dict[str, Any]:
+    entries = db.query(NetWorthEntry).filter(NetWorthEntry.user_id == user_id).all()
+
+    total_assets = 0.0
+    total_liabilities = 0.0
+    asset_breakdown: Dict[str, float] = {}
+    liability_breakdown: Dict[str, float] = {}
+
+    for e in entries:
+        if e.entry_type == "asset":
+            total_assets += e.amount
+            asset_breakdown[e.category] = asset_breakdown.get(e.category, 0) + e.amount
+        else:
+            total_liabilities += e.amount
+            liability_breakdown[e.category] = liability_breakdown.get(e.category, 0) + e.amount
+
+    return {
+        "total_assets": round(total_assets, 2),
+        "total_liabilities": round(total_liabilities, 2),
+        "net_worth": round(total_assets - total_liabilities, 2),
+        "asset_breakdown": asset_breakdown,
+        "liability_breakdown": liability_breakdown,
+    }
+
+
+def net_worth_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """Total assets, liabilities, net worth and breakdown by category."""
+    return _cached(db, user_id, "net_worth", _build_net_worth)
+
+
+# ── Portfolio ──
+
+def _build_positions(db: Session, user_id: int) -> List[Tuple[str, float, float]]:
+    """(symbol, shares, cost basis) per symbol, with lots of the same symbol combined."""
+    positions: Dict[str, List[float]] = {}
+    for h in db.query(PortfolioHolding).filter(PortfolioHolding.user_id == user_id).all():
+        position = positions.setdefault(h.symbol.upper(), [0.0, 0.0])
+        position[0] += h.shares
+        position[1] += h.shares * h.avg_cost
+    return [(symbol, shares, cost) for symbol, (shares, cost) in sorted(positions.items())]
+
+
+def portfolio_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """Totals plus one row per position at current prices, largest first."""
+    positions = _cached(db, user_id, "positions", _build_positions)
+    market_data_service.prefetch_info([symbol for symbol, _, _ in positions])
+
+    quotes: Dict[str, Dict[str, Any]] = {}
+    unpriced: List[str] = []
+    for symbol, _, _ in positions:
+        try:
+            quotes[symbol] = market_data_service.get_stock_quote(symbol)
+        except Exception:
+            quotes[symbol] = {}
+        if quotes[symbol].get("price") is None:
+            unpriced.append(symbol)
+
+    total_value = sum(shares * (quotes[symbol].get("price") or 0) for symbol, shares, _ in positions)
+    total_cost = sum(cost for _, _, cost in positions)
+    priced_cost = sum(cost for symbol, _, cost in positions if symbol not in unpriced)
+
+    rows = []
+    for symbol, shares, cost in positions:
+        price = quotes[symbol].get("price")
+        market_value = shares * price if price is not None else None
+        gain_loss = market_value - cost if market_value is not None else None
+        rows.append([
+            symbol,
+            round(shares, 4),
+            round(cost / shares, 2) if shares else None,
+            price,
+            round(market_value, 2) if market_value is not None else None,
+            round(market_value / total_value * 100, 1) if market_value is not None and total_value else None,
+            round(gain_loss, 2) if gain_loss is not None else None,
+            round(gain_loss / cost * 100, 2) if gain_loss is not None and cost > 0 else None,
+            quotes[symbol].get("change_percent"),
+        ])
+    rows.sort(key=lambda row: row[4] or 0, reverse=True)
+
+    total_gain = total_value - priced_cost
+    result: Dict[str, Any] = {
+        "positions": len(rows),
+        "total_value": round(total_value, 2),
+        "total_cost": round(total_cost, 2),
+        "total_gain_loss": round(total_gain, 2),
+        "total_gain_loss_pct": round(total_gain / priced_cost * 100, 2) if priced_cost > 0 else 0,
+        "columns": PORTFOLIO_COLUMNS,
+        "rows": rows,
+    }
+    if unpriced:
+        result["unpriced"] = unpriced
+    return result
+
+
+def invalidate(user_id: int) -> None:
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        for key in [key for key in _cache if key[0] == user_id]:
+            del _cache[key]
+
+
+def clear() -> None:
+    with _lock:
+        for user_id, _ in _cache:
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+        _cache.clear()
+
+
+# ── Write-through invalidation ──
+
+write_invalidation.register(WATCHED_MODELS, invalidate)
+write_invalidation.register_cache(clear)
@@ -1,41 +1,33 @@
 import json
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
-import anthropic
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.models.conversation import Conversation
 from app.models.financial_plan import FinancialPlan
 from app.models.financial_profile import FinancialProfile
 from app.models.insight import Insight
 from app.models.user import User
 from app.models.user_memory import UserMemory
+from app.services import llm_gateway, market_snapshot
 
 logger = logging.getLogger(__name__)
 
+INSIGHT_MODEL = "claude-haiku-4-5-20251001"
+INSIGHT_MAX_TOKENS = 1500
+INSIGHT_REQUEST = "Generate financial insights for me based on my profile and current situation."
 
-def generate_insights(db: Session, user: User) -> List[Insight]:
-    """Generate AI-powered insights for a user based on their financial context."""
-    # Gather context
-    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
-    plans = (
-        db.query(FinancialPlan)
-        .filter(FinancialPlan.user_id == user.id, FinancialPlan.status == "active")
-        .all()
-    )
-    recent_conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == user.id)
-        .order_by(Conversation.updated_at.desc())
-        .limit(5)
-        .all()
-    )
-    memories = db.query(UserMemory).filter(UserMemory.user_id == user.id).all()
 
-    # Build context sections
+def build_insight_prompt(
+    profile: Optional[FinancialProfile],
+    plans: List[FinancialPlan],
+    recent_conversations: List[Conversation],
+    memories: List[UserMemory],
+    market_ctx: str,
+) -> str:
+    """System prompt for insight generation from already-loaded user data."""
     profile_ctx = "No financial profile set up yet."
     if profile:
         profile_ctx = json.dumps({
@@ -68,19 +60,7 @@ def generate_insights(db: Session, user: User) -> List[Insight]:
             for m in memories
         ])
 
-    # Get market snapshot
-    market_ctx = "Market data unavailable."
-    try:
-        from app.services.market_data_service import get_stock_quote
-        spy = get_stock_quote("SPY")
-        market_ctx = json.dumps({
-            "sp500_price": spy.get("price"),
-            "sp500_change_pct": spy.get("change_percent"),
-        })
-    except Exception:
-        pass
-
-    system_prompt = f"""You are a proactive AI financial advisor. Analyze the user's financial situation and generate 1-3 actionable insights.
+    return f"""You are a proactive AI financial advisor. Analyze the user's financial situation and generate 1-3 actionable insights.
 
 USER PROFILE:
 {profile_ctx}
@@ -112,16 +92,23 @@ Return a JSON array of 1-3 insights. Each insight must have:
 
 Return ONLY the JSON array, no other text."""
 
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=1500,
-        messages=[{"role": "user", "content": "Generate financial insights for me based on my profile and current situation."}],
-        system=system_prompt,
-    )
 
-    # Parse response
-    response_text = response.content[0].text.strip()
+def insight_request(system_prompt: str) -> dict:
+    """Messages API parameters for an insight prompt."""
+    return {
+        "model": INSIGHT_MODEL,
+        "max_tokens": INSIGHT_MAX_TOKENS,
+        "messages": [{"role": "user", "content": INSIGHT_REQUEST}],
+        "system": system_prompt,
+    }
+
+
+def build_insights(user_id: int, response_text: str, trigger: Optional[str] = None) -> List[Insight]:
+    """Unsaved Insight rows parsed from a model response; empty if it isn't valid JSON.
+
+    ``trigger``, when given, replaces the trigger the model reports.
+    """
+    response_text = response_text.strip()
     # Handle markdown code blocks
     if response_text.startswith("```"):
         response_text = response_text.split("\n", 1)[1]
@@ -134,10 +121,9 @@ Return ONLY the JSON array, no other text."""
         logger.error("Failed to parse Claude insight response: %s", response_text)
         return []
 
-    created_insights = []
-    for data in insights_data:
-        insight = Insight(
-            user_id=user.id,
+    return [
+        Insight(
+            user_id=user_id,
             type=data.get("type", "suggestion"),
             title=data.get("title", "Financial Insight"),
             body=data.get("body", ""),
@@ -146,12 +132,41 @@ Return ONLY the JSON array, no other text."""
             urgency=data.get("urgency", "medium"),
             impact=data.get("impact", "medium"),
             actions=json.dumps(data.get("actions", [])),
-            trigger=data.get("trigger", "profile_analysis"),
+            trigger=trigger or data.get("trigger", "profile_analysis"),
             status="pending",
         )
-        db.add(insight)
-        created_insights.append(insight)
+        for data in insights_data
+    ]
+
+
+def generate_insights(db: Session, user: User) -> List[Insight]:
+    """Generate AI-powered insights for a user based on their financial context."""
+    # Gather context
+    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user.id).first()
+    plans = (
+        db.query(FinancialPlan)
+        .filter(FinancialPlan.user_id == user.id, FinancialPlan.status == "active")
+        .all()
+    )
+    recent_conversations = (
+        db.query(Conversation)
+        .filter(Conversation.user_id == user.id)
+        .order_by(Conversation.updated_at.desc())
+        .limit(5)
+        .all()
+    )
+    memories = db.query(UserMemory).filter(UserMemory.user_id == user.id).all()
+
+    system_prompt = build_insight_prompt(profile, plans, recent_conversations, memories, market_snapshot.context())
+    response = llm_gateway.create(
+        feature="insights",
+        user_id=user.id,
+        priority=llm_gateway.BACKGROUND,
+        **insight_request(system_prompt),
+    )
 
+    created_insights = build_insights(user.id, response.content[0].text)
+    db.add_all(created_insights)
     db.commit()
     for i in created_insights:
         db.refresh(i)
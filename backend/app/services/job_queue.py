@@ -0,0 +1,189 @@
+"""In-process background job queue for work that shouldn't block a request.
+
+Unlike the event bus (fire-and-forget, one thread per handler), jobs run on a
+small fixed pool of worker threads, are retried with exponential backoff, and
+can be coalesced: enqueueing a job whose ``coalesce_key`` matches one that is
+still waiting updates the waiting job instead of adding another. Each enqueue
+returns a Future that resolves with the handler's result. A handler's
+``on_failure`` runs with the job's arguments once its retries are exhausted.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+BASE_RETRY_DELAY = 2.0  # seconds, doubled per attempt
+
+
+@dataclass
+class _Handler:
+    func: Callable[..., Any]
+    max_attempts: int
+    merge: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]]
+    on_failure: Optional[Callable[..., None]] = None
+
+
+@dataclass
+class _Job:
+    name: str
+    kwargs: Dict[str, Any]
+    coalesce_key: Optional[str] = None
+    attempts: int = 0
+    future: Future = field(default_factory=Future)
+
+
+_handlers: Dict[str, _Handler] = {}
+_pending: Dict[Tuple[str, str], _Job] = {}
+_queue: "queue.Queue[_Job]" = queue.Queue()
+_lock = threading.Lock()
+_workers: list = []
+
+
+def register(
+    name: str,
+    func: Callable[..., Any],
+    max_attempts: int = 3,
+    merge: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+    on_failure: Optional[Callable[..., None]] = None,
+) -> None:
+    """Register a job handler.
+
+    ``merge(waiting_kwargs, new_kwargs)`` combines a coalesced job's arguments;
+    without it the newest arguments replace the waiting ones. ``on_failure``
+    is called with the job's arguments after its last attempt fails.
+    """
+    _handlers[name] = _Handler(func=func, max_attempts=max_attempts, merge=merge, on_failure=on_failure)
+
+
+def enqueue(name: str, coalesce_key: Optional[str] = None, **kwargs: Any) -> Future:
+    """Queue a job and return a Future for its result."""
+    handler = _handlers[name]
+    with _lock:
+        _ensure_workers()
+        if coalesce_key is not None:
+            waiting = _pending.get((name, coalesce_key))
+            if waiting is not None:
+                waiting.kwargs = handler.merge(waiting.kwargs, kwargs) if handler.merge else kwargs
+                return waiting.future
+        job = _Job(name=name, kwargs=kwargs, coalesce_key=coalesce_key)
+        if coalesce_key is not None:
+            _pending[(name, coalesce_key)] = job
+    _queue.put(job)
+    return job.future
+
+
+def _ensure_workers() -> None:
+    while len(_workers) < WORKERS:
+        thread = threading.Thread(target=_work, name=f"job-worker-{len(_workers)}", daemon=True)
+        _workers.append(thread)
+        thread.start()
+
+
+def _work() -> None:
+    while True:
+        job = _queue.get()
+        with _lock:
+            # Once started, later enqueues with the same key form a new job
+            if job.coalesce_key is not None and _pending.get((job.name, job.coalesce_key)) is job:
+                del _pending[(job.name, job.coalesce_key)]
+        _run(job)
+
+
+def _run(job: _Job) -> None:
+    handler = _handlers[job.name]
+    job.attempts += 1
+    try:
+        result = handler.func(**job.kwargs)
+    except Exception as e:
+        if job.attempts < handler.max_attempts:
+            delay = BASE_RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning(f"Job '{job.name}' failed (attempt {job.attempts}), retrying in {delay:.0f}s")
+            timer = threading.Timer(delay, _queue.put, args=(job,))
+            timer.daemon = True
+            timer.start()
+        else:
+            logger.exception(f"Job '{job.name}' failed after {job.attempts} attempts")
+            if handler.on_failure:
+                try:
+                    handler.on_failure(**job.kwargs)
+                except Exception:
+                    logger.exception(f"on_failure for job '{job.name}' failed")
+            job.future.set_exception(e)
+        return
+    job.future.set_result(result)
+
+
+# ── Jobs ──
+
+def _extract_memory(user_id: int, exchanges: list) -> None:
+    from app.database import SessionLocal
+    from app.services.memory_service import extract_memory_from_exchanges
+
+    db = SessionLocal()
+    try:
+        extract_memory_from_exchanges(db, user_id, exchanges)
+    finally:
+        db.close()
+
+
+def _merge_exchanges(waiting: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    return {**new, "exchanges": waiting["exchanges"] + new["exchanges"]}
+
+
+def _summarize_conversation(user_id: int, conversation_id: int) -> None:
+    from app.database import SessionLocal
+    from app.services.memory_service import summarize_conversation
+
+    db = SessionLocal()
+    try:
+        summarize_conversation(db, user_id, conversation_id)
+    finally:
+        db.close()
+
+
+def _store_follow_ups(message_id: int, follow_ups: list) -> None:
+    import json
+
+    from app.database import SessionLocal
+    from app.models.conversation import Message
+
+    db = SessionLocal()
+    try:
+        message = db.query(Message).filter(Message.id == message_id).first()
+        if message:
+            message.follow_ups = json.dumps(follow_ups)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _generate_follow_ups(message_id: int, user_id: int, user_message: str, assistant_response: str) -> list:
+    from app.services.chat_service import _generate_follow_ups as generate
+
+    follow_ups = generate(user_message, assistant_response, user_id=user_id)
+    _store_follow_ups(message_id, follow_ups)
+    return follow_ups
+
+
+def _follow_ups_failed(message_id: int, **_: Any) -> None:
+    # An empty list is terminal, so clients polling the message stop waiting
+    _store_follow_ups(message_id, [])
+
+
+def _flush_llm_usage() -> int:
+    from app.services import llm_metrics
+
+    return llm_metrics.flush()
+
+
+# Register jobs
+register("memory.extract", _extract_memory, merge=_merge_exchanges)
+register("conversation.summarize", _summarize_conversation)
+register("chat.follow_ups", _generate_follow_ups, max_attempts=2, on_failure=_follow_ups_failed)
+register("llm_usage.flush", _flush_llm_usage, max_attempts=1)
@@ -0,0 +1,120 @@
+"""Run many independent model requests as one batch.
+
+With ``LLM_BATCH_BACKEND="api"`` requests go to the Message Batches API:
+they're all submitted up front in batches of up to MAX_BATCH_REQUESTS,
+polled together until every batch ends, and matched back to their requests
+by ``custom_id``. Batched
+calls bill at half price and usually finish well within the hour, which
+suits work nobody is waiting on. ``"local"`` is a stand-in that sends the
+same requests through llm_gateway at background priority on a small pool,
+for development and tests.
+
+Results are recorded in llm_metrics under ``<feature>_batch`` (API) or the
+plain feature (local), attributed to each request's user.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services import llm_gateway, llm_metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_REQUESTS = 10_000
+POLL_SECONDS = 30.0
+MAX_WAIT_SECONDS = 6 * 3600
+LOCAL_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+    custom_id: str
+    feature: str
+    user_id: Optional[int]
+    params: Dict[str, Any]  # Messages API parameters: model, max_tokens, system, messages
+
+
+def run(requests: List[BatchRequest]) -> Dict[str, Optional[str]]:
+    """Response text per ``custom_id``; None for requests that failed or didn't finish."""
+    if not requests:
+        return {}
+    if settings.LLM_BATCH_BACKEND == "local":
+        return _run_local(requests)
+    return _run_api(requests)
+
+
+def _run_local(requests: List[BatchRequest]) -> Dict[str, Optional[str]]:
+    def send(request: BatchRequest) -> Optional[str]:
+        try:
+            response = llm_gateway.create(
+                feature=request.feature,
+                priority=llm_gateway.BACKGROUND,
+                user_id=request.user_id,
+                **request.params,
+            )
+            return response.content[0].text
+        except Exception as e:
+            logger.warning(f"Batch request {request.custom_id} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=LOCAL_WORKERS, thread_name_prefix="llm-batch") as pool:
+        texts = list(pool.map(send, requests))
+    return {request.custom_id: text for request, text in zip(requests, texts)}
+
+
+def _run_api(requests: List[BatchRequest]) -> Dict[str, Optional[str]]:
+    client = llm_gateway.get_client()
+    started = time.monotonic()
+    running = []
+    for start in range(0, len(requests), MAX_BATCH_REQUESTS):
+        chunk = requests[start:start + MAX_BATCH_REQUESTS]
+        batch = client.messages.batches.create(
+            requests=[{"custom_id": r.custom_id, "params": r.params} for r in chunk],
+        )
+        logger.info(f"Submitted message batch {batch.id} with {len(chunk)} requests")
+        running.append(batch)
+
+    by_id = {r.custom_id: r for r in requests}
+    results: Dict[str, Optional[str]] = dict.fromkeys(by_id, None)
+    while True:
+        for batch in running:
+            if batch.processing_status == "ended":
+                _collect(client, batch, by_id, results, (time.monotonic() - started) * 1000)
+        running = [b for b in running if b.processing_status != "ended"]
+        if not running:
+            return results
+        if time.monotonic() - started > MAX_WAIT_SECONDS:
+            for batch in running:
+                logger.warning(f"Message batch {batch.id} still running after {MAX_WAIT_SECONDS}s; canceling")
+                client.messages.batches.cancel(batch.id)
+            return results
+        time.sleep(POLL_SECONDS)
+        running = [client.messages.batches.retrieve(b.id) for b in running]
+
+
+def _collect(
+    client, batch, by_id: Dict[str, BatchRequest], results: Dict[str, Optional[str]], elapsed_ms: float,
+) -> None:
+    for entry in client.messages.batches.results(batch.id):
+        request = by_id.get(entry.custom_id)
+        if request is None:
+            continue
+        model = request.params["model"]
+        if entry.result.type == "succeeded":
+            message = entry.result.message
+            results[entry.custom_id] = message.content[0].text if message.content else ""
+            llm_metrics.record(f"{request.feature}_batch", model, elapsed_ms, usage=message.usage,
+                               user_id=request.user_id, batch=True)
+        else:
+            llm_metrics.record(f"{request.feature}_batch", model, elapsed_ms, user_id=request.user_id,
+                               error=entry.result.type, batch=True)
+
+    counts = batch.request_counts
+    logger.info(
+        f"Message batch {batch.id} ended in {elapsed_ms / 1000:.0f}s: "
+        f"{counts.succeeded} succeeded, {counts.errored} errored, {counts.expired} expired"
+    )
@@ -0,0 +1,114 @@
+"""Content-addressed cache for deterministic analysis calls.
+
+The budget insights, spending coach and portfolio review endpoints ask the
+model for a write-up of data that rarely changes between page loads. Their
+responses are cached under a SHA-256 of the exact inputs the prompt was
+built from (normalized transactions, budget limits, goals, holdings) plus
+the model and token budget, so a repeat view with unchanged data returns
+the stored text without a model call. Entries expire after a per-feature
+TTL. A commit that writes one of the rows a feature reads drops that
+user's entries for the feature (see write_invalidation), so stale entries
+are freed right away instead of waiting out their TTL.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from app.models.expense_category import ExpenseCategory
+from app.models.portfolio_holding import PortfolioHolding
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.savings_goal import SavingsGoal
+from app.services import llm_gateway, write_invalidation
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 5000
+TTL_SECONDS = {
+    "budget_insights": 24 * 3600,
+    "spending_coach": 24 * 3600,
+    # Keyed on holdings, not prices, so bound how far prices can drift
+    "portfolio_review": 3600,
+}
+DEFAULT_TTL_SECONDS = 3600
+# Rows each feature's inputs come from; a write to one invalidates the feature
+SOURCES = {
+    RecurringTransaction: ("budget_insights", "spending_coach"),
+    ExpenseCategory: ("spending_coach",),
+    SavingsGoal: ("spending_coach",),
+    PortfolioHolding: ("portfolio_review",),
+}
+
+# (user_id, feature, digest) -> (expires_at, text)
+_cache: "OrderedDict[Tuple[int, str, str], Tuple[float, str]]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_lock = threading.Lock()
+
+
+def digest(feature: str, inputs: Any, model: str, max_tokens: int) -> str:
+    payload = json.dumps([feature, model, max_tokens, inputs], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def create_text(feature: str, user_id: int, inputs: Any, **kwargs: Any) -> str:
+    """Text of ``llm_gateway.create(feature=..., user_id=..., **kwargs)``, cached by ``inputs``.
+
+    ``inputs`` must capture everything the prompt depends on; identical
+    inputs return the cached text. Errors propagate and aren't cached.
+    """
+    key = (user_id, feature, digest(feature, inputs, kwargs["model"], kwargs.get("max_tokens", 0)))
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] > now:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return hit[1]
+        _stats["misses"] += 1
+
+    response = llm_gateway.create(feature=feature, user_id=user_id, **kwargs)
+    text = response.content[0].text
+
+    with _lock:
+        _cache[key] = (time.monotonic() + TTL_SECONDS.get(feature, DEFAULT_TTL_SECONDS), text)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return text
+
+
+def invalidate(user_id: int, feature: str) -> None:
+    with _lock:
+        stale = [key for key in _cache if key[0] == user_id and key[1] == feature]
+        for key in stale:
+            del _cache[key]
+        _stats["invalidations"] += len(stale)
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def get_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = {**_stats, "entries": len(_cache)}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
+
+
+# ── Write-through invalidation ──
+
+def _invalidate_sources(written: Tuple[int, type]) -> None:
+    user_id, model = written
+    for feature in SOURCES[model]:
+        invalidate(user_id, feature)
+
+
+write_invalidation.register(SOURCES, _invalidate_sources, collect=lambda target, deleted: (target.user_id, type(target)))
+write_invalidation.register_cache(clear)
@@ -0,0 +1,212 @@
+"""Single entry point for Anthropic API calls.
+
+All model calls share one client (and so one keep-alive connection pool)
+and pass through a global and a per-model concurrency limit. Slots are
+handed out by priority: interactive requests (chat, anything a user is
+waiting on) go ahead of queued background work, and background work can
+never take the last quarter of the slots. Rate-limit (429), overload
+(529) and transient server/connection errors are retried with exponential
+backoff and jitter, honoring ``retry-after``; the slot is released while
+waiting. Each call is recorded in llm_metrics under its feature name.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import anthropic
+import httpx
+
+from app.config import settings
+from app.services import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+BASE_BACKOFF = 1.0  # seconds, doubled per attempt
+MAX_BACKOFF = 30.0
+
+
+class _PrioritySemaphore:
+    """Counting semaphore that wakes interactive waiters before background ones."""
+
+    def __init__(self, limit: int, reserved: int):
+        self.limit = limit
+        self.background_limit = max(limit - reserved, 1)
+        self.in_use = 0
+        self.waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._cond = threading.Condition()
+
+    def _available(self, priority: int) -> bool:
+        if priority == BACKGROUND:
+            return self.waiting[INTERACTIVE] == 0 and self.in_use < self.background_limit
+        return self.in_use < self.limit
+
+    def acquire(self, priority: int) -> None:
+        with self._cond:
+            self.waiting[priority] += 1
+            try:
+                while not self._available(priority):
+                    self._cond.wait()
+            finally:
+                self.waiting[priority] -= 1
+            self.in_use += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+
+_client: Optional[anthropic.Anthropic] = None
+_client_lock = threading.Lock()
+_global_slots = _PrioritySemaphore(settings.LLM_MAX_CONCURRENCY, reserved=max(settings.LLM_MAX_CONCURRENCY // 4, 1))
+_model_slots: Dict[str, _PrioritySemaphore] = {}
+
+
+def get_client() -> anthropic.Anthropic:
+    """The shared client. Retries are handled here, not by the SDK."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = anthropic.Anthropic(
+                    api_key=settings.ANTHROPIC_API_KEY,
+                    base_url=settings.ANTHROPIC_BASE_URL,
+                    max_retries=0,
+                    http_client=anthropic.DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=settings.LLM_MAX_CONCURRENCY,
+                            max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+                        ),
+                    ),
+                )
+    return _client
+
+
+def _slots_for(model: str) -> _PrioritySemaphore:
+    with _client_lock:
+        slots = _model_slots.get(model)
+        if slots is None:
+            limit = settings.LLM_MAX_CONCURRENCY_PER_MODEL
+            slots = _model_slots[model] = _PrioritySemaphore(limit, reserved=max(limit // 4, 1))
+    return slots
+
+
+@contextmanager
+def _slot(model: str, priority: int) -> Iterator[None]:
+    # Model slot first: requests queued behind a saturated model mustn't hold
+    # global slots that calls to other models could use
+    model_slots = _slots_for(model)
+    model_slots.acquire(priority)
+    try:
+        _global_slots.acquire(priority)
+        try:
+            yield
+        finally:
+            _global_slots.release()
+    finally:
+        model_slots.release()
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying, or None if the error isn't retryable."""
+    if isinstance(error, anthropic.APIStatusError):
+        if error.status_code not in RETRYABLE_STATUS:
+            return None
+        retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF)
+            except ValueError:
+                pass
+    elif not isinstance(error, anthropic.APIConnectionError):
+        return None
+    delay = min(BASE_BACKOFF * 2 ** attempt, MAX_BACKOFF)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _call(model: str, priority: int, send, feature: str, user_id: Optional[int]):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            with _slot(model, priority):
+                response = send()
+        except anthropic.APIError as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= settings.LLM_MAX_RETRIES:
+                llm_metrics.record(feature, model, _elapsed_ms(started), user_id=user_id,
+                                   retries=attempt, error=type(e).__name__)
+                raise
+            attempt += 1
+            logger.warning(f"LLM call to {model} failed ({type(e).__name__}), retry {attempt} in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            llm_metrics.record(feature, model, _elapsed_ms(started), usage=getattr(response, "usage", None),
+                               user_id=user_id, retries=attempt)
+            return response
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.monotonic() - started) * 1000
+
+
+def create(feature: str, priority: int = INTERACTIVE, user_id: Optional[int] = None, **kwargs: Any):
+    """client.messages.create through the gateway.
+
+    ``feature`` names the call site for metrics; ``user_id`` attributes the
+    call in the per-user rollup.
+    """
+    return _call(kwargs["model"], priority, lambda: get_client().messages.create(**kwargs), feature, user_id)
+
+
+@contextmanager
+def stream(feature: str, priority: int = INTERACTIVE, user_id: Optional[int] = None, **kwargs: Any):
+    """client.messages.stream through the gateway.
+
+    Only opening the stream is retried; the slot is held until it closes.
+    """
+    model = kwargs["model"]
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        with _slot(model, priority):
+            manager = get_client().messages.stream(**kwargs)
+            try:
+                message_stream = manager.__enter__()
+            except anthropic.APIError as e:
+                delay = _retry_delay(e, attempt)
+                if delay is None or attempt >= settings.LLM_MAX_RETRIES:
+                    llm_metrics.record(feature, model, _elapsed_ms(started), user_id=user_id,
+                                       retries=attempt, error=type(e).__name__)
+                    raise
+            else:
+                error = None
+                try:
+                    yield message_stream
+                except BaseException as e:
+                    error = type(e).__name__
+                    if not manager.__exit__(type(e), e, e.__traceback__):
+                        raise
+                else:
+                    manager.__exit__(None, None, None)
+                finally:
+                    usage = None
+                    if error is None:
+                        try:
+                            usage = message_stream.get_final_message().usage
+                        except Exception:
+                            pass
+                    llm_metrics.record(feature, model, _elapsed_ms(started), usage=usage,
+                                       user_id=user_id, retries=attempt, error=error)
+                return
+        attempt += 1
+        logger.warning(f"LLM stream to {model} failed to open, retry {attempt} in {delay:.1f}s")
+        time.sleep(delay)
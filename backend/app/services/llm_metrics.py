@@ -0,0 +1,190 @@
+"""Per-call instrumentation for model calls made through llm_gateway.
+
+Every call records its feature (call site), model, token counts including
+prompt-cache reads and writes, latency, retries and error type. Recent
+latencies are kept per feature in memory for p50/p95; counters and an
+estimated cost accumulate per (user, day, feature, model) and are flushed
+to the llm_usage rollup table in the background, at most once every
+FLUSH_INTERVAL_SECONDS, and on shutdown. Flushes add to the stored counters
+in SQL (``SET calls = calls + :n``), so flushes from several workers don't
+overwrite each other. Days are UTC.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import date, datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 1000  # per feature
+FLUSH_INTERVAL_SECONDS = 30
+
+# USD per million tokens: (input, output). Cache reads bill at 10% of input,
+# cache writes at 125%; Message Batches API requests bill at 50% overall.
+PRICING: Dict[str, Tuple[float, float]] = {
+    "claude-sonnet-4-20250514": (3.0, 15.0),
+    "claude-haiku-4-5-20251001": (1.0, 5.0),
+}
+DEFAULT_PRICING = (3.0, 15.0)
+CACHE_READ_MULTIPLIER = 0.1
+CACHE_WRITE_MULTIPLIER = 1.25
+BATCH_MULTIPLIER = 0.5
+
+COUNTERS = ("calls", "errors", "retries", "input_tokens", "output_tokens",
+            "cache_read_tokens", "cache_creation_tokens", "latency_ms", "cost_usd")
+
+_lock = threading.Lock()
+_latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+_totals: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+_pending: Dict[Tuple[Optional[int], date, str, str], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+_last_flush = time.monotonic()
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int,
+                  cache_read_tokens: int = 0, cache_creation_tokens: int = 0, batch: bool = False) -> float:
+    input_price, output_price = PRICING.get(model, DEFAULT_PRICING)
+    billed_input = (input_tokens + cache_read_tokens * CACHE_READ_MULTIPLIER
+                    + cache_creation_tokens * CACHE_WRITE_MULTIPLIER)
+    cost = (billed_input * input_price + output_tokens * output_price) / 1_000_000
+    return cost * BATCH_MULTIPLIER if batch else cost
+
+
+def record(
+    feature: str,
+    model: str,
+    latency_ms: float,
+    usage: Any = None,
+    user_id: Optional[int] = None,
+    retries: int = 0,
+    error: Optional[str] = None,
+    batch: bool = False,
+) -> None:
+    """Record one model call. ``usage`` is the response's Usage, if it finished."""
+    tokens = {
+        "input_tokens": getattr(usage, "input_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+    values = {
+        "calls": 1,
+        "errors": 1 if error else 0,
+        "retries": retries,
+        "latency_ms": latency_ms,
+        "cost_usd": estimate_cost(model, **tokens, batch=batch),
+        **tokens,
+    }
+    with _lock:
+        _latencies[feature].append(latency_ms)
+        for bucket in (_totals[(feature, model)], _pending[(user_id, datetime.utcnow().date(), feature, model)]):
+            for key, value in values.items():
+                bucket[key] += value
+        flush_due = time.monotonic() - _last_flush >= FLUSH_INTERVAL_SECONDS
+
+    if error:
+        logger.warning(f"LLM call {feature} ({model}) failed after {latency_ms:.0f}ms: {error}")
+    if flush_due:
+        _schedule_flush()
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[round(q * (len(ordered) - 1))], 1)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Per-feature call counts, tokens, cost and p50/p95 latency since process start."""
+    with _lock:
+        latencies = {feature: list(samples) for feature, samples in _latencies.items()}
+        totals = {key: dict(values) for key, values in _totals.items()}
+
+    features: Dict[str, Dict[str, Any]] = {}
+    for (feature, model), values in totals.items():
+        entry = features.setdefault(feature, {**dict.fromkeys(COUNTERS, 0), "models": []})
+        entry["models"].append(model)
+        for key in COUNTERS:
+            entry[key] += values[key]
+    for feature, entry in features.items():
+        samples = latencies.get(feature, [])
+        entry["p50_latency_ms"] = percentile(samples, 0.5)
+        entry["p95_latency_ms"] = percentile(samples, 0.95)
+        entry["mean_latency_ms"] = round(entry.pop("latency_ms") / entry["calls"], 1) if entry["calls"] else 0.0
+        entry["cost_usd"] = round(entry["cost_usd"], 4)
+    return features
+
+
+def prompt_cache(feature: str) -> Dict[str, Any]:
+    """A feature's prompt-cache reads and writes since process start."""
+    entry = snapshot().get(feature, {})
+    stats = {key: entry.get(key, 0) for key in ("calls", "input_tokens", "cache_read_tokens", "cache_creation_tokens")}
+    total = stats["input_tokens"] + stats["cache_read_tokens"] + stats["cache_creation_tokens"]
+    stats["cache_hit_pct"] = round(100 * stats["cache_read_tokens"] / total, 1) if total else 0.0
+    return stats
+
+
+def pending() -> Dict[Tuple[Optional[int], date, str, str], Dict[str, float]]:
+    """Counters recorded since the last flush, by (user_id, day, feature, model)."""
+    with _lock:
+        return {key: dict(values) for key, values in _pending.items()}
+
+
+def _schedule_flush() -> None:
+    from app.services import job_queue
+
+    job_queue.enqueue("llm_usage.flush", coalesce_key="llm_usage")
+
+
+def flush(db: Optional[Session] = None) -> int:
+    """Add pending counters to the llm_usage table. Returns rows touched."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    from app.database import SessionLocal
+    from app.models.llm_usage import LLMUsage
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        for (user_id, day, feature, model), values in pending.items():
+            rows = db.query(LLMUsage).filter(
+                LLMUsage.user_id.is_(None) if user_id is None else LLMUsage.user_id == user_id,
+                LLMUsage.day == day,
+                LLMUsage.feature == feature,
+                LLMUsage.model == model,
+            )
+            increments = {getattr(LLMUsage, key): getattr(LLMUsage, key) + value for key, value in values.items()}
+            if rows.update(increments, synchronize_session=False):
+                continue
+            try:
+                with db.begin_nested():
+                    db.add(LLMUsage(user_id=user_id, day=day, feature=feature, model=model, **values))
+            except IntegrityError:
+                # Another worker created the row since the update
+                rows.update(increments, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Failed to flush LLM usage")
+        # Put the counts back so the next flush retries them
+        with _lock:
+            for key, values in pending.items():
+                for counter, value in values.items():
+                    _pending[key][counter] += value
+        return 0
+    finally:
+        if own_session:
+            db.close()
+    return len(pending)
@@ -1,27 +1,69 @@
+import threading
 import time
-from typing import Any, Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
 
 import yfinance as yf
 
 # Simple in-memory cache to avoid rate limits
 _cache: Dict[str, Dict[str, Any]] = {}
 _cache_ttl = 60  # seconds
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market-fetch")
 
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dt_time(9, 30)
+MARKET_CLOSE = dt_time(16, 0)
 
-def _get_info(symbol: str) -> Dict[str, Any]:
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """Whether US equity markets are in regular trading hours (holidays not accounted for)."""
+    now = now.astimezone(MARKET_TZ) if now else datetime.now(MARKET_TZ)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def _get_info(symbol: str, max_age: Optional[float] = None) -> Dict[str, Any]:
     key = f"info:{symbol.upper()}"
     now = time.time()
-    if key in _cache and now - _cache[key]["_ts"] < _cache_ttl:
+    ttl = _cache_ttl if max_age is None else max_age
+    if key in _cache and now - _cache[key]["_ts"] < ttl:
         return _cache[key]
-    ticker = yf.Ticker(symbol)
-    info = ticker.info
-    info["_ts"] = now
-    _cache[key] = info
-    return info
 
+    # Single flight: concurrent misses for a symbol share one fetch
+    with _inflight_lock:
+        pending = _inflight.get(key)
+        owner = pending is None
+        if owner:
+            pending = _inflight[key] = Future()
+    if not owner:
+        return pending.result()
+
+    try:
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        info["_ts"] = now
+        _cache[key] = info
+        pending.set_result(info)
+        return info
+    except Exception as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
 
-def get_stock_quote(symbol: str) -> Dict[str, Any]:
-    info = _get_info(symbol)
+
+def prefetch_info(symbols: List[str]) -> List[Future]:
+    """Warm the quote/company-info cache for ``symbols`` in the background."""
+    return [_fetch_pool.submit(_get_info, symbol) for symbol in symbols]
+
+
+def _quote_from_info(symbol: str, info: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "symbol": symbol.upper(),
         "name": info.get("shortName", "N/A"),
@@ -37,6 +79,10 @@ def get_stock_quote(symbol: str) -> Dict[str, Any]:
     }
 
 
+def get_stock_quote(symbol: str, max_age: Optional[float] = None) -> Dict[str, Any]:
+    return _quote_from_info(symbol, _get_info(symbol, max_age))
+
+
 def get_price_history(symbol: str, period: str = "1mo", interval: str = "1d") -> Dict[str, Any]:
     ticker = yf.Ticker(symbol)
     hist = ticker.history(period=period, interval=interval)
@@ -60,8 +106,7 @@ def get_price_history(symbol: str, period: str = "1mo", interval: str = "1d") ->
     }
 
 
-def get_company_info(symbol: str) -> Dict[str, Any]:
-    info = _get_info(symbol)
+def _company_from_info(symbol: str, info: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "symbol": symbol.upper(),
         "name": info.get("shortName", "N/A"),
@@ -79,6 +124,118 @@ def get_company_info(symbol: str) -> Dict[str, Any]:
     }
 
 
+def get_company_info(symbol: str) -> Dict[str, Any]:
+    return _company_from_info(symbol, _get_info(symbol))
+
+
+# ── Batched lookups (for multi-symbol tools) ──
+
+MAX_BATCH_SYMBOLS = 10
+COMPANY_TABLE_FIELDS = [
+    "name", "sector", "industry", "market_cap", "pe_ratio", "forward_pe", "eps",
+    "dividend_yield", "beta", "fifty_two_week_high", "fifty_two_week_low",
+]
+QUOTE_TABLE_FIELDS = ["name", "price", "change", "change_percent", "volume", "market_cap", "day_high", "day_low"]
+HISTORY_SAMPLE_POINTS = 12
+
+
+def _normalize_symbols(symbols: List[str]) -> List[str]:
+    seen: List[str] = []
+    for symbol in symbols:
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in seen:
+            seen.append(symbol)
+    if len(seen) > MAX_BATCH_SYMBOLS:
+        raise ValueError(f"At most {MAX_BATCH_SYMBOLS} symbols per request")
+    return seen
+
+
+def get_infos(symbols: List[str]) -> Dict[str, Any]:
+    """Fetch info for several symbols in parallel. Failed symbols map to their exception."""
+    futures = {symbol: _fetch_pool.submit(_get_info, symbol) for symbol in symbols}
+    results: Dict[str, Any] = {}
+    for symbol, future in futures.items():
+        try:
+            results[symbol] = future.result()
+        except Exception as e:
+            results[symbol] = e
+    return results
+
+
+def _table(symbols: List[str], fields: List[str], infos: Dict[str, Any], build) -> Dict[str, Any]:
+    """Column-oriented result: one header row, one row per symbol, errors listed separately."""
+    rows = []
+    errors = {}
+    for symbol in symbols:
+        info = infos[symbol]
+        if isinstance(info, Exception):
+            errors[symbol] = str(info)
+            continue
+        record = build(symbol, info)
+        rows.append([symbol] + [record.get(field) for field in fields])
+    result: Dict[str, Any] = {"columns": ["symbol"] + fields, "rows": rows}
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+def get_stock_quotes(symbols: List[str]) -> Dict[str, Any]:
+    symbols = _normalize_symbols(symbols)
+    return _table(symbols, QUOTE_TABLE_FIELDS, get_infos(symbols), _quote_from_info)
+
+
+def get_company_infos(symbols: List[str]) -> Dict[str, Any]:
+    symbols = _normalize_symbols(symbols)
+    return _table(symbols, COMPANY_TABLE_FIELDS, get_infos(symbols), _company_from_info)
+
+
+def get_price_histories(symbols: List[str], period: str = "1mo", interval: str = "1d") -> Dict[str, Any]:
+    """Summary stats and a downsampled close series per symbol, from one batched download."""
+    symbols = _normalize_symbols(symbols)
+    frame = yf.download(
+        symbols, period=period, interval=interval, group_by="ticker",
+        progress=False, threads=True, auto_adjust=True,
+    )
+    rows = []
+    closes: Dict[str, List[float]] = {}
+    errors = {}
+    for symbol in symbols:
+        try:
+            hist = frame[symbol].dropna(subset=["Close"]) if frame is not None and not frame.empty else None
+        except KeyError:
+            hist = None
+        if hist is None or hist.empty:
+            errors[symbol] = "No price data"
+            continue
+        close = hist["Close"]
+        first, last = float(close.iloc[0]), float(close.iloc[-1])
+        rows.append([
+            symbol,
+            hist.index[0].strftime("%Y-%m-%d"),
+            hist.index[-1].strftime("%Y-%m-%d"),
+            round(first, 2),
+            round(last, 2),
+            round((last / first - 1) * 100, 2) if first else None,
+            round(float(hist["High"].max()), 2),
+            round(float(hist["Low"].min()), 2),
+            int(hist["Volume"].mean()) if "Volume" in hist else None,
+        ])
+        step = max(1, -(-len(close) // HISTORY_SAMPLE_POINTS))
+        sampled = close.iloc[::-1][::step][::-1]
+        closes[symbol] = [round(float(v), 2) for v in sampled]
+
+    result: Dict[str, Any] = {
+        "period": period,
+        "interval": interval,
+        "columns": ["symbol", "start", "end", "start_close", "end_close", "change_pct", "high", "low", "avg_volume"],
+        "rows": rows,
+        "closes": closes,
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
 SECTOR_ETFS = {
     "Technology": "XLK",
     "Healthcare": "XLV",
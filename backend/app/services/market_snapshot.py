@@ -0,0 +1,149 @@
+"""Market context shared by every LLM prompt builder.
+
+Insight generation and daily/weekly briefings all want the same picture of
+the market, so it is built once per MARKET_SNAPSHOT_TTL_SECONDS rather
+than once per user: major indices, sector ETFs and the biggest movers in a
+fixed universe of large caps, fetched together in one batched lookup and
+serialized once. A nightly run over thousands of users makes one market
+fetch; concurrent callers during a rebuild wait for it instead of fetching
+themselves.
+
+``context()`` returns the pre-serialized block to drop into a prompt.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services import write_invalidation
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE = "Market data unavailable."
+RETRY_SECONDS = 60  # how long an unavailable snapshot is kept before trying again
+TOP_MOVERS = 3
+
+INDEX_ETFS = {
+    "S&P 500": "SPY",
+    "Nasdaq 100": "QQQ",
+    "Dow Jones": "DIA",
+    "Russell 2000": "IWM",
+}
+MOVER_UNIVERSE = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "BRK-B",
+    "JPM", "V", "UNH", "XOM", "JNJ", "WMT", "PG", "AVGO",
+]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    data: Optional[Dict[str, Any]]  # None when the market fetch failed
+    block: str
+    built_at: float
+
+
+_snapshot: Optional[Snapshot] = None
+_build_lock = threading.Lock()
+
+
+def _change(quote: Dict[str, Any]) -> Optional[float]:
+    value = quote.get("change_percent")
+    return round(value, 2) if isinstance(value, (int, float)) else None
+
+
+def _build() -> Snapshot:
+    from app.services.market_data_service import SECTOR_ETFS, get_infos, get_stock_quote
+
+    symbols = list(INDEX_ETFS.values()) + list(SECTOR_ETFS.values()) + MOVER_UNIVERSE
+    # One parallel fetch; the quotes below are then served from the info cache
+    infos = get_infos(symbols)
+    quotes = {
+        symbol: get_stock_quote(symbol)
+        for symbol, info in infos.items()
+        if not isinstance(info, Exception)
+    }
+    spy = quotes.get("SPY")
+    if not spy or spy.get("price") is None:
+        logger.warning("Market snapshot unavailable: no S&P 500 quote")
+        return Snapshot(data=None, block=UNAVAILABLE, built_at=time.time())
+
+    indices = [
+        {"name": name, "symbol": symbol, "price": quotes[symbol]["price"], "change_pct": _change(quotes[symbol])}
+        for name, symbol in INDEX_ETFS.items()
+        if symbol in quotes
+    ]
+    sectors = sorted(
+        (
+            {"sector": name, "etf": symbol, "change_pct": _change(quotes[symbol])}
+            for name, symbol in SECTOR_ETFS.items()
+            if symbol in quotes and _change(quotes[symbol]) is not None
+        ),
+        key=lambda s: s["change_pct"],
+        reverse=True,
+    )
+    movers: List[Dict[str, Any]] = sorted(
+        (
+            {"symbol": symbol, "name": quotes[symbol]["name"], "change_pct": _change(quotes[symbol])}
+            for symbol in MOVER_UNIVERSE
+            if symbol in quotes and _change(quotes[symbol]) is not None
+        ),
+        key=lambda m: m["change_pct"],
+        reverse=True,
+    )
+
+    data = {
+        "as_of": datetime.utcnow().isoformat(timespec="minutes"),
+        # Kept at the top level for the briefing API's "market" field
+        "sp500_price": spy["price"],
+        "sp500_change_pct": spy.get("change_percent"),
+        "indices": indices,
+        "sectors": sectors,
+        "top_gainers": movers[:TOP_MOVERS],
+        "top_losers": movers[::-1][:TOP_MOVERS],
+    }
+    return Snapshot(data=data, block=json.dumps(data), built_at=time.time())
+
+
+def _fresh(snapshot: Optional[Snapshot]) -> bool:
+    if snapshot is None:
+        return False
+    ttl = settings.MARKET_SNAPSHOT_TTL_SECONDS if snapshot.data is not None else RETRY_SECONDS
+    return time.time() - snapshot.built_at < ttl
+
+
+def get_snapshot() -> Snapshot:
+    """The current snapshot, rebuilding it if it has expired."""
+    global _snapshot
+    snapshot = _snapshot
+    if _fresh(snapshot):
+        return snapshot
+
+    # Single flight: one rebuild, everyone else waits for it
+    with _build_lock:
+        if _fresh(_snapshot):
+            return _snapshot
+        try:
+            _snapshot = _build()
+        except Exception as e:
+            logger.warning(f"Market snapshot build failed: {e}")
+            _snapshot = Snapshot(data=None, block=UNAVAILABLE, built_at=time.time())
+        return _snapshot
+
+
+def context() -> str:
+    """Pre-serialized market block for LLM prompts, or UNAVAILABLE."""
+    return get_snapshot().block
+
+
+def clear() -> None:
+    global _snapshot
+    with _build_lock:
+        _snapshot = None
+
+
+write_invalidation.register_cache(clear)
@@ -0,0 +1,186 @@
+"""Per-user BM25 index over behavioral memory.
+
+The chat prompt used to carry every UserMemory row, and values keep
+growing as extraction appends to them. Instead, each user's memories
+(conversation summaries excluded) are indexed in process and only the
+TOP_K most relevant to the current message go into the prompt, ties broken
+by how recently the memory was written. Values are shown truncated to their
+newest VALUE_CHARS characters.
+
+An index is built from the database on first use and then kept current
+incrementally: each committed insert, update and delete is applied to any
+index already in memory (see write_invalidation). A generation counter
+keeps a build that raced a write from being cached.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.user_memory import UserMemory
+from app.services import write_invalidation
+from app.services.memory_service import SUMMARY_PREFIX
+
+TOP_K = 8
+VALUE_CHARS = 300
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do for from has have how i if in is it its me my "
+    "of on or our should so that the their them this to was we what when which who why "
+    "will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class _Doc:
+    key: str
+    value: str
+    terms: Counter
+    length: int
+    seq: int  # write order, for recency
+
+
+@dataclass
+class _Index:
+    docs: Dict[int, _Doc] = field(default_factory=dict)
+    df: Counter = field(default_factory=Counter)
+    total_length: int = 0
+    next_seq: int = 0
+
+    def upsert(self, memory_id: int, key: str, value: str) -> None:
+        self.remove(memory_id)
+        # Keys are snake_case labels ("risk_tolerance"), so they tokenize into words too
+        tokens = tokenize(f"{key} {value}")
+        terms = Counter(tokens)
+        self.docs[memory_id] = _Doc(key, value, terms, len(tokens), self.next_seq)
+        self.next_seq += 1
+        self.df.update(terms.keys())
+        self.total_length += len(tokens)
+
+    def remove(self, memory_id: int) -> None:
+        doc = self.docs.pop(memory_id, None)
+        if doc is None:
+            return
+        self.df.subtract(doc.terms.keys())
+        self.df += Counter()  # drop zero counts
+        self.total_length -= doc.length
+
+    def search(self, query: str, k: int) -> List[_Doc]:
+        docs = list(self.docs.values())
+        if len(docs) <= k:
+            return sorted(docs, key=lambda d: d.seq, reverse=True)
+
+        n = len(docs)
+        avg_length = self.total_length / n or 1.0
+        terms = set(tokenize(query))
+        idf = {t: math.log(1 + (n - self.df[t] + 0.5) / (self.df[t] + 0.5)) for t in terms if self.df[t]}
+
+        def score(doc: _Doc) -> float:
+            total = 0.0
+            for term, weight in idf.items():
+                tf = doc.terms.get(term, 0)
+                if tf:
+                    total += weight * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc.length / avg_length))
+            return total
+
+        return sorted(docs, key=lambda d: (score(d), d.seq), reverse=True)[:k]
+
+
+_indexes: Dict[int, _Index] = {}
+_generations: Dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def _index(db: Session, user_id: int) -> _Index:
+    index = _indexes.get(user_id)
+    if index is not None:
+        return index
+
+    with _lock:
+        generation = _generations.get(user_id, 0)
+    rows = (
+        db.query(UserMemory)
+        .filter(UserMemory.user_id == user_id, ~UserMemory.key.like(f"{SUMMARY_PREFIX}%"))
+        .order_by(UserMemory.last_updated, UserMemory.id)
+        .all()
+    )
+    index = _Index()
+    for row in rows:
+        index.upsert(row.id, row.key, row.value)
+    with _lock:
+        if _generations.get(user_id, 0) == generation:
+            _indexes[user_id] = index
+    return index
+
+
+def search(db: Session, user_id: int, query: str, k: int = TOP_K) -> List[Tuple[str, str]]:
+    """(key, value) of the user's ``k`` memories most relevant to ``query``."""
+    index = _index(db, user_id)
+    with _lock:
+        docs = index.search(query, k)
+    return [(d.key, d.value) for d in docs]
+
+
+def memory_block(db: Session, user_id: int, query: str) -> str:
+    """Behavioral memory section sent ahead of this message."""
+    memories = search(db, user_id, query)
+    if not memories:
+        return ""
+    context = "\n\nBehavioral Memory (what you know about this user from past interactions):"
+    for key, value in memories:
+        if len(value) > VALUE_CHARS:
+            # Extraction appends to values, so the tail is the newest
+            value = "…" + value[-VALUE_CHARS:]
+        context += f"\n- {key}: {value}"
+    return context
+
+
+def invalidate(user_id: int) -> None:
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        _indexes.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        for user_id in list(_indexes):
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+        _indexes.clear()
+
+
+# ── Incremental updates ──
+
+def _written(target: UserMemory, deleted: bool) -> Tuple[int, int, Optional[str], Optional[str]]:
+    if deleted:
+        return target.user_id, target.id, None, None
+    return target.user_id, target.id, target.key, target.value
+
+
+def _apply(written: Tuple[int, int, Optional[str], Optional[str]]) -> None:
+    user_id, memory_id, key, value = written
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        index = _indexes.get(user_id)
+        if index is None:
+            return
+        if key is None or key.startswith(SUMMARY_PREFIX):
+            index.remove(memory_id)
+        else:
+            index.upsert(memory_id, key, value)
+
+
+# Every write in order, so a later update wins over an earlier one
+write_invalidation.register([UserMemory], _apply, collect=_written, distinct=False)
+write_invalidation.register_cache(clear)
@@ -1,26 +1,46 @@
 import json
 import logging
 from datetime import datetime
+from typing import List, Optional, Tuple
 
-import anthropic
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.models.user_memory import UserMemory
+from app.services import llm_gateway
 
 logger = logging.getLogger(__name__)
 
 SUMMARY_THRESHOLD = 10  # Summarize when conversation exceeds this many messages
+SUMMARY_INTERVAL = 6  # Then fold in new messages once this many have accumulated
+SUMMARY_PREFIX = "conversation_summary_"  # UserMemory key prefix of rolling conversation summaries
 
 
 def extract_and_save_memory(db: Session, user_id: int, user_message: str, assistant_response: str) -> None:
     """Extract behavioral signals from a conversation exchange and store in user_memory."""
-    try:
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=300,
-            system="""Analyze this conversation exchange between a user and their financial advisor.
+    extract_memory_from_exchanges(db, user_id, [(user_message, assistant_response)])
+
+
+def extract_memory_from_exchanges(db: Session, user_id: int, exchanges: List[Tuple[str, str]]) -> None:
+    """Extract behavioral signals from one or more exchanges in a single model call.
+
+    API errors propagate so the job queue can retry; an unparseable reply is
+    logged and dropped.
+    """
+    if not exchanges:
+        return
+
+    content = "\n\n---\n\n".join(
+        f"USER MESSAGE: {user_message}\n\nADVISOR RESPONSE: {assistant_response[:500]}"
+        for user_message, assistant_response in exchanges
+    )
+
+    response = llm_gateway.create(
+        feature="memory_extract",
+        user_id=user_id,
+        priority=llm_gateway.BACKGROUND,
+        model="claude-haiku-4-5-20251001",
+        max_tokens=300,
+        system="""Analyze this conversation exchange between a user and their financial advisor.
 Extract any behavioral signals worth remembering for future personalization.
 
 Return a JSON array of objects, each with:
@@ -29,82 +49,135 @@ Return a JSON array of objects, each with:
 
 Only extract genuinely useful signals. If there's nothing noteworthy, return an empty array [].
 Return ONLY the JSON array, no other text.""",
-            messages=[{
-                "role": "user",
-                "content": f"USER MESSAGE: {user_message}\n\nADVISOR RESPONSE: {assistant_response[:500]}",
-            }],
-        )
+        messages=[{
+            "role": "user",
+            "content": content,
+        }],
+    )
 
-        response_text = response.content[0].text.strip()
-        if response_text.startswith("```"):
-            response_text = response_text.split("\n", 1)[1]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3].strip()
+    response_text = response.content[0].text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.split("\n", 1)[1]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3].strip()
 
+    try:
         memories = json.loads(response_text)
-        if not memories:
-            return
-
-        now = datetime.utcnow()
-        for mem in memories:
-            key = mem.get("key", "").strip()
-            value = mem.get("value", "").strip()
-            if not key or not value:
-                continue
-
-            # Upsert: update existing key or create new
-            existing = (
-                db.query(UserMemory)
-                .filter(UserMemory.user_id == user_id, UserMemory.key == key)
-                .first()
+    except json.JSONDecodeError:
+        logger.warning("Failed to parse behavioral memory response: %s", response_text)
+        return
+    if not memories:
+        return
+
+    now = datetime.utcnow()
+    for mem in memories:
+        key = mem.get("key", "").strip()
+        value = mem.get("value", "").strip()
+        if not key or not value:
+            continue
+
+        # Upsert: update existing key or create new
+        existing = (
+            db.query(UserMemory)
+            .filter(UserMemory.user_id == user_id, UserMemory.key == key)
+            .first()
+        )
+        if existing:
+            # Merge values if different
+            if value not in existing.value:
+                existing.value = f"{existing.value}, {value}"
+            existing.last_updated = now
+            existing.source = "conversation"
+        else:
+            new_memory = UserMemory(
+                user_id=user_id,
+                key=key,
+                value=value,
+                source="conversation",
+                confidence=0.8,
             )
-            if existing:
-                # Merge values if different
-                if value not in existing.value:
-                    existing.value = f"{existing.value}, {value}"
-                existing.last_updated = now
-                existing.source = "conversation"
-            else:
-                new_memory = UserMemory(
-                    user_id=user_id,
-                    key=key,
-                    value=value,
-                    source="conversation",
-                    confidence=0.8,
-                )
-                db.add(new_memory)
-
-        db.commit()
-    except Exception:
-        logger.exception("Failed to extract behavioral memory")
-
-
-def summarize_conversation(db: Session, user_id: int, conversation_id: int, messages: list) -> None:
-    """Summarize a long conversation and store the summary as a memory entry.
-
-    Called after each exchange when the conversation exceeds SUMMARY_THRESHOLD messages.
-    The summary captures key decisions, advice given, and action items discussed.
+            db.add(new_memory)
+
+    db.commit()
+
+
+def _summary_key(conversation_id: int) -> str:
+    return f"{SUMMARY_PREFIX}{conversation_id}"
+
+
+def get_conversation_summary(db: Session, user_id: int, conversation_id: int) -> Optional[dict]:
+    """The stored rolling summary for one conversation, or None."""
+    row = (
+        db.query(UserMemory)
+        .filter(UserMemory.user_id == user_id, UserMemory.key == _summary_key(conversation_id))
+        .first()
+    )
+    if not row:
+        return None
+    try:
+        return json.loads(row.value)
+    except json.JSONDecodeError:
+        return None
+
+
+def summary_due(previous: Optional[dict], message_count: int) -> bool:
+    """Whether enough messages have arrived since the ``previous`` summary to update it."""
+    if previous is None:
+        return message_count >= SUMMARY_THRESHOLD
+    return message_count - previous.get("message_count", 0) >= SUMMARY_INTERVAL
+
+
+def summarize_conversation(db: Session, user_id: int, conversation_id: int) -> None:
+    """Fold new messages into the conversation's rolling summary.
+
+    The summary records the id of the last message it covers. Only messages
+    after that id are sent to the model, together with the previous summary,
+    and only once SUMMARY_INTERVAL new messages have accumulated. The first
+    summary is written when the conversation reaches SUMMARY_THRESHOLD messages.
     """
-    if len(messages) < SUMMARY_THRESHOLD:
+    from app.models.conversation import Message
+
+    previous = get_conversation_summary(db, user_id, conversation_id)
+    summarized_through = (previous or {}).get("summarized_through", 0)
+
+    new_messages = (
+        db.query(Message)
+        .filter(Message.conversation_id == conversation_id, Message.id > summarized_through)
+        .order_by(Message.id)
+        .all()
+    )
+    if len(new_messages) < (SUMMARY_INTERVAL if previous else SUMMARY_THRESHOLD):
         return
 
-    try:
-        # Build conversation transcript (truncate individual messages to keep prompt reasonable)
-        transcript_parts = []
-        for msg in messages:
-            role = msg.role.upper() if hasattr(msg, "role") else msg.get("role", "").upper()
-            content = msg.content if hasattr(msg, "content") else msg.get("content", "")
-            # Limit each message to ~300 chars for the summary prompt
-            truncated = content[:300] + ("..." if len(content) > 300 else "")
-            transcript_parts.append(f"{role}: {truncated}")
-
-        transcript = "\n\n".join(transcript_parts)
-
-        client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=500,
-            system="""Summarize this financial advisor conversation into a concise memory note.
+    # Build transcript of the new messages (truncate each to keep prompt reasonable)
+    transcript_parts = []
+    for msg in new_messages:
+        # Limit each message to ~300 chars for the summary prompt
+        truncated = msg.content[:300] + ("..." if len(msg.content) > 300 else "")
+        transcript_parts.append(f"{msg.role.upper()}: {truncated}")
+    transcript = "\n\n".join(transcript_parts)
+
+    if previous:
+        content = (
+            "Previous summary:\n" + json.dumps({
+                "summary": previous.get("summary", ""),
+                "key_facts": previous.get("key_facts", []),
+                "action_items": previous.get("action_items", []),
+            })
+            + f"\n\nNew messages since that summary:\n\n{transcript}"
+        )
+    else:
+        content = f"Conversation transcript:\n\n{transcript}"
+
+    response = llm_gateway.create(
+        feature="conversation_summary",
+        user_id=user_id,
+        priority=llm_gateway.BACKGROUND,
+        model="claude-haiku-4-5-20251001",
+        max_tokens=500,
+        system="""Summarize this financial advisor conversation into a concise memory note.
+If a previous summary is given, update it with the new messages: keep what still
+matters, add what's new, and drop action items that were completed or abandoned.
 Focus on:
 1. Key financial facts the user shared (income, goals, holdings, etc.)
 2. Specific advice or recommendations given
@@ -117,50 +190,48 @@ Return a JSON object with:
 - "action_items": An array of 0-3 action items discussed (short strings)
 
 Return ONLY the JSON object, no other text.""",
-            messages=[{
-                "role": "user",
-                "content": f"Conversation transcript:\n\n{transcript}",
-            }],
-        )
+        messages=[{"role": "user", "content": content}],
+    )
 
-        response_text = response.content[0].text.strip()
-        if response_text.startswith("```"):
-            response_text = response_text.split("\n", 1)[1]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3].strip()
+    response_text = response.content[0].text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.split("\n", 1)[1]
+        if response_text.endswith("```"):
+            response_text = response_text[:-3].strip()
 
+    try:
         parsed = json.loads(response_text)
-        now = datetime.utcnow()
+    except json.JSONDecodeError:
+        # API errors propagate so the job queue can retry; a bad reply is just dropped
+        logger.warning("Failed to parse conversation summary for conversation %s", conversation_id)
+        return
 
-        # Store conversation summary
-        summary_key = f"conversation_summary_{conversation_id}"
-        summary_value = json.dumps({
-            "summary": parsed.get("summary", ""),
-            "key_facts": parsed.get("key_facts", []),
-            "action_items": parsed.get("action_items", []),
-            "message_count": len(messages),
-        })
+    summary_value = json.dumps({
+        "summary": parsed.get("summary", ""),
+        "key_facts": parsed.get("key_facts", []),
+        "action_items": parsed.get("action_items", []),
+        "message_count": (previous or {}).get("message_count", 0) + len(new_messages),
+        "summarized_through": new_messages[-1].id,
+    })
 
-        existing = (
-            db.query(UserMemory)
-            .filter(UserMemory.user_id == user_id, UserMemory.key == summary_key)
-            .first()
-        )
-        if existing:
-            existing.value = summary_value
-            existing.last_updated = now
-        else:
-            db.add(UserMemory(
-                user_id=user_id,
-                key=summary_key,
-                value=summary_value,
-                source="conversation",
-                confidence=0.9,
-            ))
-
-        db.commit()
-    except Exception:
-        logger.exception("Failed to summarize conversation")
+    summary_key = _summary_key(conversation_id)
+    existing = (
+        db.query(UserMemory)
+        .filter(UserMemory.user_id == user_id, UserMemory.key == summary_key)
+        .first()
+    )
+    if existing:
+        existing.value = summary_value
+        existing.last_updated = datetime.utcnow()
+    else:
+        db.add(UserMemory(
+            user_id=user_id,
+            key=summary_key,
+            value=summary_value,
+            source="conversation",
+            confidence=0.9,
+        ))
+    db.commit()
 
 
 def get_conversation_summaries(db: Session, user_id: int, limit: int = 5) -> list:
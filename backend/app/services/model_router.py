@@ -0,0 +1,190 @@
+"""Per-turn model routing for chat.
+
+Each incoming chat message is classified as ``fast`` (greetings, thanks,
+single-quote lookups) or ``full`` (planning, analysis, anything about the
+user's own finances, anything long). Fast turns run on CHAT_FAST_MODEL
+with a smaller token budget; full turns stay on CLAUDE_MODEL. Cheap regex
+heuristics decide almost every turn; messages they can't place go to the
+large model, or, with CHAT_ROUTER_CLASSIFIER on, to a one-word
+classification call on the fast model.
+
+Only a conversation's first turn can go to the fast model. Later, a short
+"ok" or "sure" usually confirms something the assistant just proposed and
+needs the full model to carry it out, and switching models mid-conversation
+would discard the conversation's prompt cache.
+
+Every decision is logged, and the turn's time to first token and total
+time are kept per tier, so the latency difference can be read from
+``get_stats`` (GET /api/admin/model-routing).
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services import llm_gateway, symbol_master
+from app.services.llm_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+FULL = "full"
+
+MAX_FAST_CHARS = 200
+MAX_LOOKUP_TICKERS = 3
+FULL_MAX_TOKENS = 4096
+CLASSIFIER_TIMEOUT = 3.0  # seconds
+LATENCY_SAMPLES = 1000  # per tier
+
+_CHIT_CHAT_RE = re.compile(
+    r"^\W*(hi|hello|hey|yo|thanks|thank you|thx|ty|ok|okay|cool|great|nice|awesome|perfect|got it|"
+    r"sounds good|bye|goodbye|good (morning|afternoon|evening|night))( (so much|a lot|again|there))?\W*$",
+    re.IGNORECASE,
+)
+_LOOKUP_RE = re.compile(
+    r"\b(price|quote|trading at|at right now|how much is|market cap|volume|day'?s? (high|low)|"
+    r"52[- ]week|p/?e( ratio)?|dividend yield|up or down|up today|down today|ticker)\b",
+    re.IGNORECASE,
+)
+_ANALYSIS_RE = re.compile(
+    r"\b(plan|planning|retire|retirement|should i|should we|compare|comparison|vs|versus|analy[sz]\w*|"
+    r"strategy|allocat\w*|rebalanc\w*|diversif\w*|risk\w*|tax\w*|budget\w*|debt|mortgage|loan|"
+    r"portfolio|holdings?|net worth|my (stocks|shares|position|savings|money)|why|explain|forecast|"
+    r"predict|recommend\w*|goals?|save for|afford|scenario|what if|outlook|long[- ]term|buy|sell)\b",
+    re.IGNORECASE,
+)
+
+CLASSIFIER_PROMPT = (
+    "Classify the user's message to a financial assistant. Reply with exactly one word: "
+    "SIMPLE if it is small talk or a single factual lookup (a price, a quote, a definition), "
+    "COMPLEX if it needs planning, analysis, comparison or advice."
+)
+
+
+@dataclass(frozen=True)
+class Route:
+    tier: str
+    model: str
+    max_tokens: int
+    reason: str
+    routing_ms: float = 0.0
+
+
+def _route(tier: str, reason: str, started: float) -> Route:
+    routing_ms = (time.monotonic() - started) * 1000
+    if tier == FAST:
+        return Route(FAST, settings.CHAT_FAST_MODEL, settings.CHAT_FAST_MAX_TOKENS, reason, routing_ms)
+    return Route(FULL, settings.CLAUDE_MODEL, FULL_MAX_TOKENS, reason, routing_ms)
+
+
+def _heuristic(message: str) -> Optional[Tuple[str, str]]:
+    """(tier, reason), or None when the message needs a closer look."""
+    text = message.strip()
+    if len(text) > MAX_FAST_CHARS:
+        return FULL, "long message"
+    if _CHIT_CHAT_RE.match(text):
+        return FAST, "chit-chat"
+    if _ANALYSIS_RE.search(text):
+        return FULL, "analysis or planning"
+    tickers = symbol_master.extract_tickers(text, limit=MAX_LOOKUP_TICKERS + 1)
+    if tickers and len(tickers) <= MAX_LOOKUP_TICKERS:
+        if _LOOKUP_RE.search(text):
+            return FAST, "quote lookup"
+        if len(text.split()) <= 4:
+            return FAST, "bare ticker"
+    return None
+
+
+def _classify(message: str, user_id: Optional[int]) -> str:
+    response = llm_gateway.create(
+        feature="chat_routing",
+        user_id=user_id,
+        model=settings.CHAT_FAST_MODEL,
+        max_tokens=5,
+        system=CLASSIFIER_PROMPT,
+        messages=[{"role": "user", "content": message}],
+        timeout=CLASSIFIER_TIMEOUT,
+    )
+    return FAST if "SIMPLE" in response.content[0].text.upper() else FULL
+
+
+def route(message: str, user_id: Optional[int] = None, first_turn: bool = True) -> Route:
+    """Pick the model and token budget for a chat turn."""
+    started = time.monotonic()
+    if not settings.CHAT_ROUTING_ENABLED:
+        decision = _route(FULL, "routing disabled", started)
+    elif not first_turn:
+        decision = _route(FULL, "mid-conversation", started)
+    else:
+        heuristic = _heuristic(message)
+        if heuristic is not None:
+            decision = _route(*heuristic, started)
+        elif settings.CHAT_ROUTER_CLASSIFIER:
+            try:
+                decision = _route(_classify(message, user_id), "classifier", started)
+            except Exception as e:
+                logger.warning(f"Chat routing classifier failed: {e}")
+                decision = _route(FULL, "classifier failed", started)
+        else:
+            decision = _route(FULL, "default", started)
+
+    with _lock:
+        _decisions[(decision.tier, decision.reason)] += 1
+        _routing_ms.append(decision.routing_ms)
+    logger.info(
+        f"Chat routing: {decision.tier} ({decision.reason}) -> {decision.model}, "
+        f"decided in {decision.routing_ms:.1f}ms"
+    )
+    return decision
+
+
+# ── Stats ──
+
+_lock = threading.Lock()
+_decisions: Counter = Counter()
+_routing_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+_first_token_ms: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+_total_ms: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+
+
+def record_turn(decision: Route, first_token_ms: Optional[float], total_ms: float) -> None:
+    """Record a finished turn's latency under its tier."""
+    with _lock:
+        if first_token_ms is not None:
+            _first_token_ms[decision.tier].append(first_token_ms)
+        _total_ms[decision.tier].append(total_ms)
+    logger.info(
+        f"Chat turn ({decision.tier}, {decision.model}): "
+        f"first token {first_token_ms or 0:.0f}ms, total {total_ms:.0f}ms"
+    )
+
+
+def get_stats() -> Dict[str, Any]:
+    """Decisions by tier and reason, and p50/p95 turn latency per tier, since process start."""
+    with _lock:
+        decisions = dict(_decisions)
+        routing = list(_routing_ms)
+        first_token = {tier: list(samples) for tier, samples in _first_token_ms.items()}
+        total = {tier: list(samples) for tier, samples in _total_ms.items()}
+
+    tiers: Dict[str, Dict[str, Any]] = {}
+    for tier in (FAST, FULL):
+        reasons = {reason: count for (t, reason), count in decisions.items() if t == tier}
+        tiers[tier] = {
+            "turns": sum(reasons.values()),
+            "reasons": reasons,
+            "p50_first_token_ms": percentile(first_token.get(tier, []), 0.5),
+            "p95_first_token_ms": percentile(first_token.get(tier, []), 0.95),
+            "p50_total_ms": percentile(total.get(tier, []), 0.5),
+            "p95_total_ms": percentile(total.get(tier, []), 0.95),
+        }
+    return {
+        "tiers": tiers,
+        "p50_routing_ms": percentile(routing, 0.5),
+        "p95_routing_ms": percentile(routing, 0.95),
+    }
@@ -0,0 +1,193 @@
+"""Cross-user news ingestion.
+
+Headlines are fetched per symbol, stored in ``news_articles`` and cached in
+memory for ``NEWS_CACHE_TTL_SECONDS``, so every user asking about the same
+symbol shares one upstream fetch. Symbols that miss the cache are fetched in
+parallel. Articles are identified by a hash of their normalized title and
+stored once; ``news_article_symbols`` links each story to every symbol
+whose feed carried it, so the same story is deduped across symbols and
+refetches.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import yfinance as yf
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.news_article import NewsArticle, NewsArticleSymbol
+
+logger = logging.getLogger(__name__)
+
+ARTICLES_PER_SYMBOL = 5
+FETCH_WORKERS = 8
+
+# symbol -> (fetched at, newest-first articles)
+_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def title_hash(title: str) -> str:
+    """Hash of the title with case, punctuation and spacing normalized away."""
+    normalized = _NON_WORD.sub(" ", title.lower()).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def _parse_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a yfinance news item (legacy flat or newer nested ``content`` shape)."""
+    content = item.get("content")
+    if isinstance(content, dict):
+        published = 0
+        if content.get("pubDate"):
+            try:
+                published = int(datetime.fromisoformat(content["pubDate"].replace("Z", "+00:00")).timestamp())
+            except ValueError:
+                pass
+        return {
+            "title": content.get("title", ""),
+            "publisher": (content.get("provider") or {}).get("displayName", ""),
+            "link": (content.get("canonicalUrl") or content.get("clickThroughUrl") or {}).get("url", ""),
+            "published": published,
+        }
+    return {
+        "title": item.get("title", ""),
+        "publisher": item.get("publisher", ""),
+        "link": item.get("link", ""),
+        "published": item.get("providerPublishTime", 0) or 0,
+    }
+
+
+def _fetch_symbol(symbol: str) -> List[Dict[str, Any]]:
+    items = yf.Ticker(symbol).news or []
+    articles = []
+    seen = set()
+    for item in items:
+        article = _parse_item(item)
+        if not article["title"]:
+            continue
+        article["symbol"] = symbol
+        article["title_hash"] = title_hash(article["title"])
+        if article["title_hash"] in seen:
+            continue
+        seen.add(article["title_hash"])
+        articles.append(article)
+    articles.sort(key=lambda a: a["published"], reverse=True)
+    return articles[:ARTICLES_PER_SYMBOL]
+
+
+def _store(db: Session, symbol: str, articles: List[Dict[str, Any]]) -> None:
+    if not articles:
+        return
+    published = {a["title_hash"]: a["published"] for a in articles}
+    hashes = list(published)
+    ids = {
+        h: article_id for h, article_id in db.query(NewsArticle.title_hash, NewsArticle.id)
+        .filter(NewsArticle.title_hash.in_(hashes))
+    }
+    new = [
+        NewsArticle(
+            title_hash=a["title_hash"],
+            title=a["title"],
+            publisher=a["publisher"],
+            link=a["link"],
+            published=a["published"],
+        )
+        for a in articles
+        if a["title_hash"] not in ids
+    ]
+    try:
+        if new:
+            db.add_all(new)
+            db.flush()
+            ids.update((row.title_hash, row.id) for row in new)
+        linked = {
+            article_id for (article_id,) in db.query(NewsArticleSymbol.article_id).filter(
+                NewsArticleSymbol.symbol == symbol,
+                NewsArticleSymbol.article_id.in_(ids.values()),
+            )
+        }
+        db.add_all([
+            NewsArticleSymbol(article_id=article_id, symbol=symbol, published=published[h])
+            for h, article_id in ids.items()
+            if article_id not in linked
+        ])
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same articles first
+        db.rollback()
+
+
+def _load_stored(db: Session, symbol: str) -> List[Dict[str, Any]]:
+    rows = (
+        db.query(NewsArticle, NewsArticleSymbol.published)
+        .join(NewsArticleSymbol, NewsArticleSymbol.article_id == NewsArticle.id)
+        .filter(NewsArticleSymbol.symbol == symbol)
+        .order_by(NewsArticleSymbol.published.desc())
+        .limit(ARTICLES_PER_SYMBOL)
+        .all()
+    )
+    return [
+        {
+            "symbol": symbol,
+            "title": r.title,
+            "title_hash": r.title_hash,
+            "publisher": r.publisher,
+            "link": r.link,
+            "published": published,
+        }
+        for r, published in rows
+    ]
+
+
+def get_symbol_news(db: Session, symbols: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Newest-first articles per symbol, fetching stale symbols in parallel."""
+    now = time.time()
+    result: Dict[str, List[Dict[str, Any]]] = {}
+    missing = []
+    for symbol in symbols:
+        cached = _cache.get(symbol)
+        if cached and now - cached[0] < settings.NEWS_CACHE_TTL_SECONDS:
+            result[symbol] = cached[1]
+        else:
+            missing.append(symbol)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(missing))) as pool:
+            futures = {symbol: pool.submit(_fetch_symbol, symbol) for symbol in missing}
+        for symbol, future in futures.items():
+            try:
+                articles = future.result()
+                _store(db, symbol, articles)
+            except Exception:
+                logger.warning(f"News fetch failed for {symbol}; serving stored articles")
+                articles = _load_stored(db, symbol)
+            _cache[symbol] = (now, articles)
+            result[symbol] = articles
+
+    return result
+
+
+def get_news(db: Session, symbols: List[str], limit: int = 30) -> List[Dict[str, Any]]:
+    """Merge per-symbol article lists newest-first, keeping one copy of each story."""
+    per_symbol = get_symbol_news(db, symbols)
+    merged = heapq.merge(*per_symbol.values(), key=lambda a: a["published"], reverse=True)
+
+    articles = []
+    seen = set()
+    for article in merged:
+        if article["title_hash"] in seen:
+            continue
+        seen.add(article["title_hash"])
+        articles.append(article)
+        if len(articles) >= limit:
+            break
+    return articles
@@ -1,12 +1,11 @@
 import json
 import logging
 
-import anthropic
 from sqlalchemy.orm import Session
 
-from app.config import settings
 from app.models.financial_profile import FinancialProfile
 from app.models.user import User
+from app.services import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -35,13 +34,14 @@ Start by warmly greeting the user and asking about their main financial goal."""
 
 def chat_onboarding(db: Session, user: User, messages: list) -> dict:
     """Handle a conversational onboarding exchange."""
-    client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
 
     api_messages = []
     for msg in messages:
         api_messages.append({"role": msg["role"], "content": msg["content"]})
 
-    response = client.messages.create(
+    response = llm_gateway.create(
+        feature="onboarding",
+        user_id=user.id,
         model="claude-haiku-4-5-20251001",
         max_tokens=600,
         system=ONBOARDING_SYSTEM_PROMPT,
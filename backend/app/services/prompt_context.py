@@ -0,0 +1,204 @@
+"""Per-user system-prompt context, cached in memory.
+
+The chat system prompt needs the user's profile, active plans, recent
+insights and conversation summaries. The assembled text blocks are cached
+per user, along with stored conversation summaries, so a steady-state chat
+turn assembles its prompt without touching the database. Behavioral memory
+depends on the message being answered, so it comes from memory_index.
+
+Any commit that inserts, updates or deletes one of a user's FinancialProfile,
+FinancialPlan or Insight rows, or a conversation summary, drops that user's
+entry (see write_invalidation). Other UserMemory rows are written by memory
+extraction on nearly every turn and aren't part of the entry, so they don't.
+A generation counter keeps a read that raced a write from caching stale
+text.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.financial_plan import FinancialPlan
+from app.models.financial_profile import FinancialProfile
+from app.models.insight import Insight
+from app.models.user_memory import UserMemory
+from app.services import memory_service, write_invalidation
+from app.services.memory_service import SUMMARY_PREFIX
+
+WATCHED_MODELS = (FinancialProfile, FinancialPlan, Insight)
+
+
+def profile_block(profile: Optional[FinancialProfile]) -> str:
+    """Language, style, tone and financial profile. Changes only when the profile does."""
+    if not profile:
+        return ""
+    context = ""
+
+    # Language preference
+    lang = getattr(profile, "language", None) or "en"
+    if lang != "en":
+        lang_names = {"es": "Spanish", "fr": "French", "de": "German", "it": "Italian", "pt": "Portuguese", "zh": "Chinese", "ja": "Japanese", "ko": "Korean"}
+        lang_name = lang_names.get(lang, lang)
+        context += f"\n\nIMPORTANT: Respond in {lang_name}. The user prefers communication in {lang_name}. All responses, advice, and analysis should be in {lang_name}."
+
+    # Communication level instructions
+    comm_level = getattr(profile, "communication_level", None) or "college"
+    comm_instructions = {
+        "elementary": "\n\nCommunication Style: Explain everything using very simple words and everyday analogies. Avoid all financial jargon. Use comparisons to things like piggy banks, lemonade stands, and allowances. Keep sentences short and friendly.",
+        "high_school": "\n\nCommunication Style: Use plain, straightforward language. When you must use a financial term, always explain it briefly in parentheses. Keep explanations clear and relatable to everyday life.",
+        "college": "\n\nCommunication Style: Use standard financial terminology. Provide thorough analysis with proper context. You can assume familiarity with common investment concepts like diversification, market cap, and P/E ratios.",
+        "phd": "\n\nCommunication Style: Use advanced financial terminology and quantitative analysis freely. Reference academic concepts like CAPM, Sharpe ratio, efficient frontier, Monte Carlo simulations, and modern portfolio theory. Include statistical measures and mathematical frameworks where relevant.",
+    }
+    context += comm_instructions.get(comm_level, comm_instructions["college"])
+
+    # Advisor tone instructions
+    tone = getattr(profile, "advisor_tone", None) or "professional"
+    tone_instructions = {
+        "friendly": "\n\nAdvisor Tone: Be warm, encouraging, and casual. Use positive reinforcement. Celebrate good financial decisions. Be supportive and optimistic while still being honest about risks.",
+        "professional": "\n\nAdvisor Tone: Be formal, data-driven, and precise. Focus on facts and figures. Maintain a polished, authoritative voice. Present analysis in a structured, methodical way.",
+        "mentor": "\n\nAdvisor Tone: Be educational and use a Socratic approach. Ask thought-provoking questions. Explain the 'why' behind concepts. Help the user build their own financial literacy and decision-making skills.",
+        "casual": "\n\nAdvisor Tone: Be relaxed, conversational, and occasionally humorous. Use everyday language and pop culture references. Make finance feel approachable and fun, not intimidating.",
+    }
+    context += tone_instructions.get(tone, tone_instructions["professional"])
+
+    profile_context = "\n\nUser Financial Profile:"
+    if profile.age:
+        profile_context += f"\n- Age: {profile.age}"
+    if profile.annual_income:
+        profile_context += f"\n- Annual Income: ${profile.annual_income:,.0f}"
+    if profile.monthly_expenses:
+        profile_context += f"\n- Monthly Expenses: ${profile.monthly_expenses:,.0f}"
+    if profile.total_savings:
+        profile_context += f"\n- Total Savings: ${profile.total_savings:,.0f}"
+    if profile.total_debt:
+        profile_context += f"\n- Total Debt: ${profile.total_debt:,.0f}"
+    if profile.risk_tolerance:
+        profile_context += f"\n- Risk Tolerance: {profile.risk_tolerance}"
+    if profile.investment_goals:
+        profile_context += f"\n- Investment Goals: {profile.investment_goals}"
+    if profile.portfolio_description:
+        profile_context += f"\n- Current Portfolio: {profile.portfolio_description}"
+    if getattr(profile, "experience_level", None):
+        profile_context += f"\n- Experience Level: {profile.experience_level}"
+    if getattr(profile, "investment_timeline", None):
+        profile_context += f"\n- Investment Timeline: {profile.investment_timeline}"
+    if getattr(profile, "interested_topics", None):
+        profile_context += f"\n- Interested Topics: {profile.interested_topics}"
+    context += profile_context
+    return context
+
+
+def user_block(db: Session, user_id: int) -> str:
+    """Active plans, recent insights and past conversation summaries."""
+    context = ""
+
+    # Active financial plans
+    plans = (
+        db.query(FinancialPlan)
+        .filter(FinancialPlan.user_id == user_id, FinancialPlan.status == "active")
+        .all()
+    )
+    if plans:
+        context += "\n\nActive Financial Plans:"
+        for p in plans:
+            context += f"\n- {p.title} ({p.plan_type})"
+
+    # Recent insights the user has received
+    recent_insights = (
+        db.query(Insight)
+        .filter(Insight.user_id == user_id, Insight.status.in_(["delivered", "accepted"]))
+        .order_by(Insight.created_at.desc())
+        .limit(5)
+        .all()
+    )
+    if recent_insights:
+        context += "\n\nRecent Advisor Insights (reference these naturally if relevant):"
+        for i in recent_insights:
+            context += f"\n- [{i.type}] {i.title}: {i.body}"
+
+    # Conversation summaries from past chats
+    summaries = memory_service.get_conversation_summaries(db, user_id, limit=3)
+    if summaries:
+        context += "\n\nPrevious Conversation Summaries (use for continuity):"
+        for s in summaries:
+            context += f"\n- {s.get('summary', '')}"
+            facts = s.get("key_facts", [])
+            if facts:
+                context += f" Key facts: {', '.join(facts)}."
+            actions = s.get("action_items", [])
+            if actions:
+                context += f" Action items: {', '.join(actions)}."
+    return context
+
+
+@dataclass
+class _Entry:
+    profile: str
+    context: str
+    summaries: Dict[int, Optional[dict]] = field(default_factory=dict)
+
+
+_cache: Dict[int, _Entry] = {}
+_generations: Dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def _entry(db: Session, user_id: int) -> _Entry:
+    entry = _cache.get(user_id)
+    if entry is not None:
+        return entry
+
+    with _lock:
+        generation = _generations.get(user_id, 0)
+    profile = db.query(FinancialProfile).filter(FinancialProfile.user_id == user_id).first()
+    entry = _Entry(profile=profile_block(profile), context=user_block(db, user_id))
+    with _lock:
+        if _generations.get(user_id, 0) == generation:
+            _cache[user_id] = entry
+    return entry
+
+
+def get_context(db: Session, user_id: int) -> Tuple[str, str]:
+    """(profile block, user context block) for the user's system prompt."""
+    entry = _entry(db, user_id)
+    return entry.profile, entry.context
+
+
+def get_conversation_summary(db: Session, user_id: int, conversation_id: int) -> Optional[dict]:
+    """Cached memory_service.get_conversation_summary."""
+    entry = _entry(db, user_id)
+    if conversation_id not in entry.summaries:
+        # If the entry is invalidated meanwhile this lands on the orphaned copy
+        entry.summaries[conversation_id] = memory_service.get_conversation_summary(db, user_id, conversation_id)
+    return entry.summaries[conversation_id]
+
+
+def invalidate(user_id: int) -> None:
+    with _lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        _cache.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        for user_id in list(_cache):
+            _generations[user_id] = _generations.get(user_id, 0) + 1
+        _cache.clear()
+
+
+# ── Write-through invalidation ──
+
+def _summary_owner(target: UserMemory, deleted: bool) -> Optional[int]:
+    return target.user_id if target.key.startswith(SUMMARY_PREFIX) else None
+
+
+def _invalidate_summary_owner(user_id: Optional[int]) -> None:
+    if user_id is not None:
+        invalidate(user_id)
+
+
+write_invalidation.register(WATCHED_MODELS, invalidate)
+write_invalidation.register([UserMemory], _invalidate_summary_owner, collect=_summary_owner)
+write_invalidation.register_cache(clear)
@@ -0,0 +1,97 @@
+"""Shared live-quote fan-out for streaming clients.
+
+Clients subscribe to a set of symbols and receive quote updates on an
+asyncio queue. The hub keeps a reference-counted set of subscribed symbols
+and runs exactly one poller task per distinct symbol, started when the first
+subscriber arrives and cancelled when the last one leaves. Upstream load
+therefore scales with distinct symbols, not connected clients.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.config import settings
+from app.services.market_data_service import get_stock_quote, is_market_open
+
+logger = logging.getLogger(__name__)
+
+CLOSED_MARKET_INTERVAL = 300  # seconds between polls outside trading hours
+QUEUE_SIZE = 100
+
+
+class QuoteHub:
+    def __init__(self, interval: float = settings.QUOTE_STREAM_INTERVAL_SECONDS):
+        self.interval = interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols with at least one subscriber."""
+        return list(self._subscribers)
+
+    def subscriber_count(self, symbol: str) -> int:
+        return len(self._subscribers.get(symbol.upper(), ()))
+
+    def subscribe(self, symbols: Iterable[str]) -> asyncio.Queue:
+        """Register a new client for ``symbols``. Must be called from the event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        for symbol in {s.upper() for s in symbols}:
+            self._subscribers[symbol].add(queue)
+            if symbol in self._latest:
+                # New subscribers get the last known quote immediately
+                _offer(queue, self._latest[symbol])
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.get_running_loop().create_task(self._poll(symbol))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, symbols: Iterable[str]) -> None:
+        for symbol in {s.upper() for s in symbols}:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller:
+                    poller.cancel()
+
+    async def _poll(self, symbol: str) -> None:
+        while symbol in self._subscribers:
+            interval = self.interval if is_market_open() else CLOSED_MARKET_INTERVAL
+            try:
+                quote = await asyncio.to_thread(get_stock_quote, symbol, interval)
+            except Exception:
+                logger.warning(f"Quote stream poll failed for {symbol}")
+                quote = None
+
+            if quote and _changed(self._latest.get(symbol), quote):
+                self._latest[symbol] = quote
+                for queue in list(self._subscribers.get(symbol, ())):
+                    _offer(queue, quote)
+
+            await asyncio.sleep(interval)
+
+
+def _changed(previous: Optional[Dict[str, Any]], quote: Dict[str, Any]) -> bool:
+    if previous is None:
+        return True
+    return any(previous.get(k) != quote.get(k) for k in ("price", "change", "change_percent", "volume"))
+
+
+def _offer(queue: asyncio.Queue, quote: Dict[str, Any]) -> None:
+    """Enqueue without blocking; a slow client loses its oldest update instead of stalling the poller."""
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(quote)
+
+
+hub = QuoteHub()
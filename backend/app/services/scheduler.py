@@ -0,0 +1,166 @@
+"""Lightweight interval scheduler for background jobs.
+
+Each job runs in its own daemon thread. Before every run the job takes a
+lease in the ``scheduler_locks`` table, so when several worker processes are
+running only the current lease holder executes it. A leader that dies simply
+stops renewing and another process picks the job up once the lease expires.
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.scheduler_lock import SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lock owner
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+@dataclass
+class Job:
+    name: str
+    interval: float
+    func: Callable[[Session], None]
+    should_run: Optional[Callable[[], bool]] = None
+
+
+_jobs: Dict[str, Job] = {}
+_threads: Dict[str, threading.Thread] = {}
+_stop = threading.Event()
+
+
+def every(seconds: float, name: str, func: Callable[[Session], None], should_run: Optional[Callable[[], bool]] = None) -> None:
+    """Register a job to run every ``seconds`` on the lease-holding process."""
+    _jobs[name] = Job(name=name, interval=seconds, func=func, should_run=should_run)
+
+
+def acquire_lock(db: Session, name: str, ttl_seconds: float, owner: str = OWNER_ID) -> bool:
+    """Take or renew the lease for ``name``. Returns True if this owner holds it."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    renewed = (
+        db.query(SchedulerLock)
+        .filter(
+            SchedulerLock.name == name,
+            (SchedulerLock.owner == owner) | (SchedulerLock.expires_at < now),
+        )
+        .update({"owner": owner, "expires_at": expires_at}, synchronize_session=False)
+    )
+    if renewed:
+        db.commit()
+        return True
+
+    if db.query(SchedulerLock).filter(SchedulerLock.name == name).first():
+        db.rollback()
+        return False
+
+    try:
+        db.add(SchedulerLock(name=name, owner=owner, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another process inserted the lease first
+        db.rollback()
+        return False
+
+
+def release_lock(db: Session, name: str, owner: str = OWNER_ID) -> None:
+    db.query(SchedulerLock).filter(
+        SchedulerLock.name == name, SchedulerLock.owner == owner
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def run_job_once(job: Job) -> bool:
+    """Run a single tick of ``job`` if this process holds its lease. Returns True if it ran."""
+    if job.should_run and not job.should_run():
+        return False
+
+    db = SessionLocal()
+    try:
+        # Lease outlives a couple of missed ticks so a slow run doesn't lose leadership
+        if not acquire_lock(db, job.name, ttl_seconds=job.interval * 2 + 30):
+            return False
+        job.func(db)
+        return True
+    except Exception:
+        db.rollback()
+        logger.exception(f"Scheduled job '{job.name}' failed")
+        return False
+    finally:
+        db.close()
+
+
+def _loop(job: Job) -> None:
+    while not _stop.wait(job.interval):
+        run_job_once(job)
+
+
+def start() -> None:
+    """Start a thread for each registered job. Safe to call more than once."""
+    if not settings.SCHEDULER_ENABLED:
+        return
+    _stop.clear()
+    for name, job in _jobs.items():
+        thread = _threads.get(name)
+        if thread and thread.is_alive():
+            continue
+        thread = threading.Thread(target=_loop, args=(job,), name=f"scheduler-{name}", daemon=True)
+        _threads[name] = thread
+        thread.start()
+
+
+def stop() -> None:
+    """Signal job threads to exit and give up any leases held by this process."""
+    _stop.set()
+    db = SessionLocal()
+    try:
+        for name in _jobs:
+            release_lock(db, name)
+    except Exception:
+        db.rollback()
+    finally:
+        db.close()
+
+
+# ── Jobs ──
+
+def _check_alerts(db: Session) -> None:
+    from app.services.alert_service import check_all_alerts
+
+    check_all_alerts(db)
+
+
+def _market_open() -> bool:
+    from app.services.market_data_service import is_market_open
+
+    return is_market_open()
+
+
+def _nightly_generation(db: Session) -> None:
+    from app.services.batch_generation import run_nightly
+
+    run_nightly(db)
+
+
+def _nightly_hour() -> bool:
+    # Hourly ticks, so this runs once a day; a re-run within the hour skips users already done
+    return datetime.utcnow().hour == settings.NIGHTLY_GENERATION_HOUR
+
+
+# Register jobs
+every(settings.ALERT_CHECK_INTERVAL_SECONDS, "alert_check", _check_alerts, should_run=_market_open)
+every(3600, "nightly_generation", _nightly_generation, should_run=_nightly_hour)
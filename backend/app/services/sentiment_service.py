@@ -0,0 +1,150 @@
+"""Lexicon-based headline sentiment (no API call needed).
+
+The lexicon is compiled once into a single word-boundary regex alternation,
+so "low" no longer matches "follow" and "gain" no longer matches "again".
+Batches of headlines are scored with one regex pass over the joined text.
+A cue preceded by a negator within a few words of the same clause ("not",
+"fails to", ...) counts with the opposite sign. Scores are cached by the
+normalized headline text they were computed from.
+"""
+
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+# Cue -> weight. Positive is bullish, negative bearish. Multi-word phrases are
+# matched as a whole and take precedence over their parts.
+LEXICON: Dict[str, float] = {
+    # bullish
+    "surge": 2.0, "soar": 2.0, "skyrocket": 2.5, "rally": 1.5, "jump": 1.5, "gain": 1.0,
+    "rise": 1.0, "climb": 1.0, "rebound": 1.5, "recovery": 1.0, "record high": 2.0,
+    "all-time high": 2.0, "beat": 1.5, "tops estimates": 1.5, "upgrade": 1.5, "bull": 1.0,
+    "bullish": 1.5, "grow": 1.0, "growth": 1.0, "profit": 1.0, "boom": 1.5, "breakout": 1.5,
+    "strong": 1.0, "outperform": 1.5, "buy": 1.0, "positive": 1.0, "upbeat": 1.0,
+    "raises guidance": 2.0, "dividend hike": 1.5, "high": 0.5, "record": 0.5,
+    # bearish
+    "fall": -1.0, "drop": -1.0, "crash": -2.5, "plunge": -2.0, "tumble": -2.0, "sink": -1.5,
+    "slide": -1.0, "decline": -1.0, "miss": -1.5, "downgrade": -1.5, "bear": -1.0,
+    "bearish": -1.5, "loss": -1.0, "cut": -1.0, "slump": -1.5, "weak": -1.0, "sell": -1.0,
+    "selloff": -2.0, "sell-off": -2.0, "negative": -1.0, "warning": -1.0, "warn": -1.0,
+    "fear": -1.0, "risk": -0.5, "layoff": -1.5, "recession": -2.0, "bankruptcy": -2.5,
+    "lawsuit": -1.0, "probe": -1.0, "lowers guidance": -2.0, "cuts guidance": -2.0,
+    "low": -0.5, "record low": -2.0,
+}
+
+NEGATORS = ["not", "no", "never", "without", "cannot", "can't", "fails to", "failed to", "didn't", "doesn't",
+            "don't", "isn't", "wasn't", "won't", "unlikely to", "avoids", "avoid", "eases"]
+NEGATION_WINDOW = 3  # words between negator and cue
+CLAUSE_BREAKS = ".:;,!?"  # a negator doesn't reach past these
+
+BULLISH_THRESHOLD = 0.5
+CACHE_SIZE = 50_000
+
+
+def _forms(cue: str) -> List[str]:
+    """Common inflections of the last word of a cue (surge -> surges, surged, surging)."""
+    if not re.fullmatch(r"[a-z]+", cue.split()[-1]) or " " in cue:
+        return [cue]
+    forms = {cue, cue + "s", cue + "es", cue + "ed", cue + "ing"}
+    if cue.endswith("e"):
+        forms |= {cue + "d", cue[:-1] + "ing"}
+    if cue.endswith("y"):
+        forms |= {cue[:-1] + "ies", cue[:-1] + "ied"}
+    if re.search(r"[^aeiou][aeiou][bdgmnpt]$", cue):
+        # Doubled final consonant: drop -> dropped, dropping
+        forms |= {cue + cue[-1] + "ed", cue + cue[-1] + "ing"}
+    return sorted(forms)
+
+
+_WEIGHTS: Dict[str, float] = {}
+for _cue, _weight in LEXICON.items():
+    for _form in _forms(_cue):
+        _WEIGHTS.setdefault(_form, _weight)
+
+# Longest alternatives first so phrases win over their component words
+_CUE_RE = re.compile(
+    r"(?<![\w-])(" + "|".join(re.escape(f) for f in sorted(_WEIGHTS, key=len, reverse=True)) + r")(?![\w-])"
+)
+_GAP = r"[^\w%s]" % re.escape(CLAUSE_BREAKS)
+_NEGATED_RE = re.compile(
+    r"(?<![\w'])(?:" + "|".join(re.escape(n) for n in NEGATORS) + r")"
+    + r"(?:%s+[\w'-]+){0,%d}%s*$" % (_GAP, NEGATION_WINDOW - 1, _GAP)
+)
+
+_cache: "OrderedDict[str, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _normalize(headline: str) -> str:
+    return headline.lower().replace("’", "'")
+
+
+def _score_uncached(lowered: List[str]) -> List[float]:
+    """Scores for already-normalized headlines."""
+    text = "\n".join(lowered)
+    starts = []
+    pos = 0
+    for h in lowered:
+        starts.append(pos)
+        pos += len(h) + 1
+
+    scores = [0.0] * len(lowered)
+    for match in _CUE_RE.finditer(text):
+        idx = bisect_right(starts, match.start()) - 1
+        weight = _WEIGHTS[match.group(1)]
+        # Only look back within the same headline. Searching the full text with
+        # bounds (rather than a slice) keeps the negator's lookbehind, so a
+        # window that starts inside "cannot" doesn't read as "not".
+        if _NEGATED_RE.search(text, max(starts[idx], match.start() - 40), match.start()):
+            weight = -weight
+        scores[idx] += weight
+    return scores
+
+
+def score_batch(headlines: Iterable[str]) -> List[float]:
+    """Net sentiment score for each headline (positive is bullish)."""
+    # Keyed on exactly the text that's scored: "sell-off" and "sell off" differ
+    keys = [_normalize(h) for h in headlines]
+    results: List[float] = [0.0] * len(keys)
+
+    missing: Dict[str, List[int]] = {}
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            score = _cache.get(key)
+            if score is not None:
+                _cache.move_to_end(key)
+                results[i] = score
+            else:
+                missing.setdefault(key, []).append(i)
+
+    if missing:
+        indices = list(missing.values())
+        scores = _score_uncached(list(missing))
+        with _cache_lock:
+            for key, score in zip(missing, scores):
+                _cache[key] = score
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        for ix, score in zip(indices, scores):
+            for i in ix:
+                results[i] = score
+
+    return results
+
+
+def label(score: float) -> str:
+    if score >= BULLISH_THRESHOLD:
+        return "bullish"
+    if score <= -BULLISH_THRESHOLD:
+        return "bearish"
+    return "neutral"
+
+
+def classify_batch(headlines: Iterable[str]) -> List[str]:
+    return [label(s) for s in score_batch(headlines)]
+
+
+def classify(headline: str) -> str:
+    return classify_batch([headline])[0]
@@ -0,0 +1,63 @@
+"""Local symbol master and a fast ticker extractor for free text.
+
+The master (app/data/symbol_master.csv) lists symbols we expect users to
+ask about, with company-name aliases. It's compiled once into a set for
+uppercase tokens ("AAPL", "$T", "BRK-B") and a single case-insensitive
+regex for names ("apple", "berkshire hathaway"), so extracting tickers
+from a chat message costs two regex passes and no network.
+"""
+
+import csv
+import re
+from pathlib import Path
+from typing import Dict, FrozenSet, List
+
+MASTER_PATH = Path(__file__).resolve().parent.parent / "data" / "symbol_master.csv"
+
+# Real tickers that are also common words or abbreviations; only matched with a "$" prefix
+AMBIGUOUS = frozenset({
+    "A", "ALL", "ARM", "C", "CAT", "COST", "DE", "DIS", "F", "GE", "HD", "IT", "LOW", "MA", "MS",
+    "NOW", "O", "PM", "SO", "T", "UPS", "V",
+})
+
+
+def _load() -> Dict[str, str]:
+    """alias (lowercase) -> symbol, plus symbol -> symbol."""
+    lookup: Dict[str, str] = {}
+    with open(MASTER_PATH, newline="") as f:
+        for row in csv.DictReader(f):
+            symbol = row["symbol"].strip().upper()
+            lookup[symbol] = symbol
+            for alias in (row.get("aliases") or "").split(";"):
+                if alias.strip():
+                    lookup[alias.strip().lower()] = symbol
+    return lookup
+
+
+_lookup = _load()
+SYMBOLS: FrozenSet[str] = frozenset(v for v in _lookup.values())
+_ALIASES = {k: v for k, v in _lookup.items() if k not in SYMBOLS}
+
+_TOKEN_RE = re.compile(r"(\$)?\b([A-Z]{1,5}(?:[.-][A-Z])?)\b")
+# Longest names first so "bank of america" wins over shorter overlaps
+_NAME_RE = re.compile(
+    r"(?<![\w&-])(" + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r")(?![\w&-])",
+    re.IGNORECASE,
+)
+
+
+def extract_tickers(text: str, limit: int = 10) -> List[str]:
+    """Known symbols mentioned in ``text``, in order of first mention."""
+    found: Dict[int, str] = {}
+    for match in _TOKEN_RE.finditer(text):
+        symbol = match.group(2).replace(".", "-")
+        if symbol in SYMBOLS and (match.group(1) or symbol not in AMBIGUOUS):
+            found.setdefault(match.start(), symbol)
+    for match in _NAME_RE.finditer(text):
+        found.setdefault(match.start(), _ALIASES[match.group(1).lower()])
+
+    tickers: List[str] = []
+    for _, symbol in sorted(found.items()):
+        if symbol not in tickers:
+            tickers.append(symbol)
+    return tickers[:limit]
@@ -0,0 +1,91 @@
+"""Commit-time invalidation for in-process caches of database rows.
+
+A cache registers the models it is built from with ``register``. Mapper
+events record a value for every row inserted, updated or deleted in a
+session (``collect(target, deleted)``, by default the row's ``user_id``);
+once the session commits, ``callback`` is called with each recorded value,
+and a rollback discards them. Bulk ``query.update()``/``delete()``
+bypasses mapper events, so callers must invalidate explicitly after those.
+
+Caches also register their ``clear`` with ``register_cache``, so everything
+process-global can be reset at once with ``clear_all`` (tests reuse user ids).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+
+@dataclass(frozen=True)
+class _Hook:
+    key: str  # session.info slot for this hook's pending values
+    collect: Callable[[Any, bool], Any]
+    callback: Callable[[Any], None]
+    distinct: bool
+
+
+_hooks: List[_Hook] = []
+_clears: List[Callable[[], None]] = []
+
+
+def _user_id(target: Any, deleted: bool) -> Any:
+    return target.user_id
+
+
+def register(
+    models: Iterable[type],
+    callback: Callable[[Any], None],
+    collect: Optional[Callable[[Any, bool], Any]] = None,
+    distinct: bool = True,
+) -> None:
+    """Call ``callback(value)`` after commit for each value collected from writes to ``models``.
+
+    With ``distinct`` (the default) each value is passed once per commit;
+    otherwise every write is passed in order, for callbacks that apply changes.
+    """
+    hook = _Hook(
+        key=f"write_invalidation_{len(_hooks)}",
+        collect=collect or _user_id,
+        callback=callback,
+        distinct=distinct,
+    )
+    _hooks.append(hook)
+
+    def record(deleted: bool):
+        def listener(mapper, connection, target) -> None:
+            session = object_session(target)
+            if session is not None:
+                session.info.setdefault(hook.key, []).append(hook.collect(target, deleted))
+        return listener
+
+    for model in models:
+        event.listen(model, "after_insert", record(False))
+        event.listen(model, "after_update", record(False))
+        event.listen(model, "after_delete", record(True))
+
+
+def register_cache(clear: Callable[[], None]) -> None:
+    _clears.append(clear)
+
+
+def clear_all() -> None:
+    for clear in _clears:
+        clear()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session) -> None:
+    for hook in _hooks:
+        values = session.info.pop(hook.key, None)
+        if not values:
+            continue
+        for value in dict.fromkeys(values) if hook.distinct else values:
+            hook.callback(value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    for hook in _hooks:
+        session.info.pop(hook.key, None)
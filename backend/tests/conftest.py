@@ -5,6 +5,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.database import Base, get_db
 from app.main import app
+from app.services import write_invalidation
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -15,6 +16,13 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    yield
+    # After the db fixture's teardown; user ids are reused across tests
+    write_invalidation.clear_all()
+
+
 @pytest.fixture(scope="function")
 def db():
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,152 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from app.models.price_alert import PriceAlert
+from app.models.user import User
+from app.services.alert_engine import evaluate
+from app.services.alert_service import check_all_alerts
+from app.services.market_data_service import MARKET_TZ, is_market_open
+from app.services.scheduler import acquire_lock
+
+
+def _make_user(db, email="alerts@example.com"):
+    user = User(email=email, hashed_password="x", full_name="Alert User")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_check_all_alerts_quotes_each_symbol_once_and_emits(db):
+    user = _make_user(db)
+    db.add_all([
+        PriceAlert(user_id=user.id, symbol="AAPL", condition="above", target_price=150),
+        PriceAlert(user_id=user.id, symbol="AAPL", condition="below", target_price=100),
+        PriceAlert(user_id=user.id, symbol="MSFT", condition="below", target_price=300),
+    ])
+    db.commit()
+
+    prices = {"AAPL": 160.0, "MSFT": 310.0}
+    with patch("app.services.alert_service.get_stock_quote", side_effect=lambda s: {"price": prices[s]}) as quote, \
+            patch("app.services.event_bus.emit") as emit:
+        triggered = check_all_alerts(db)
+
+    assert quote.call_count == 2
+    assert [(a.symbol, a.condition) for a in triggered] == [("AAPL", "above")]
+    emit.assert_called_once_with("alert.triggered", user_id=user.id, symbol="AAPL", alert_id=triggered[0].id)
+
+    # Already-triggered alerts are not re-emitted
+    with patch("app.services.alert_service.get_stock_quote", side_effect=lambda s: {"price": prices[s]}), \
+            patch("app.services.event_bus.emit") as emit:
+        assert check_all_alerts(db) == []
+    emit.assert_not_called()
+
+
+def test_scheduler_lock_single_owner(db):
+    assert acquire_lock(db, "job", ttl_seconds=60, owner="a")
+    assert not acquire_lock(db, "job", ttl_seconds=60, owner="b")
+    assert acquire_lock(db, "job", ttl_seconds=60, owner="a")
+
+    # An expired lease can be taken over
+    assert acquire_lock(db, "job", ttl_seconds=-1, owner="a")
+    assert acquire_lock(db, "job", ttl_seconds=60, owner="b")
+
+
+def test_is_market_open():
+    assert is_market_open(datetime(2024, 3, 5, 10, 0, tzinfo=MARKET_TZ))
+    assert not is_market_open(datetime(2024, 3, 5, 16, 30, tzinfo=MARKET_TZ))
+    assert not is_market_open(datetime(2024, 3, 9, 11, 0, tzinfo=MARKET_TZ))  # Saturday
+
+
+def test_trailing_stop_ratchets_and_persists_only_new_highs(db):
+    user = _make_user(db)
+    alert = PriceAlert(user_id=user.id, symbol="NVDA", condition="trail_stop", target_price=0, threshold_pct=10)
+    db.add(alert)
+    db.commit()
+
+    assert not evaluate(alert, 100.0)
+    assert alert.target_price == 90.0
+    saved = alert.state
+
+    assert not evaluate(alert, 95.0)
+    assert alert.state is saved  # no new high, no write
+
+    assert not evaluate(alert, 120.0)
+    assert alert.target_price == 108.0
+    assert evaluate(alert, 107.5)
+    assert alert.triggered
+
+
+def test_percent_move_from_previous_close(db):
+    user = _make_user(db)
+    alert = PriceAlert(user_id=user.id, symbol="TSLA", condition="pct_down", target_price=0, threshold_pct=5)
+    db.add(alert)
+    db.commit()
+
+    assert not evaluate(alert, 96.0, previous_close=100.0)
+    assert alert.target_price == 95.0
+    assert evaluate(alert, 94.9, previous_close=100.0)
+
+
+def test_moving_average_cross_rolls_daily(db):
+    user = _make_user(db)
+    alert = PriceAlert(user_id=user.id, symbol="AAPL", condition="ma_above", target_price=0, ma_window=3)
+    db.add(alert)
+    db.commit()
+
+    history = {"data": [
+        {"date": "2024-03-01", "close": 10.0},
+        {"date": "2024-03-04", "close": 11.0},
+        {"date": "2024-03-05", "close": 12.0},
+    ]}
+    with patch("app.services.market_data_service.get_price_history", return_value=history) as hist:
+        assert not evaluate(alert, 10.0, previous_close=12.0, today="2024-03-06")
+        assert not evaluate(alert, 10.5, previous_close=12.0, today="2024-03-06")
+    assert hist.call_count == 1
+    assert alert.target_price == 11.0
+
+    # Next session: window becomes [11, 12, 9] -> MA 10.67; price crossing above fires
+    assert not evaluate(alert, 10.0, previous_close=9.0, today="2024-03-07")
+    assert alert.target_price == round(32 / 3, 4)
+    assert evaluate(alert, 11.0, previous_close=9.0, today="2024-03-07")
+
+
+def test_running_state_is_dropped_when_an_alert_finishes(db):
+    from app.services import alert_engine
+
+    user = _make_user(db)
+    kept, paused, deleted = (
+        PriceAlert(user_id=user.id, symbol=s, condition="trail_stop", target_price=0, threshold_pct=10)
+        for s in ("AAPL", "MSFT", "NVDA")
+    )
+    db.add_all([kept, paused, deleted])
+    db.commit()
+    for alert in (kept, paused, deleted):
+        evaluate(alert, 100.0)
+    db.commit()
+    ids = (kept.id, paused.id, deleted.id)
+    assert all(i in alert_engine._states for i in ids)
+
+    paused.is_active = False
+    db.delete(deleted)
+    db.commit()
+    assert [i in alert_engine._states for i in ids] == [True, False, False]
+
+    # Triggering commits the alert as finished too
+    evaluate(kept, 80.0)
+    db.commit()
+    assert kept.id not in alert_engine._states
+
+
+def test_moving_average_seed_retries_after_empty_history(db):
+    user = _make_user(db)
+    alert = PriceAlert(user_id=user.id, symbol="AAPL", condition="ma_above", target_price=0, ma_window=2)
+    db.add(alert)
+    db.commit()
+
+    history = {"data": [{"date": "2024-03-04", "close": 11.0}, {"date": "2024-03-05", "close": 13.0}]}
+    with patch("app.services.market_data_service.get_price_history", return_value={"data": []}):
+        assert not evaluate(alert, 10.0, previous_close=13.0, today="2024-03-06")
+    assert alert.state is None
+    with patch("app.services.market_data_service.get_price_history", return_value=history):
+        assert not evaluate(alert, 10.0, previous_close=13.0, today="2024-03-06")
+    assert alert.target_price == 12.0
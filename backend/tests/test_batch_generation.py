@@ -0,0 +1,200 @@
+import json
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.models.briefing import Briefing
+from app.models.conversation import Conversation
+from app.models.insight import Insight
+from app.models.subscription import Subscription
+from app.models.usage_tracking import UsageTracking
+from app.models.user import User
+from app.services import batch_generation, entitlement_service, llm_batch
+from app.services.llm_batch import BatchRequest
+
+INSIGHTS = json.dumps([
+    {"type": "nudge", "title": "Top up savings", "body": "b", "urgency": "low", "trigger": "low_savings"},
+])
+
+
+def _reply(**kwargs):
+    text = INSIGHTS if "actionable insights" in kwargs["system"] else "Good morning."
+    return NS(content=[NS(text=text)], usage=None)
+
+
+def _user(db, email, last_active, pro=False):
+    user = User(email=email, hashed_password="x", full_name=email)
+    db.add(user)
+    db.flush()
+    db.add(Conversation(user_id=user.id, title="Saving", updated_at=last_active))
+    if pro:
+        db.add(Subscription(user_id=user.id, status="active"))
+    return user
+
+
+def _run(db, day, reply=_reply):
+    client = MagicMock()
+    client.messages.create.side_effect = reply
+    with patch.object(settings, "LLM_BATCH_BACKEND", "local"), \
+            patch("app.services.llm_gateway.get_client", return_value=client), \
+            patch("app.services.market_snapshot.context", return_value="Market data unavailable."):
+        return batch_generation.run_nightly(db, day=day), client
+
+
+def test_nightly_run_writes_insights_and_briefings_for_active_users(db):
+    active = _user(db, "active@example.com", datetime.utcnow())
+    idle = _user(db, "idle@example.com", datetime.utcnow() - timedelta(days=60))
+    db.commit()
+    day = date(2026, 3, 2)
+
+    stats, client = _run(db, day)
+
+    assert stats == {"users": 1, "insights": 1, "briefings": 1}
+    assert client.messages.create.call_count == 2
+    insight = db.query(Insight).filter(Insight.user_id == active.id).one()
+    assert insight.trigger == "nightly_batch"
+    briefing = db.query(Briefing).filter(Briefing.user_id == active.id).one()
+    assert (briefing.kind, briefing.period_start, briefing.source) == ("daily", day, "batch")
+    assert briefing.briefing == "Good morning."
+    # The briefing prompt saw the insight generated earlier in the run
+    briefing_prompt = client.messages.create.call_args_list[1].kwargs["system"]
+    assert "Top up savings" in briefing_prompt
+    assert db.query(Briefing).filter(Briefing.user_id == idle.id).count() == 0
+
+
+def test_rerun_skips_users_already_done(db):
+    _user(db, "rerun@example.com", datetime.utcnow())
+    db.commit()
+    day = date(2026, 3, 2)
+
+    _run(db, day)
+    stats, client = _run(db, day)
+
+    assert stats["users"] == 0
+    client.messages.create.assert_not_called()
+
+
+def test_briefing_stored_meanwhile_is_kept_and_insights_survive(db):
+    from tests.conftest import TestingSessionLocal
+
+    user = _user(db, "meanwhile@example.com", datetime.utcnow())
+    db.commit()
+    day = date(2026, 3, 2)
+
+    def user_opens_app(**kwargs):
+        if "actionable insights" not in kwargs["system"]:
+            other = TestingSessionLocal()
+            other.add(Briefing(user_id=user.id, kind="daily", period_start=day, briefing="On demand."))
+            other.commit()
+            other.close()
+        return _reply(**kwargs)
+
+    stats, _ = _run(db, day, reply=user_opens_app)
+
+    assert (stats["insights"], stats["briefings"]) == (1, 0)
+    assert db.query(Briefing).filter(Briefing.user_id == user.id).one().briefing == "On demand."
+    assert db.query(Insight).filter(Insight.user_id == user.id).count() == 1
+
+
+def test_rerun_after_failed_briefing_does_not_repeat_insights(db):
+    user = _user(db, "retry@example.com", datetime.utcnow(), pro=True)
+    db.commit()
+    day = datetime.utcnow().date()
+
+    def briefing_fails(**kwargs):
+        if "actionable insights" not in kwargs["system"]:
+            raise RuntimeError("overloaded")
+        return _reply(**kwargs)
+
+    first, _ = _run(db, day, reply=briefing_fails)
+    second, client = _run(db, day)
+
+    assert (first["insights"], first["briefings"]) == (1, 0)
+    assert (second["insights"], second["briefings"]) == (0, 1)
+    assert client.messages.create.call_count == 1
+    assert db.query(Insight).filter(Insight.user_id == user.id).count() == 1
+
+
+def test_insights_respect_and_record_entitlement(db):
+    exhausted = _user(db, "exhausted@example.com", datetime.utcnow())
+    fresh = _user(db, "fresh@example.com", datetime.utcnow())
+    db.commit()
+    entitlement_service.increment_usage(db, exhausted.id, "insights")
+
+    stats, _ = _run(db, date(2026, 3, 2))
+
+    assert stats == {"users": 2, "insights": 1, "briefings": 2}
+    assert db.query(Insight).filter(Insight.user_id == exhausted.id).count() == 0
+    assert entitlement_service.get_usage(db, fresh.id, "insights") == 1
+    assert db.query(UsageTracking).filter(UsageTracking.user_id == exhausted.id).one().count == 1
+
+
+def test_query_count_does_not_grow_with_users(db):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        counts = []
+        for n in (5, 10):
+            # Earlier users go idle so each run sees only new ones
+            db.query(Conversation).update({Conversation.updated_at: datetime.utcnow() - timedelta(days=60)})
+            for i in range(n):
+                _user(db, f"user{n}-{i}@example.com", datetime.utcnow(), pro=True)
+            db.commit()
+            statements.clear()
+            stats, _ = _run(db, date(2026, 3, 2))
+            assert stats["briefings"] == n
+            counts.append(len(statements))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert counts[0] == counts[1]
+
+
+def test_api_backend_matches_results_by_custom_id():
+    batches = MagicMock()
+    batches.create.return_value = NS(id="msgbatch_1", processing_status="ended",
+                                     request_counts=NS(succeeded=1, errored=1, expired=0))
+    batches.results.return_value = [
+        NS(custom_id="b", result=NS(type="errored")),
+        NS(custom_id="a", result=NS(type="succeeded", message=NS(content=[NS(text="hi")], usage=None))),
+    ]
+    client = MagicMock()
+    client.messages.batches = batches
+    params = {"model": "claude-haiku-4-5-20251001", "max_tokens": 10, "messages": []}
+
+    with patch.object(settings, "LLM_BATCH_BACKEND", "api"), \
+            patch("app.services.llm_gateway.get_client", return_value=client):
+        results = llm_batch.run([BatchRequest("a", "insights", 1, params), BatchRequest("b", "insights", 2, params)])
+
+    assert results == {"a": "hi", "b": None}
+    submitted = batches.create.call_args.kwargs["requests"]
+    assert [r["custom_id"] for r in submitted] == ["a", "b"]
+
+
+def test_api_backend_submits_every_batch_before_polling():
+    manager = MagicMock()
+    batches = manager.batches
+    batches.create.side_effect = lambda requests: NS(id=requests[0]["custom_id"], processing_status="in_progress")
+    batches.retrieve.side_effect = lambda batch_id: NS(id=batch_id, processing_status="ended",
+                                                       request_counts=NS(succeeded=1, errored=0, expired=0))
+    batches.results.side_effect = lambda batch_id: [
+        NS(custom_id=batch_id, result=NS(type="succeeded", message=NS(content=[NS(text=batch_id)], usage=None))),
+    ]
+    client = MagicMock()
+    client.messages.batches = batches
+    params = {"model": "claude-haiku-4-5-20251001", "max_tokens": 10, "messages": []}
+
+    with patch.object(settings, "LLM_BATCH_BACKEND", "api"), \
+            patch.object(llm_batch, "MAX_BATCH_REQUESTS", 1), \
+            patch("app.services.llm_batch.time.sleep") as sleep, \
+            patch("app.services.llm_gateway.get_client", return_value=client):
+        results = llm_batch.run([BatchRequest(c, "insights", 1, params) for c in ("a", "b", "c")])
+
+    assert results == {"a": "a", "b": "b", "c": "c"}
+    calls = [name for name, _, _ in manager.mock_calls if name.startswith("batches.")]
+    assert calls[:4] == ["batches.create"] * 3 + ["batches.retrieve"]
+    assert sleep.call_count == 1
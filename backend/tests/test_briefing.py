@@ -0,0 +1,91 @@
+import threading
+from datetime import date
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+from app.models.briefing import Briefing
+from app.models.user import User
+from app.services import briefing_service
+from tests.conftest import TestingSessionLocal
+
+
+def _client(text="Good morning."):
+    client = MagicMock()
+    client.messages.create.return_value = NS(content=[NS(text=text)], usage=None)
+    return client
+
+
+def _offline():
+    return patch("app.services.market_data_service._get_info", side_effect=RuntimeError("offline"))
+
+
+def test_period_start_is_the_day_or_its_monday():
+    wednesday = date(2026, 3, 4)
+    assert briefing_service.period_start("daily", wednesday) == wednesday
+    assert briefing_service.period_start("weekly", wednesday) == date(2026, 3, 2)
+
+
+def test_daily_briefing_is_generated_once_and_then_served_from_storage(client, auth_headers):
+    llm = _client()
+    with patch("app.services.llm_gateway.get_client", return_value=llm), _offline():
+        first = client.get("/api/briefing/daily", headers=auth_headers).json()
+        second = client.get("/api/briefing/daily", headers=auth_headers).json()
+
+    assert llm.messages.create.call_count == 1
+    assert first == second
+    assert first["briefing"] == "Good morning."
+    assert first["market"] is None
+    assert "generated_at" in first
+
+
+def test_weekly_recap_is_stored_for_the_week(client, auth_headers, db):
+    llm = _client("Great week.")
+    with patch("app.services.llm_gateway.get_client", return_value=llm), _offline():
+        recap = client.get("/api/briefing/weekly", headers=auth_headers).json()
+        client.get("/api/briefing/weekly", headers=auth_headers)
+
+    assert llm.messages.create.call_count == 1
+    assert recap["stats"]["conversations"] == 0
+    row = db.query(Briefing).one()
+    assert (row.kind, row.period_start, row.source) == ("weekly", briefing_service.period_start("weekly"), "on_demand")
+
+
+def test_concurrent_first_requests_share_one_generation(db):
+    user = User(email="flight@example.com", hashed_password="x", full_name="Flight")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_generate(session, u):
+        calls.append(u.id)
+        started.set()
+        release.wait(5)
+        return {"briefing": "Morning.", "market": None, "active_plans": 0, "pending_insights": 0}
+
+    results = []
+
+    def request():
+        session = TestingSessionLocal()
+        try:
+            u = session.get(User, user_id)
+            results.append(briefing_service.get_briefing(session, u, "daily"))
+        finally:
+            session.close()
+
+    with patch.dict(briefing_service.GENERATORS, {"daily": slow_generate}):
+        threads = [threading.Thread(target=request) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(5)
+
+    assert calls == [user_id]
+    assert len(results) == 3
+    assert all(r["briefing"] == "Morning." for r in results)
@@ -22,3 +22,175 @@ def test_list_conversations_empty(client, subscribed_headers):
 def test_delete_nonexistent_conversation(client, subscribed_headers):
     response = client.delete("/api/chat/conversations/999", headers=subscribed_headers)
     assert response.status_code == 404
+
+
+class _FakeStream:
+    def __init__(self, *chunks):
+        from types import SimpleNamespace as NS
+
+        self._events = [NS(type="text", text=chunk) for chunk in chunks]
+        self._final = NS(
+            content=[NS(type="text", text="".join(chunks))],
+            usage=NS(input_tokens=50, cache_read_input_tokens=1800, cache_creation_input_tokens=0, output_tokens=5),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def get_final_message(self):
+        return self._final
+
+
+def test_stream_message_yields_deltas_then_persists(db):
+    from concurrent.futures import Future
+    from unittest.mock import MagicMock, patch
+
+    from app.models.conversation import Message
+    from app.models.user import User
+    from app.services import chat_service, llm_metrics
+
+    user = User(email="stream@example.com", hashed_password="x", full_name="Stream User")
+    db.add(user)
+    db.commit()
+
+    client = MagicMock()
+    client.messages.stream.return_value = _FakeStream("Hello", " there")
+    follow_ups = Future()
+    follow_ups.set_result(["What else?"])
+    cache_reads = llm_metrics.prompt_cache("chat")["cache_read_tokens"]
+    with patch("app.services.llm_gateway.get_client", return_value=client), \
+            patch("app.services.job_queue.enqueue", return_value=follow_ups) as enqueue, \
+            patch("app.services.event_bus.emit"):
+        events = list(chat_service.stream_message(db, user, None, "hi"))
+
+    types = [e["type"] for e in events]
+    assert types == ["conversation", "text", "text", "done", "follow_ups"]
+    assert events[-1]["follow_ups"] == ["What else?"]
+    assert [c.args[0] for c in enqueue.call_args_list] == ["memory.extract", "chat.follow_ups"]
+    assert "".join(e["delta"] for e in events if e["type"] == "text") == "Hello there"
+    done = events[3]
+    assert done["message"]["content"] == "Hello there"
+    assert db.query(Message).filter(Message.id == done["message"]["id"]).first().role == "assistant"
+    # Prompt-cache usage is read back from the gateway's metrics
+    assert llm_metrics.prompt_cache("chat")["cache_read_tokens"] == cache_reads + 1800
+
+
+def test_system_prompt_puts_stable_segments_first_with_breakpoints(db):
+    from app.models.financial_plan import FinancialPlan
+    from app.models.financial_profile import FinancialProfile
+    from app.models.user import User
+    from app.services import chat_service
+
+    user = User(email="cache@example.com", hashed_password="x", full_name="Cache User")
+    db.add(user)
+    db.commit()
+    profile = FinancialProfile(user_id=user.id, age=40, risk_tolerance="moderate")
+    plan = FinancialPlan(user_id=user.id, title="Buy NVDA", plan_type="wealth", data="{}")
+    db.add_all([profile, plan])
+    db.commit()
+
+    blocks = chat_service._build_system_prompt(user, db, extra="\n\nEarlier: budgeting")
+    assert blocks[0]["text"] == chat_service.SYSTEM_INSTRUCTIONS
+    assert "Age: 40" in blocks[1]["text"]
+    assert "NVDA" in blocks[2]["text"] and blocks[2]["text"].endswith("Earlier: budgeting")
+    assert [("cache_control" in b) for b in blocks] == [True, True, False]
+
+    messages = chat_service._with_history_breakpoint([{"role": "user", "content": "hi"}])
+    assert messages[0]["content"] == [{"type": "text", "text": "hi", "cache_control": {"type": "ephemeral"}}]
+
+
+def test_memory_goes_with_the_new_message_after_the_history_breakpoint():
+    from app.services import chat_service
+
+    history = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "what about NVDA?"},
+    ]
+    messages = chat_service._with_memory(history, "\n\nBehavioral Memory:\n- watched_tickers: NVDA")
+    messages = chat_service._with_history_breakpoint(messages, turn_start=2)
+
+    assert [b["text"] for b in messages[2]["content"]] == [
+        "Behavioral Memory:\n- watched_tickers: NVDA", "what about NVDA?",
+    ]
+    # The next turn resends the history up to here unchanged
+    assert messages[1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in messages[2]["content"][0]
+    assert messages[2]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in messages[0]["content"][-1]
+    assert history[2]["content"] == "what about NVDA?"
+
+
+def test_prompt_context_is_cached_until_a_write_commits(db):
+    from sqlalchemy import event
+
+    from app.models.financial_plan import FinancialPlan
+    from app.models.user import User
+    from app.services import prompt_context
+
+    user = User(email="ctx@example.com", hashed_password="x", full_name="Ctx User")
+    db.add(user)
+    db.commit()
+    db.add(FinancialPlan(user_id=user.id, title="Buy NVDA", plan_type="wealth", data="{}"))
+    db.commit()
+
+    statements = []
+    engine = db.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert "NVDA" in prompt_context.get_context(db, user.id)[1]
+        statements.clear()
+        assert "NVDA" in prompt_context.get_context(db, user.id)[1]
+        assert statements == []
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    plan = db.query(FinancialPlan).filter(FinancialPlan.user_id == user.id).first()
+    plan.title = "Buy NVDA, AMD"
+    db.commit()
+    assert "NVDA, AMD" in prompt_context.get_context(db, user.id)[1]
+
+
+def test_prompt_context_survives_memory_writes_but_not_summary_writes(db):
+    from sqlalchemy import event
+
+    from app.models.user import User
+    from app.models.user_memory import UserMemory
+    from app.services import prompt_context
+
+    user = User(email="mem-ctx@example.com", hashed_password="x", full_name="Mem Ctx User")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+
+    statements = []
+    engine = db.get_bind()
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert prompt_context.get_conversation_summary(db, user_id, 1) is None
+        # Memory extraction writes on nearly every turn
+        db.add(UserMemory(user_id=user_id, key="watched_tickers", value="NVDA"))
+        db.commit()
+        statements.clear()
+        assert prompt_context.get_conversation_summary(db, user_id, 1) is None
+        assert statements == []
+
+        db.add(UserMemory(user_id=user_id, key="conversation_summary_1", value='{"summary": "Budgeting"}'))
+        db.commit()
+        assert prompt_context.get_conversation_summary(db, user_id, 1) == {"summary": "Budgeting"}
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
@@ -0,0 +1,52 @@
+from types import SimpleNamespace as NS
+
+from app.services import context_window
+
+
+def _history(count, size=400):
+    return [
+        NS(id=i + 1, role="user" if i % 2 == 0 else "assistant", content=f"{i} " + "x" * size)
+        for i in range(count)
+    ]
+
+
+def test_short_history_is_sent_verbatim():
+    history = _history(4)
+    window = context_window.build(history, None, budget=10_000)
+    assert len(window.messages) == 4
+    assert window.summary_block == ""
+    assert window.sent_tokens == window.full_tokens
+
+
+def test_long_history_keeps_recent_turns_and_summary():
+    history = _history(41)
+    summary = {"summary": "Talked about Roth IRAs.", "key_facts": ["Age 34"], "summarized_through": 30}
+    window = context_window.build(history, summary, budget=1000)
+
+    # Messages after the summarized id are always kept; the window opens on a user turn
+    assert window.messages[0]["role"] == "user"
+    assert window.messages[-1]["content"].startswith("40 ")
+    assert len(window.messages) == 11
+    assert "Roth IRAs" in window.summary_block
+    assert window.sent_tokens < window.full_tokens / 3
+
+
+def test_sent_tokens_stay_flat_as_history_grows():
+    sent = []
+    for count in (41, 81, 161):
+        summary = {"summary": "Earlier chat.", "summarized_through": count - 6}
+        sent.append(context_window.build(_history(count), summary, budget=1000).sent_tokens)
+    # Within one step of the window start
+    step_tokens = context_window.START_STEP * context_window._message_tokens(_history(1)[0])
+    assert max(sent) - min(sent) < step_tokens
+
+
+def test_window_start_moves_in_steps():
+    summary = {"summary": "Earlier chat.", "summarized_through": 20}
+    starts = []
+    for count in range(41, 65, 2):  # one exchange per turn
+        window = context_window.build(_history(count), summary, budget=1000)
+        starts.append(window.messages[0]["content"].split()[0])
+    changes = sum(1 for a, b in zip(starts, starts[1:]) if a != b)
+    assert changes <= len(starts) * 2 // context_window.START_STEP
+    assert all(int(s) % context_window.START_STEP == 0 for s in starts)
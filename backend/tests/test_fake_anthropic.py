@@ -0,0 +1,83 @@
+import json
+from unittest.mock import patch
+
+import anthropic
+import pytest
+from fastapi.testclient import TestClient
+
+from app import fake_anthropic
+
+QUOTE_TOOL = {"name": "get_stock_quote", "description": "Quote", "input_schema": {"type": "object", "properties": {}}}
+
+
+@pytest.fixture
+def fake_client():
+    with patch.object(fake_anthropic.fake_settings, "LATENCY_MS", 0.0), \
+            patch.object(fake_anthropic.fake_settings, "TOKENS_PER_SECOND", 1e9):
+        yield anthropic.Anthropic(api_key="test", base_url="http://testserver", max_retries=0,
+                                  http_client=TestClient(fake_anthropic.app))
+
+
+def test_default_chat_calls_quote_tool_then_answers(fake_client):
+    messages = [{"role": "user", "content": "How is NVDA doing?"}]
+    first = fake_client.messages.create(model="m", max_tokens=200, tools=[QUOTE_TOOL], messages=messages)
+    tool_use = next(b for b in first.content if b.type == "tool_use")
+    assert first.stop_reason == "tool_use"
+    assert tool_use.input == {"symbol": "NVDA"}
+
+    messages += [
+        {"role": "assistant", "content": [b.model_dump() for b in first.content]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_use.id, "content": "{}"}]},
+    ]
+    with fake_client.messages.stream(model="m", max_tokens=200, tools=[QUOTE_TOOL], messages=messages) as stream:
+        deltas = [e.text for e in stream if e.type == "text"]
+        final = stream.get_final_message()
+    assert len(deltas) > 1
+    assert final.stop_reason == "end_turn"
+    assert "".join(deltas) == final.content[0].text
+
+
+def test_json_call_sites_get_valid_json_and_cache_is_simulated(fake_client):
+    system = [{"type": "text", "text": "Return ONLY the JSON array. " * 50, "cache_control": {"type": "ephemeral"}}]
+    messages = [{"role": "user", "content": "insights please"}]
+    first = fake_client.messages.create(model="m", max_tokens=100, system=system, messages=messages)
+    second = fake_client.messages.create(model="m", max_tokens=100, system=system, messages=messages)
+    assert json.loads(first.content[0].text) == []
+    assert first.usage.cache_creation_input_tokens > 0
+    assert second.usage.cache_read_input_tokens == first.usage.cache_creation_input_tokens
+
+
+def test_scripted_tool_sequence_and_errors(fake_client, tmp_path):
+    script = tmp_path / "script.json"
+    script.write_text(json.dumps({"rules": [{"match": "compare", "steps": [
+        {"tool_use": [{"name": "get_stock_quote", "input": {"symbol": "AAPL"}},
+                      {"name": "get_stock_quote", "input": {"symbol": "MSFT"}}]},
+        {"text": "Done comparing."},
+    ]}]}))
+    with patch.object(fake_anthropic.fake_settings, "SCRIPT", str(script)), patch.object(fake_anthropic, "_rules", None):
+        reply = fake_client.messages.create(model="m", max_tokens=100, messages=[{"role": "user", "content": "compare them"}])
+    assert [b.input["symbol"] for b in reply.content] == ["AAPL", "MSFT"]
+
+    with patch.object(fake_anthropic.fake_settings, "OVERLOAD_RATE", 1.0):
+        with pytest.raises(anthropic.InternalServerError) as exc:
+            fake_client.messages.create(model="m", max_tokens=10, messages=[{"role": "user", "content": "hi"}])
+    assert exc.value.status_code == 529
+
+
+def test_batches_run_through_the_api_backend(fake_client):
+    from app.config import settings
+    from app.services import llm_batch
+
+    params = {"model": "m", "max_tokens": 100, "system": "Return ONLY the JSON array.",
+              "messages": [{"role": "user", "content": "insights please"}]}
+    requests = [llm_batch.BatchRequest(f"insights-{i}", "insights", i, params) for i in range(3)]
+    with patch.object(settings, "LLM_BATCH_BACKEND", "api"), \
+            patch("app.services.llm_gateway.get_client", return_value=fake_client):
+        assert llm_batch.run(requests) == {"insights-0": "[]", "insights-1": "[]", "insights-2": "[]"}
+
+    with patch.object(fake_anthropic.fake_settings, "LATENCY_MS", 60_000.0):
+        batch = fake_client.messages.batches.create(requests=[{"custom_id": "x", "params": params}])
+    assert batch.processing_status == "in_progress"
+    canceled = fake_client.messages.batches.cancel(batch.id)
+    assert canceled.processing_status == "ended" and canceled.request_counts.canceled == 1
+    assert [r.result.type for r in fake_client.messages.batches.results(batch.id)] == ["canceled"]
@@ -0,0 +1,62 @@
+import threading
+from unittest.mock import patch
+
+from app.services import job_queue
+
+
+def test_enqueue_coalesces_waiting_jobs():
+    gate = threading.Event()
+    seen = []
+
+    def blocker():
+        gate.wait(2)
+
+    def collect(items):
+        seen.append(items)
+        return len(items)
+
+    job_queue.register("test.block", blocker)
+    job_queue.register("test.collect", collect, merge=lambda old, new: {"items": old["items"] + new["items"]})
+
+    # Occupy every worker so the collect jobs stay queued
+    blockers = [job_queue.enqueue("test.block") for _ in range(job_queue.WORKERS)]
+    first = job_queue.enqueue("test.collect", coalesce_key="u1", items=[1])
+    second = job_queue.enqueue("test.collect", coalesce_key="u1", items=[2])
+    gate.set()
+
+    assert first is second
+    assert first.result(timeout=2) == 2
+    assert seen == [[1, 2]]
+    for b in blockers:
+        b.result(timeout=2)
+
+
+def test_failed_job_is_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise RuntimeError("transient")
+        return "ok"
+
+    job_queue.register("test.flaky", flaky, max_attempts=3)
+    with patch.object(job_queue, "BASE_RETRY_DELAY", 0.01):
+        assert job_queue.enqueue("test.flaky").result(timeout=2) == "ok"
+    assert len(attempts) == 2
+
+
+def test_on_failure_runs_once_retries_are_exhausted():
+    failed = []
+
+    def broken(message_id):
+        raise RuntimeError("down")
+
+    job_queue.register("test.broken", broken, max_attempts=2, on_failure=lambda **kw: failed.append(kw))
+    with patch.object(job_queue, "BASE_RETRY_DELAY", 0.01):
+        future = job_queue.enqueue("test.broken", message_id=7)
+        try:
+            future.result(timeout=2)
+        except RuntimeError:
+            pass
+    assert failed == [{"message_id": 7}]
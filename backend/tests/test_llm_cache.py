@@ -0,0 +1,70 @@
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.user import User
+from app.services import llm_cache
+
+
+def _client(*texts):
+    client = MagicMock()
+    client.messages.create.side_effect = [NS(content=[NS(text=t)], usage=None) for t in texts]
+    return client
+
+
+def _create(user_id, inputs):
+    return llm_cache.create_text(
+        "budget_insights", user_id, inputs=inputs,
+        model="claude-haiku-4-5-20251001", max_tokens=500, messages=[{"role": "user", "content": "x"}],
+    )
+
+
+def test_identical_inputs_reuse_the_response():
+    client = _client("first", "second")
+    with patch("app.services.llm_gateway.get_client", return_value=client):
+        assert _create(1, ["- Rent: $1000.00/month"]) == "first"
+        assert _create(1, ["- Rent: $1000.00/month"]) == "first"
+        assert _create(1, ["- Rent: $1200.00/month"]) == "second"
+
+    assert client.messages.create.call_count == 2
+
+
+def test_expired_entries_are_regenerated():
+    client = _client("first", "second")
+    with patch("app.services.llm_gateway.get_client", return_value=client), \
+            patch.dict(llm_cache.TTL_SECONDS, {"budget_insights": 0}):
+        _create(1, ["a"])
+        assert _create(1, ["a"]) == "second"
+
+
+def test_writes_to_source_rows_invalidate_the_users_entries(db):
+    user = User(email="cache@example.com", hashed_password="x", full_name="Cache User")
+    db.add(user)
+    db.commit()
+
+    with patch("app.services.llm_gateway.get_client", return_value=_client("first")):
+        _create(user.id, ["a"])
+    assert llm_cache.get_stats()["entries"] > 0
+
+    db.add(RecurringTransaction(user_id=user.id, name="Rent", amount=1000.0))
+    db.commit()
+
+    assert llm_cache.get_stats()["entries"] == 0
+
+
+def test_budget_insights_endpoint_hits_cache_on_repeat_views(client):
+    client.post("/api/auth/register", json={"email": "b@example.com", "password": "pw123456", "full_name": "B"})
+    token = client.post("/api/auth/login", json={"email": "b@example.com", "password": "pw123456"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/api/budget/", json={"name": "Salary", "amount": 5000, "type": "income"}, headers=headers)
+
+    fake = _client("Save more.", "Spend less.")
+    with patch("app.services.llm_gateway.get_client", return_value=fake):
+        first = client.get("/api/budget/insights", headers=headers).json()
+        second = client.get("/api/budget/insights", headers=headers).json()
+        client.post("/api/budget/", json={"name": "Rent", "amount": 1500}, headers=headers)
+        third = client.get("/api/budget/insights", headers=headers).json()
+
+    assert first == second == {"analysis": "Save more."}
+    assert third == {"analysis": "Spend less."}
+    assert fake.messages.create.call_count == 2
@@ -0,0 +1,151 @@
+import threading
+import time
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+import anthropic
+import httpx
+import pytest
+
+from app.services import llm_gateway
+
+
+def _overloaded():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(529, request=request, headers={"retry-after": "0"})
+    return anthropic.InternalServerError("Overloaded", response=response, body=None)
+
+
+def test_create_retries_overloaded_then_succeeds():
+    client = MagicMock()
+    client.messages.create.side_effect = [_overloaded(), NS(content=[NS(text="ok")])]
+    with patch("app.services.llm_gateway.get_client", return_value=client):
+        response = llm_gateway.create(feature="test", model="m", max_tokens=5, messages=[])
+    assert response.content[0].text == "ok"
+    assert client.messages.create.call_count == 2
+
+
+def test_create_does_not_retry_bad_request():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    error = anthropic.BadRequestError("bad", response=httpx.Response(400, request=request), body=None)
+    client = MagicMock()
+    client.messages.create.side_effect = error
+    with patch("app.services.llm_gateway.get_client", return_value=client):
+        with pytest.raises(anthropic.BadRequestError):
+            llm_gateway.create(feature="test", model="m", max_tokens=5, messages=[])
+    assert client.messages.create.call_count == 1
+
+
+def test_interactive_waiters_go_before_background():
+    slots = llm_gateway._PrioritySemaphore(limit=2, reserved=1)
+    order = []
+
+    def worker(priority, name):
+        slots.acquire(priority)
+        order.append(name)
+        slots.release()
+
+    slots.acquire(llm_gateway.INTERACTIVE)
+    slots.acquire(llm_gateway.INTERACTIVE)
+    background = threading.Thread(target=worker, args=(llm_gateway.BACKGROUND, "background"))
+    background.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=worker, args=(llm_gateway.INTERACTIVE, "interactive"))
+    interactive.start()
+    time.sleep(0.05)
+
+    slots.release()
+    interactive.join(1)
+    slots.release()
+    background.join(1)
+    assert order == ["interactive", "background"]
+
+
+def test_waiting_for_a_busy_model_does_not_hold_a_global_slot():
+    global_slots = llm_gateway._PrioritySemaphore(limit=2, reserved=1)
+    model_slots = {"busy": llm_gateway._PrioritySemaphore(limit=1, reserved=1)}
+
+    def wait_for_busy_model():
+        with llm_gateway._slot("busy", llm_gateway.INTERACTIVE):
+            pass
+
+    with patch.object(llm_gateway, "_global_slots", global_slots), \
+            patch.object(llm_gateway, "_model_slots", model_slots):
+        with llm_gateway._slot("busy", llm_gateway.INTERACTIVE):
+            waiter = threading.Thread(target=wait_for_busy_model)
+            waiter.start()
+            time.sleep(0.05)
+            assert global_slots.in_use == 1
+            # Another model still gets the remaining global slot
+            with llm_gateway._slot("other", llm_gateway.INTERACTIVE):
+                assert global_slots.in_use == 2
+        waiter.join(1)
+    assert global_slots.in_use == 0
+
+
+def test_calls_are_recorded_per_feature_and_user(db):
+    from app.models.llm_usage import LLMUsage
+    from app.models.user import User
+    from app.services import llm_metrics
+
+    user = User(email="llm@example.com", hashed_password="x", full_name="LLM User")
+    db.add(user)
+    db.commit()
+    llm_metrics.flush(db)  # drop counts left by other tests
+
+    usage = NS(input_tokens=1000, output_tokens=200, cache_read_input_tokens=4000, cache_creation_input_tokens=0)
+    client = MagicMock()
+    client.messages.create.side_effect = [_overloaded(), NS(content=[], usage=usage)]
+    with patch("app.services.llm_gateway.get_client", return_value=client):
+        llm_gateway.create(feature="metrics_test", user_id=user.id, model="claude-haiku-4-5-20251001",
+                           max_tokens=5, messages=[])
+
+    live = llm_metrics.snapshot()["metrics_test"]
+    assert live["calls"] == 1 and live["retries"] == 1
+    assert live["p95_latency_ms"] >= 0
+
+    assert llm_metrics.flush(db) == 1
+    row = db.query(LLMUsage).filter(LLMUsage.feature == "metrics_test").one()
+    assert (row.user_id, row.input_tokens, row.output_tokens, row.cache_read_tokens) == (user.id, 1000, 200, 4000)
+    # 1000 + 4000 * 0.1 input at $1/M, 200 output at $5/M
+    assert row.cost_usd == pytest.approx(0.0024)
+
+
+def test_flush_adds_to_counts_written_by_another_worker(db):
+    from app.models.llm_usage import LLMUsage
+    from app.services import llm_metrics
+    from tests.conftest import TestingSessionLocal
+
+    llm_metrics.flush(db)  # drop counts left by other tests
+    llm_metrics.record("flush_test", "m", 10.0)
+    llm_metrics.flush(db)
+    row = db.query(LLMUsage).filter(LLMUsage.feature == "flush_test").one()
+    assert row.calls == 1
+
+    # Another worker flushes meanwhile; this session still holds the row it loaded
+    other = TestingSessionLocal()
+    other.query(LLMUsage).filter(LLMUsage.id == row.id).update({LLMUsage.calls: LLMUsage.calls + 5})
+    other.commit()
+    other.close()
+
+    llm_metrics.record("flush_test", "m", 10.0)
+    llm_metrics.flush(db)
+    db.expire_all()
+    assert db.query(LLMUsage).filter(LLMUsage.feature == "flush_test").one().calls == 7
+
+
+def test_llm_usage_endpoint_reports_pending_counts_without_writing(client, db):
+    from app.models.llm_usage import LLMUsage
+    from app.services import llm_metrics
+
+    llm_metrics.flush(db)  # drop counts left by other tests
+    llm_metrics.record("endpoint_test", "m", 10.0, usage=NS(input_tokens=7, output_tokens=3))
+
+    response = client.get("/api/admin/llm-usage")
+
+    assert response.status_code == 200
+    feature = next(f for f in response.json()["features"] if f["feature"] == "endpoint_test")
+    assert (feature["calls"], feature["input_tokens"]) == (1, 7)
+    assert db.query(LLMUsage).filter(LLMUsage.feature == "endpoint_test").count() == 0
+    assert llm_metrics.flush(db) == 1
+
@@ -69,3 +69,63 @@ def test_get_history(client):
         assert data["symbol"] == "AAPL"
         assert len(data["data"]) == 2
         assert data["data"][0]["close"] == 174.0
+
+
+def test_quote_hub_polls_each_symbol_once():
+    import asyncio
+
+    from app.services.quote_stream import QuoteHub
+
+    async def scenario():
+        hub = QuoteHub(interval=0.01)
+        with patch("app.services.quote_stream.get_stock_quote", return_value={"symbol": "AAPL", "price": 1.0}) as quote, \
+                patch("app.services.quote_stream.is_market_open", return_value=True):
+            first = hub.subscribe(["AAPL"])
+            second = hub.subscribe(["aapl", "MSFT"])
+            assert hub.subscriber_count("AAPL") == 2
+            assert sorted(hub.symbols) == ["AAPL", "MSFT"]
+
+            assert (await asyncio.wait_for(first.get(), 1))["price"] == 1.0
+            assert (await asyncio.wait_for(second.get(), 1))["price"] == 1.0
+            await asyncio.sleep(0.05)
+
+            # Unchanged quotes are not re-broadcast, and AAPL is polled by a single task
+            assert first.empty()
+            aapl_calls = [c for c in quote.call_args_list if c.args[0] == "AAPL"]
+            msft_calls = [c for c in quote.call_args_list if c.args[0] == "MSFT"]
+            assert abs(len(aapl_calls) - len(msft_calls)) <= 1
+
+            hub.unsubscribe(first, ["AAPL"])
+            hub.unsubscribe(second, ["AAPL", "MSFT"])
+            assert hub.symbols == []
+
+    asyncio.run(scenario())
+
+
+def test_extract_tickers_from_symbols_and_names():
+    from app.services.symbol_master import extract_tickers
+
+    text = "Compare AAPL with nvidia and Berkshire Hathaway. Is IT time to buy $T? NOW or LOW?"
+    assert extract_tickers(text) == ["AAPL", "NVDA", "BRK-B", "T"]
+
+
+def test_prefetch_warms_cache_with_one_fetch_per_symbol():
+    import time as _time
+    from concurrent.futures import wait
+
+    from app.services import market_data_service
+
+    def slow_ticker(symbol):
+        _time.sleep(0.1)
+        return type("T", (), {"info": {"shortName": symbol, "currentPrice": 10.0}})()
+
+    market_data_service._cache.pop("info:ZZZA", None)
+    with patch("app.services.market_data_service.yf.Ticker", side_effect=slow_ticker) as ticker:
+        futures = market_data_service.prefetch_info(["ZZZA"])
+        # A tool call arriving mid-fetch joins the in-flight request
+        quote = market_data_service.get_stock_quote("ZZZA")
+        wait(futures)
+        market_data_service.get_stock_quote("ZZZA")
+
+    assert quote["price"] == 10.0
+    assert ticker.call_count == 1
@@ -0,0 +1,35 @@
+import json
+from unittest.mock import patch
+
+from app.services import market_snapshot
+
+CHANGES = {"SPY": 0.5, "NVDA": 4.2, "TSLA": -3.1, "XLE": 1.8, "XLK": -0.9}
+
+
+def _info(symbol, max_age=None):
+    return {
+        "shortName": symbol,
+        "currentPrice": 100.0,
+        "regularMarketChangePercent": CHANGES.get(symbol, 0.0),
+    }
+
+
+def test_snapshot_is_built_once_and_shared():
+    with patch("app.services.market_data_service._get_info", side_effect=_info) as fetch:
+        first = market_snapshot.context()
+        fetches = fetch.call_count
+        second = market_snapshot.context()
+
+    assert first is second
+    assert fetch.call_count == fetches
+    data = json.loads(first)
+    assert data["sp500_change_pct"] == 0.5
+    assert data["top_gainers"][0]["symbol"] == "NVDA"
+    assert data["top_losers"][0]["symbol"] == "TSLA"
+    assert data["sectors"][0]["etf"] == "XLE"
+    assert data["sectors"][-1]["etf"] == "XLK"
+
+
+def test_unavailable_when_the_index_quote_fails():
+    with patch("app.services.market_data_service._get_info", side_effect=RuntimeError("offline")):
+        assert market_snapshot.context() == market_snapshot.UNAVAILABLE
@@ -0,0 +1,53 @@
+import json
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+from app.models.conversation import Conversation, Message
+from app.models.user import User
+from app.services import memory_service
+
+
+def _reply(summary):
+    return NS(content=[NS(text=json.dumps({"summary": summary, "key_facts": [], "action_items": []}))])
+
+
+def _add_messages(db, conversation, start, count):
+    for i in range(start, start + count):
+        db.add(Message(conversation_id=conversation.id, role="user" if i % 2 == 0 else "assistant", content=f"msg {i}"))
+    db.commit()
+
+
+def test_summary_folds_only_new_messages(db):
+    user = User(email="mem@example.com", hashed_password="x", full_name="Mem User")
+    db.add(user)
+    db.commit()
+    conversation = Conversation(user_id=user.id)
+    db.add(conversation)
+    db.commit()
+
+    client = MagicMock()
+    client.messages.create.side_effect = [_reply("first"), _reply("second")]
+    with patch("app.services.llm_gateway.get_client", return_value=client):
+        _add_messages(db, conversation, 0, memory_service.SUMMARY_THRESHOLD)
+        memory_service.summarize_conversation(db, user.id, conversation.id)
+
+        # Not enough new messages yet: no model call
+        _add_messages(db, conversation, 10, 2)
+        summary = memory_service.get_conversation_summary(db, user.id, conversation.id)
+        assert not memory_service.summary_due(summary, 12)
+        memory_service.summarize_conversation(db, user.id, conversation.id)
+        assert client.messages.create.call_count == 1
+
+        _add_messages(db, conversation, 12, 4)
+        assert memory_service.summary_due(summary, 16)
+        memory_service.summarize_conversation(db, user.id, conversation.id)
+
+    prompt = client.messages.create.call_args.kwargs["messages"][0]["content"]
+    assert '"summary": "first"' in prompt
+    assert "msg 10" in prompt and "msg 9" not in prompt
+
+    stored = memory_service.get_conversation_summary(db, user.id, conversation.id)
+    last_id = db.query(Message).order_by(Message.id.desc()).first().id
+    assert stored["summary"] == "second"
+    assert stored["message_count"] == 16
+    assert stored["summarized_through"] == last_id
@@ -0,0 +1,63 @@
+from app.models.user import User
+from app.models.user_memory import UserMemory
+from app.services import memory_index
+
+MEMORIES = {
+    "risk_tolerance": "conservative, dislikes volatility",
+    "watched_tickers": "NVDA, AMD, TSM",
+    "home_purchase": "saving for a house down payment in 2027",
+    "retirement_account": "maxes out 401k every year",
+    "debt": "student loans at 5 percent",
+    "employer": "works at a hospital",
+    "kids": "two children, college savings in 529",
+    "car": "plans to buy an electric car",
+    "travel": "budgets for one trip abroad per year",
+}
+
+
+def _user(db, memories=MEMORIES):
+    user = User(email="idx@example.com", hashed_password="x", full_name="Idx User")
+    db.add(user)
+    db.commit()
+    db.add_all([UserMemory(user_id=user.id, key=k, value=v) for k, v in memories.items()])
+    db.commit()
+    return user
+
+
+def test_search_ranks_relevant_memories_first(db):
+    user = _user(db)
+
+    keys = [key for key, _ in memory_index.search(db, user.id, "Should I add more NVDA?", k=3)]
+    assert keys[0] == "watched_tickers"
+    assert len(keys) == 3
+    assert memory_index.search(db, user.id, "how much house can I afford", k=1)[0][0] == "home_purchase"
+
+
+def test_small_memory_sets_are_returned_whole(db):
+    user = _user(db, {"risk_tolerance": "aggressive", "debt": "none"})
+
+    assert {key for key, _ in memory_index.search(db, user.id, "anything")} == {"risk_tolerance", "debt"}
+
+
+def test_index_is_updated_incrementally_on_commit(db):
+    user = _user(db)
+    memory_index.search(db, user.id, "warm the index")
+
+    db.add(UserMemory(user_id=user.id, key="crypto", value="holds some bitcoin"))
+    memory = db.query(UserMemory).filter(UserMemory.key == "watched_tickers").one()
+    db.delete(memory)
+    db.add(UserMemory(user_id=user.id, key="conversation_summary_1", value="bitcoin chat"))
+    db.commit()
+
+    index = memory_index._indexes[user.id]
+    assert {d.key for d in index.docs.values()} == set(MEMORIES) - {"watched_tickers"} | {"crypto"}
+    assert memory_index.search(db, user.id, "bitcoin", k=1)[0][0] == "crypto"
+    assert index.df["nvda"] == 0
+
+
+def test_memory_block_truncates_long_values_to_the_newest_part(db):
+    user = _user(db, {"watched_tickers": "OLD, " * 200 + "NEWEST"})
+
+    block = memory_index.memory_block(db, user.id, "tickers")
+    assert block.rstrip().endswith("NEWEST")
+    assert len(block) < memory_index.VALUE_CHARS + 200
@@ -0,0 +1,54 @@
+from types import SimpleNamespace as NS
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import settings
+from app.services import model_router
+
+
+@pytest.mark.parametrize("message", ["thanks!", "Hi there", "ok", "What's AAPL trading at?", "nvidia price", "$T"])
+def test_simple_turns_go_to_fast_model(message):
+    route = model_router.route(message)
+    assert (route.tier, route.model) == (model_router.FAST, settings.CHAT_FAST_MODEL)
+    assert route.max_tokens == settings.CHAT_FAST_MAX_TOKENS
+
+
+@pytest.mark.parametrize("message", [
+    "Should I rebalance my portfolio toward bonds?",
+    "Compare AAPL and MSFT",
+    "Help me plan for retirement in 20 years",
+    "What's the price of AAPL? " + "Also tell me about the company's history and competitors. " * 4,
+    "Tell me something interesting",
+])
+def test_analysis_and_unclear_turns_stay_on_large_model(message):
+    route = model_router.route(message)
+    assert (route.tier, route.model) == (model_router.FULL, settings.CLAUDE_MODEL)
+
+
+@pytest.mark.parametrize("message", ["ok", "sure", "cool", "nvidia price"])
+def test_later_turns_stay_on_large_model(message):
+    route = model_router.route(message, first_turn=False)
+    assert (route.tier, route.reason) == (model_router.FULL, "mid-conversation")
+
+
+def test_classifier_decides_unclear_turns_and_falls_back_on_error():
+    client = MagicMock()
+    client.messages.create.side_effect = [NS(content=[NS(text="SIMPLE")], usage=None), RuntimeError("boom")]
+    with patch("app.services.llm_gateway.get_client", return_value=client), \
+            patch.object(settings, "CHAT_ROUTER_CLASSIFIER", True):
+        assert model_router.route("Tell me something interesting").tier == model_router.FAST
+        assert model_router.route("Tell me something else").reason == "classifier failed"
+        # Heuristics still decide clear cases without a model call
+        model_router.route("thanks")
+
+    assert client.messages.create.call_count == 2
+
+
+def test_stats_report_latency_per_tier():
+    route = model_router.route("thanks")
+    model_router.record_turn(route, 120.0, 400.0)
+
+    fast = model_router.get_stats()["tiers"]["fast"]
+    assert fast["turns"] >= 1 and fast["reasons"]["chit-chat"] >= 1
+    assert fast["p50_total_ms"] > 0
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from app.models.news_article import NewsArticle, NewsArticleSymbol
+from app.services import news_service
+
+
+def _items(*titles_and_times):
+    return [{"title": t, "publisher": "Wire", "link": "", "providerPublishTime": ts} for t, ts in titles_and_times]
+
+
+def test_news_merges_dedupes_and_caches(db):
+    news_service._cache.clear()
+    feeds = {
+        "AAPL": _items(("Apple beats estimates", 300), ("Chip stocks rally!", 100)),
+        "NVDA": _items(("chip stocks rally", 200), ("Nvidia unveils GPU", 50)),
+    }
+
+    with patch("app.services.news_service.yf.Ticker") as ticker:
+        ticker.side_effect = lambda sym: type("T", (), {"news": feeds[sym]})()
+        articles = news_service.get_news(db, ["AAPL", "NVDA"])
+        news_service.get_news(db, ["AAPL", "NVDA"])
+
+    # Second call is served from cache
+    assert ticker.call_count == 2
+    # The rally story appears once, at its newest position
+    assert [a["title"] for a in articles] == ["Apple beats estimates", "chip stocks rally", "Nvidia unveils GPU"]
+    # Stored once, linked to both symbols
+    assert db.query(NewsArticle).count() == 3
+    assert db.query(NewsArticleSymbol).count() == 4
+    # Links carry the time each feed reported, for the (symbol, published) index
+    links = db.query(NewsArticleSymbol).order_by(NewsArticleSymbol.symbol, NewsArticleSymbol.published)
+    assert [(link.symbol, link.published) for link in links] == [("AAPL", 100), ("AAPL", 300), ("NVDA", 50), ("NVDA", 200)]
+
+
+def test_news_parses_nested_content_items():
+    item = {"content": {
+        "title": "Fed holds rates",
+        "pubDate": "2024-03-05T14:00:00Z",
+        "provider": {"displayName": "Reuters"},
+        "canonicalUrl": {"url": "https://example.com/fed"},
+    }}
+    parsed = news_service._parse_item(item)
+    assert parsed["title"] == "Fed holds rates"
+    assert parsed["publisher"] == "Reuters"
+    assert parsed["link"] == "https://example.com/fed"
+    assert parsed["published"] == 1709647200
+
+
+def test_sentiment_matches_whole_words_only():
+    from app.services.sentiment_service import classify
+
+    assert classify("Apple shares follow Microsoft again") == "neutral"
+    assert classify("Nvidia stock surges to record high") == "bullish"
+    assert classify("Stocks tumble as recession fears mount") == "bearish"
+    # The negation window may start inside a word; a "not" cut from "cannot" doesn't count
+    assert classify("Rivals cannot fathom semiconductor-equipment-name surge") == "bullish"
+
+
+def test_sentiment_negation_and_batch():
+    from app.services.sentiment_service import classify_batch, score_batch
+
+    headlines = ["Tesla fails to beat estimates", "Fed eases recession fears", "Tesla fails to beat estimates"]
+    assert classify_batch(headlines) == ["bearish", "bullish", "bearish"]
+    scores = score_batch(headlines)
+    assert scores[0] == scores[2] < 0
+
+
+def test_sentiment_negation_stops_at_clause_breaks():
+    from app.services.sentiment_service import classify, score_batch
+
+    assert classify("No surprise: Nvidia surges") == "bullish"
+    assert classify("Not again, Nvidia surges") == "bullish"
+    assert classify("Stocks cannot rally") == "bearish"
+    assert classify("Stocks can't rally") == "bearish"
+    # Cached per scored text, so punctuation-only differences keep their own scores
+    assert score_batch(["Markets sell-off", "Markets sell off"]) == [-2.0, -1.0]
+    assert score_batch(["Markets sell off", "Markets sell-off"]) == [-1.0, -2.0]
@@ -0,0 +1,142 @@
+import dataclasses
+import json
+import time
+from unittest.mock import patch
+
+from app.claude_tools import executor, registry
+
+
+def _slow_quote(symbol):
+    time.sleep(0.2)
+    return {"symbol": symbol}
+
+
+def test_registry_covers_every_tool_definition():
+    from app.claude_tools.definitions import TOOLS
+
+    assert sorted(s["name"] for s in registry.schemas()) == sorted(t["name"] for t in TOOLS)
+
+
+def test_execute_tools_runs_market_tools_concurrently_in_order():
+    calls = [("get_stock_quote", {"symbol": s}) for s in ("AAPL", "MSFT", "NVDA", "AMZN")]
+    with patch("app.claude_tools.executor.market_data_service.get_stock_quote", side_effect=_slow_quote):
+        started = time.monotonic()
+        results = executor.execute_tools(calls)
+        elapsed = time.monotonic() - started
+
+    assert [r.data["symbol"] for r in results] == ["AAPL", "MSFT", "NVDA", "AMZN"]
+    assert [json.loads(r.content) for r in results] == [r.data for r in results]
+    assert elapsed < 0.6
+
+
+def test_execute_tools_times_out_slow_tool():
+    calls = [("get_stock_quote", {"symbol": "AAPL"}), ("get_financial_plans", {})]
+    with patch("app.claude_tools.executor.market_data_service.get_stock_quote", side_effect=_slow_quote), \
+            patch.dict(registry.REGISTRY, {"get_stock_quote": dataclasses.replace(registry.REGISTRY["get_stock_quote"], timeout=0.05)}):
+        results = executor.execute_tools(calls)
+
+    assert "timed out" in results[0].data["error"]
+    assert results[1].data["plans"] == []
+
+
+def test_tool_results_are_cached_per_arguments():
+    with patch("app.claude_tools.executor.market_data_service.get_stock_quote", side_effect=_slow_quote) as quote:
+        first = executor.execute_tools([("get_stock_quote", {"symbol": "AAPL"})])[0]
+        second = executor.execute_tools([("get_stock_quote", {"symbol": "AAPL"})])[0]
+        executor.execute_tools([("get_stock_quote", {"symbol": "MSFT"})])
+
+    assert quote.call_count == 2
+    assert second is first
+
+
+def test_errors_are_not_cached():
+    with patch("app.claude_tools.executor.market_data_service.get_stock_quote", side_effect=ValueError("down")) as quote:
+        assert executor.execute_tool("get_stock_quote", {"symbol": "AAPL"}) == '{"error": "down"}'
+        executor.execute_tool("get_stock_quote", {"symbol": "AAPL"})
+
+    assert quote.call_count == 2
+
+
+def test_price_history_is_compacted_to_key_stats():
+    history = {
+        "symbol": "AAPL", "period": "3mo", "interval": "1d",
+        "data": [
+            {"date": f"2024-01-{d:02d}", "open": 1.0, "high": 100.0 + d, "low": 90.0 + d, "close": 95.0 + d, "volume": 1000}
+            for d in range(1, 31)
+        ],
+    }
+    with patch("app.claude_tools.executor.market_data_service.get_price_history", return_value=history):
+        result = json.loads(executor.execute_tool("get_price_history", {"symbol": "AAPL", "period": "3mo"}))
+
+    assert "data" not in result
+    assert (result["start_close"], result["end_close"], result["high"], result["low"]) == (96.0, 125.0, 130.0, 91.0)
+    assert len(result["recent_closes"]) == executor.HISTORY_RECENT_CLOSES
+
+
+def test_batch_quotes_return_one_compact_table():
+    infos = {s: {"shortName": s.title(), "currentPrice": p} for s, p in (("AAPL", 190.0), ("MSFT", 410.0))}
+
+    def fake_info(symbol, max_age=None):
+        if symbol not in infos:
+            raise ValueError("not found")
+        return infos[symbol]
+
+    with patch("app.services.market_data_service._get_info", side_effect=fake_info):
+        result = json.loads(executor.execute_tool("get_stock_quotes", {"symbols": ["aapl", "MSFT", "AAPL", "NOPE"]}))
+
+    assert result["columns"][:3] == ["symbol", "name", "price"]
+    assert [row[:3] for row in result["rows"]] == [["AAPL", "Aapl", 190.0], ["MSFT", "Msft", 410.0]]
+    assert result["errors"] == {"NOPE": "not found"}
+
+
+def test_batch_price_histories_use_one_download():
+    import pandas as pd
+
+    index = pd.date_range("2024-01-01", periods=30, freq="D")
+    columns = pd.MultiIndex.from_product([["AAPL", "NVDA"], ["Open", "High", "Low", "Close", "Volume"]])
+    frame = pd.DataFrame(1.0, index=index, columns=columns)
+    frame[("AAPL", "Close")] = [100.0 + i for i in range(30)]
+    frame[("NVDA", "Close")] = [50.0] * 30
+
+    with patch("app.services.market_data_service.yf.download", return_value=frame) as download:
+        result = json.loads(executor.execute_tool("get_price_histories", {"symbols": ["AAPL", "NVDA"], "period": "1mo"}))
+
+    assert download.call_count == 1
+    aapl = dict(zip(result["columns"], result["rows"][0]))
+    assert (aapl["start_close"], aapl["end_close"], aapl["change_pct"]) == (100.0, 129.0, 29.0)
+    assert len(result["closes"]["AAPL"]) <= 12 and result["closes"]["AAPL"][-1] == 129.0
+
+
+def test_portfolio_summary_combines_lots_and_refreshes_after_writes(db):
+    from app.models.portfolio_holding import PortfolioHolding
+    from app.models.user import User
+
+    user = User(email="tools@example.com", hashed_password="x", full_name="Tools User")
+    db.add(user)
+    db.commit()
+    db.add_all([
+        PortfolioHolding(user_id=user.id, symbol="AAPL", shares=10, avg_cost=100.0),
+        PortfolioHolding(user_id=user.id, symbol="aapl", shares=10, avg_cost=200.0),
+        PortfolioHolding(user_id=user.id, symbol="MSFT", shares=1, avg_cost=300.0),
+    ])
+    db.commit()
+
+    prices = {"AAPL": 180.0, "MSFT": 400.0}
+    with patch("app.services.market_data_service.get_stock_quote", side_effect=lambda s: {"price": prices[s]}), \
+            patch("app.services.market_data_service.prefetch_info"):
+        with patch.object(db, "query", wraps=db.query) as query:
+            result = executor.execute_tools([("get_portfolio_summary", {})], db=db, user_id=user.id)[0].data
+            executor.execute_tools([("get_portfolio_summary", {})], db=db, user_id=user.id)
+        assert query.call_count == 1
+
+        rows = [dict(zip(result["columns"], row)) for row in result["rows"]]
+        assert [(r["symbol"], r["shares"], r["avg_cost"], r["market_value"]) for r in rows] == [
+            ("AAPL", 20, 150.0, 3600.0), ("MSFT", 1, 300.0, 400.0),
+        ]
+        assert (result["total_value"], result["total_cost"], result["total_gain_loss"]) == (4000.0, 3300.0, 700.0)
+
+        db.add(PortfolioHolding(user_id=user.id, symbol="MSFT", shares=1, avg_cost=300.0))
+        db.commit()
+        result = executor.execute_tools([("get_portfolio_summary", {})], db=db, user_id=user.id)[0].data
+
+    assert result["total_value"] == 4400.0
@@ -1,7 +1,7 @@
 "use client";
 
 import { useSession } from "next-auth/react";
-import { useCallback, useEffect, useState } from "react";
+import { useCallback, useEffect, useRef, useState } from "react";
 import apiClient from "@/lib/api-client";
 
 export interface ChatMessage {
@@ -12,6 +12,11 @@ export interface ChatMessage {
   follow_ups?: string[];
 }
 
+// Follow-ups are generated in the background after /send; poll with backoff
+const FOLLOW_UP_POLL_DELAYS_MS = [500, 1000, 2000, 4000, 8000];
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export interface Conversation {
   id: number;
   title: string;
@@ -28,6 +33,14 @@ export function useChat() {
   >(null);
   const [loading, setLoading] = useState(false);
   const [conversationsLoading, setConversationsLoading] = useState(true);
+  const mountedRef = useRef(true);
+
+  useEffect(() => {
+    mountedRef.current = true;
+    return () => {
+      mountedRef.current = false;
+    };
+  }, []);
 
   useEffect(() => {
     if (session?.accessToken) {
@@ -68,6 +81,26 @@ export function useChat() {
     [session]
   );
 
+  const pollFollowUps = useCallback(async (messageId: number) => {
+    for (const delay of FOLLOW_UP_POLL_DELAYS_MS) {
+      await sleep(delay);
+      if (!mountedRef.current) return;
+      try {
+        const data = await apiClient.getFollowUps(messageId);
+        if (!data.ready) continue;
+        const followUps = data.follow_ups ?? [];
+        if (followUps.length > 0 && mountedRef.current) {
+          setMessages((prev) =>
+            prev.map((m) => (m.id === messageId ? { ...m, follow_ups: followUps } : m))
+          );
+        }
+        return;
+      } catch {
+        return;
+      }
+    }
+  }, []);
+
   const sendMessage = useCallback(
     async (content: string) => {
       if (!session?.accessToken || loading) return;
@@ -96,11 +129,14 @@ export function useChat() {
           role: "assistant",
           content: response.message.content,
           tool_results: response.message.tool_results as any,
-          follow_ups: (response.message as any).follow_ups ?? undefined,
+          follow_ups: response.message.follow_ups ?? undefined,
         };
 
         setMessages((prev) => [...prev, assistantMessage]);
         loadConversations();
+        if (!assistantMessage.follow_ups) {
+          pollFollowUps(assistantMessage.id);
+        }
       } catch (err: any) {
         // Re-throw entitlement errors so the page can show upgrade prompt
         if (err?.message?.includes("free messages") || err?.message?.includes("Upgrade to Pro")) {
@@ -119,7 +155,7 @@ export function useChat() {
         setLoading(false);
       }
     },
-    [session, loading, currentConversationId, loadConversations]
+    [session, loading, currentConversationId, loadConversations, pollFollowUps]
   );
 
   const newConversation = useCallback(() => {
@@ -66,7 +66,7 @@ class ApiClient {
         role: string;
         content: string;
         tool_results?: Array<{ tool: string; result: Record<string, unknown> }>;
-        follow_ups?: string[];
+        follow_ups?: string[] | null;
       };
     }>("/api/chat/send", {
       method: "POST",
@@ -74,6 +74,14 @@ class ApiClient {
     });
   }
 
+  async getFollowUps(messageId: number) {
+    return this.request<{
+      message_id: number;
+      ready: boolean;
+      follow_ups?: string[] | null;
+    }>(`/api/chat/messages/${messageId}/follow-ups`);
+  }
+
   async getConversations() {
     return this.request<
       Array<{